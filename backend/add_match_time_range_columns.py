@@ -0,0 +1,48 @@
+"""
+Adds the structured match time columns (match_date, match_start_minute,
+match_end_minute, match_ends_at) and their partial indexes to posts, then
+parses every existing match_time into them in small committed batches.
+Safe to re-run.
+Run once: python add_match_time_range_columns.py [batch_size]
+"""
+import sys
+from sqlalchemy import inspect, text
+from app.database.db import engine
+from app.posts.post_match_time import backfill_match_times
+
+batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+is_postgres = engine.dialect.name == "postgresql"
+
+COLUMNS = {
+    "match_date": "DATE",
+    "match_start_minute": "INTEGER",
+    "match_end_minute": "INTEGER",
+    "match_ends_at": "TIMESTAMP WITH TIME ZONE" if is_postgres else "DATETIME",
+}
+INDEXES = {
+    "ix_posts_active_match_minutes": "(match_start_minute, match_end_minute)",
+    "ix_posts_active_match_ends_at": "(match_ends_at)",
+}
+
+existing = {column["name"] for column in inspect(engine).get_columns("posts")}
+with engine.begin() as conn:
+    for name, sql_type in COLUMNS.items():
+        if name in existing:
+            print(f"✅ '{name}' kolonu zaten mevcut")
+            continue
+        conn.execute(text(f"ALTER TABLE posts ADD COLUMN {name} {sql_type} NULL"))
+        print(f"✅ '{name}' kolonu eklendi")
+
+# Postgres'te tabloyu kilitlememek için CONCURRENTLY kullan (transaction dışında çalışmalı)
+concurrently = "CONCURRENTLY " if is_postgres else ""
+with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+    for name, columns in INDEXES.items():
+        conn.execute(text(
+            f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON posts {columns} WHERE status = 'active'"
+        ))
+        print(f"✅ {name} indeksi eklendi")
+
+parsed = backfill_match_times(engine, batch_size=batch_size, pause_seconds=0.05)
+print(f"✅ {parsed} ilanın maç saati ayrıştırıldı")
+
+print("✅ Migration tamamlandı")
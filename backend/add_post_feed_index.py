@@ -0,0 +1,33 @@
+"""
+Adds the partial (created_at, id) WHERE status = 'active' index used by cursor
+pagination on GET /posts and by the post expiry job, and drops the older
+full (status, created_at, id) index it replaces.
+Run once: python add_post_feed_index.py
+"""
+from app.database.db import engine
+from sqlalchemy import text
+
+INDEX_SQL = (
+    "CREATE INDEX {concurrently}IF NOT EXISTS ix_posts_active_created_at_id "
+    "ON posts (created_at, id) WHERE status = 'active'"
+)
+DROP_SQL = "DROP INDEX {concurrently}IF EXISTS ix_posts_status_created_at_id"
+
+# Postgres'te tabloyu kilitlememek için CONCURRENTLY kullan (transaction dışında çalışmalı)
+concurrently = "CONCURRENTLY " if engine.dialect.name == "postgresql" else ""
+
+with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+    try:
+        conn.execute(text(INDEX_SQL.format(concurrently=concurrently)))
+        print("✅ ix_posts_active_created_at_id indeksi eklendi")
+    except Exception as e:
+        print(f"⚠️  ix_posts_active_created_at_id: {e}")
+        raise SystemExit(1)
+
+    try:
+        conn.execute(text(DROP_SQL.format(concurrently=concurrently)))
+        print("✅ Eski ix_posts_status_created_at_id indeksi kaldırıldı")
+    except Exception as e:
+        print(f"⚠️  ix_posts_status_created_at_id: {e}")
+
+print("✅ Migration tamamlandı")
@@ -0,0 +1,36 @@
+"""
+Adds location_lat / location_lon and their partial index to posts, then
+extracts coordinates from every existing location_link in small committed
+batches. Safe to re-run.
+Run once: python add_post_location_columns.py [batch_size]
+"""
+import sys
+from sqlalchemy import inspect, text
+from app.database.db import engine
+from app.posts.post_geo import backfill_post_coordinates
+
+batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+is_postgres = engine.dialect.name == "postgresql"
+
+existing = {column["name"] for column in inspect(engine).get_columns("posts")}
+with engine.begin() as conn:
+    for name in ("location_lat", "location_lon"):
+        if name in existing:
+            print(f"✅ '{name}' kolonu zaten mevcut")
+            continue
+        conn.execute(text(f"ALTER TABLE posts ADD COLUMN {name} {'DOUBLE PRECISION' if is_postgres else 'FLOAT'} NULL"))
+        print(f"✅ '{name}' kolonu eklendi")
+
+# Postgres'te tabloyu kilitlememek için CONCURRENTLY kullan (transaction dışında çalışmalı)
+concurrently = "CONCURRENTLY " if is_postgres else ""
+with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+    conn.execute(text(
+        f"CREATE INDEX {concurrently}IF NOT EXISTS ix_posts_active_location "
+        "ON posts (location_lat, location_lon) WHERE status = 'active'"
+    ))
+    print("✅ ix_posts_active_location indeksi eklendi")
+
+located = backfill_post_coordinates(engine, batch_size=batch_size, pause_seconds=0.05)
+print(f"✅ {located} ilanın konumu ayrıştırıldı")
+
+print("✅ Migration tamamlandı")
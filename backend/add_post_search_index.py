@@ -0,0 +1,18 @@
+"""
+Installs full-text search for GET /posts/search on an existing database.
+Postgres: pg_trgm, the generated search_vector column and its GIN indexes.
+SQLite: the posts_fts FTS5 table and its sync triggers, then a rebuild.
+Run once: python add_post_search_index.py
+"""
+from app.database.db import engine
+from app.posts.post_search import install_search_index
+
+with engine.begin() as conn:
+    try:
+        install_search_index(conn, rebuild=True)
+        print(f"✅ Arama indeksi kuruldu ({engine.dialect.name})")
+    except Exception as e:
+        print(f"⚠️  Arama indeksi: {e}")
+        raise
+
+print("✅ Migration tamamlandı")
@@ -1,15 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List
 from pydantic import BaseModel, EmailStr
 from app.database.db import get_db
 from app.users.user_model import User
-from app.posts.post_model import Post
+from app.posts.post_model import Post, PostPosition
 from app.lineups.lineup_model import Lineup
 from app.users.user_schema import UserResponse
 from app.posts.post_schema import PostResponse
-from app.core.security import verify_token, create_access_token, verify_password, get_password_hash
+from app.posts.post_counts import count_cache, forget_user_posts
+from app.posts.post_serialization import select_post_rows, serialize_post_rows
+from app.posts.post_views import view_counter
+from app.posts.post_cache import feed_cache, invalidate_all_feeds, invalidate_feed, snapshot_post
+from app.core.security import verify_token, create_access_token
+from app.core.password_hashing import get_password_hash_async, password_hasher
+from app.core.query_log import slow_query_log
+from app.core.rate_limit import rate_limiter
+from app.core.token_cache import purge_user_tokens, token_cache
+from app.users.user_cache import identity_cache, invalidate_user, load_user
 from app.core.config import settings
 import logging
 
@@ -30,40 +41,42 @@ class AdminStats(BaseModel):
     total_lineups: int
 
 
-def _ensure_admin_user(db: Session, email: str, name_hint: str = "") -> User:
-    user = db.query(User).filter(User.email == email).first()
+async def _ensure_admin_user(db: AsyncSession, email: str, name_hint: str = "") -> User:
+    user = await db.scalar(select(User).filter(User.email == email))
     if not user:
         user = User(email=email, name=name_hint or email.split("@")[0], is_admin=True, role="admin")
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
     else:
         if not user.is_admin:
             user.is_admin = True
         if not user.role or user.role != "admin":
             user.role = "admin"
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        invalidate_user(user.id)
+        await db.refresh(user)
     return user
 
 
-def admin_required(token: str = Depends(admin_oauth2_scheme), db: Session = Depends(get_db)) -> User:
+async def admin_required(token: str = Depends(admin_oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
     credentials_exception = HTTPException(status_code=403, detail="Admin yetkisi gerekli")
     payload = verify_token(token)
     if payload is None:
         raise credentials_exception
     email = payload.get("sub")
     role = payload.get("role")
-    if not email or role != "admin":
+    user_id = payload.get("user_id")
+    if not email or role != "admin" or user_id is None:
         raise credentials_exception
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not user.is_admin:
+    user = await load_user(db, user_id)
+    if not user or user.email != email or not user.is_admin:
         raise credentials_exception
     return user
 
 
 @router.post("/auth/login")
-async def admin_login(body: AdminLoginRequest, db: Session = Depends(get_db)):
+async def admin_login(body: AdminLoginRequest, db: AsyncSession = Depends(get_db)):
     allowed_emails = [e.strip().lower() for e in (getattr(settings, "ADMIN_EMAILS", "") or "").split(",") if e.strip()]
     master_password = getattr(settings, "ADMIN_MASTER_PASSWORD", None)
 
@@ -74,35 +87,35 @@ async def admin_login(body: AdminLoginRequest, db: Session = Depends(get_db)):
     if body.password != master_password:
         raise HTTPException(status_code=401, detail="Geçersiz kimlik bilgisi")
 
-    user = _ensure_admin_user(db, body.email.lower())
+    user = await _ensure_admin_user(db, body.email.lower())
     if not user.hashed_password:
-        user.hashed_password = get_password_hash(master_password)
-        db.commit()
+        user.hashed_password = await get_password_hash_async(master_password)
+        await db.commit()
 
     token = create_access_token({"sub": user.email, "user_id": user.id, "role": "admin", "is_admin": True})
     return {"access_token": token, "token_type": "bearer", "user": {"email": user.email, "is_admin": True, "id": user.id, "name": user.name, "role": user.role}}
 
 
 @router.get("/stats", response_model=AdminStats)
-async def get_stats(admin: User = Depends(admin_required), db: Session = Depends(get_db)):
+async def get_stats(admin: User = Depends(admin_required), db: AsyncSession = Depends(get_db)):
     try:
         return AdminStats(
-            total_users=db.query(User).count(),
-            active_users=db.query(User).filter(User.is_active == True).count(),
-            total_posts=db.query(Post).count(),
-            total_lineups=db.query(Lineup).count(),
+            total_users=await db.scalar(select(func.count(User.id))),
+            active_users=await db.scalar(select(func.count(User.id)).filter(User.is_active == True)),
+            total_posts=await db.scalar(select(func.count(Post.id))),
+            total_lineups=await db.scalar(select(func.count(Lineup.id))),
         )
     except Exception as e:
-        logger.error(f"❌ Error fetching stats: {str(e)}")
+        logger.error("❌ Error fetching stats: %s", e)
         raise HTTPException(status_code=500, detail="İstatistikler yüklenirken hata")
 
 
 # ============= KULLANICI YÖNETİMİ =============
 
 @router.get("/users", response_model=List[UserResponse])
-async def get_all_users(admin: User = Depends(admin_required), db: Session = Depends(get_db)):
-    logger.info(f"📋 Admin {admin.email} is fetching all users")
-    users = db.query(User).order_by(User.created_at.desc()).all()
+async def get_all_users(admin: User = Depends(admin_required), db: AsyncSession = Depends(get_db)):
+    logger.info("📋 Admin %s is fetching all users", admin.id)
+    users = (await db.scalars(select(User).order_by(User.created_at.desc()))).all()
     result = []
     for u in users:
         try:
@@ -122,37 +135,84 @@ async def get_all_users(admin: User = Depends(admin_required), db: Session = Dep
                 created_at=u.created_at,
             ))
         except Exception as e:
-            logger.warning(f"Skipping user {u.id} due to serialization error: {e}")
+            logger.warning("Skipping user %s due to serialization error: %s", u.id, e)
             continue
     return result
 
 
 @router.delete("/users/{user_id}")
-async def delete_user(user_id: int, admin: User = Depends(admin_required), db: Session = Depends(get_db)):
+async def delete_user(user_id: int, admin: User = Depends(admin_required), db: AsyncSession = Depends(get_db)):
     if user_id == admin.id:
         raise HTTPException(status_code=400, detail="Kendi hesabınızı silemezsiniz")
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).filter(User.id == user_id))
     if not user:
         raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı")
-    db.query(Post).filter(Post.user_id == user_id).delete()
-    db.query(Lineup).filter(Lineup.user_id == user_id).delete()
-    db.delete(user)
-    db.commit()
+    # Toplu silme ORM event'lerini atlar; ilan sayaçlarını önce düş
+    await db.run_sync(forget_user_posts, user_id)
+    user_post_ids = select(Post.id).filter(Post.user_id == user_id)
+    await db.execute(delete(PostPosition).filter(PostPosition.post_id.in_(user_post_ids.scalar_subquery())))
+    await db.execute(delete(Post).filter(Post.user_id == user_id))
+    await db.execute(delete(Lineup).filter(Lineup.user_id == user_id))
+    await db.delete(user)
+    await db.commit()
+    invalidate_all_feeds()
+    purge_user_tokens(user_id)
+    invalidate_user(user_id)
     return {"message": f"Kullanıcı {user.email} ve ilişkili veriler silindi"}
 
 
 # ============= İLAN YÖNETİMİ =============
 
 @router.get("/posts", response_model=List[PostResponse])
-async def get_all_posts(admin: User = Depends(admin_required), db: Session = Depends(get_db)):
-    return db.query(Post).order_by(Post.created_at.desc()).all()
+async def get_all_posts(admin: User = Depends(admin_required), db: AsyncSession = Depends(get_db)):
+    rows = (await db.execute(select_post_rows(select(Post).join(User)).order_by(Post.created_at.desc()))).all()
+    return serialize_post_rows(rows)
 
 
 @router.delete("/posts/{post_id}")
-async def delete_post(post_id: int, admin: User = Depends(admin_required), db: Session = Depends(get_db)):
-    post = db.query(Post).filter(Post.id == post_id).first()
+async def delete_post(post_id: int, admin: User = Depends(admin_required), db: AsyncSession = Depends(get_db)):
+    post = await db.scalar(select(Post).options(selectinload(Post.position_links)).filter(Post.id == post_id))
     if not post:
         raise HTTPException(status_code=404, detail="İlan bulunamadı")
-    db.delete(post)
-    db.commit()
+    before = snapshot_post(post)
+    await db.delete(post)
+    await db.commit()
+    invalidate_feed([before])
     return {"message": "İlan silindi"}
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(admin: User = Depends(admin_required)):
+    return {
+        "post_feed": feed_cache.stats(),
+        "post_counts": count_cache.stats(),
+        "post_views": view_counter.stats(),
+        "auth_tokens": token_cache.stats(),
+        "identities": identity_cache.stats(),
+    }
+
+
+@router.get("/hashing/stats")
+async def get_hashing_stats(admin: User = Depends(admin_required)):
+    return password_hasher.stats()
+
+
+@router.get("/rate-limit/stats")
+async def get_rate_limit_stats(admin: User = Depends(admin_required)):
+    return rate_limiter.stats()
+
+
+@router.get("/slow-queries")
+async def get_slow_queries(limit: int = 50, admin: User = Depends(admin_required)):
+    """Slow statements of this worker: totals per normalized statement and the most recent ones"""
+    return {
+        "stats": slow_query_log.stats(),
+        "top": slow_query_log.top(limit),
+        "recent": slow_query_log.entries()[:limit],
+    }
+
+
+@router.delete("/slow-queries")
+async def clear_slow_queries(admin: User = Depends(admin_required)):
+    slow_query_log.clear()
+    return {"message": "Yavaş sorgu kayıtları temizlendi"}
@@ -1,13 +1,18 @@
 from fastapi import APIRouter, Request, HTTPException, Depends
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.auth.google_oauth import google_oauth
 from app.database.db import get_db
 from app.users.user_model import User
 from app.core.security import create_access_token
+from app.users.user_cache import invalidate_user
+from app.core.password_hashing import get_password_hash_async, verify_password_async
 import json
+import logging
 import urllib.parse
 
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 @router.get("/google/login")
@@ -16,7 +21,7 @@ def google_login():
     return RedirectResponse(url)
 
 @router.get("/google/callback")
-async def google_callback(request: Request, db: Session = Depends(get_db)):
+async def google_callback(request: Request, db: AsyncSession = Depends(get_db)):
     code = request.query_params.get("code")
     if not code:
         raise HTTPException(status_code=400, detail="Authorization code bulunamadı")
@@ -33,7 +38,7 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
         user_info = await google_oauth.get_user_info(access_token)
         
         # 3. Veritabanında kullanıcıyı kontrol et/yarat
-        user = db.query(User).filter(User.email == user_info["email"]).first()
+        user = await db.scalar(select(User).filter(User.email == user_info["email"]))
         
         if not user:
             # Yeni kullanıcı oluştur
@@ -44,9 +49,9 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
                 is_verified=user_info.get("verified_email", False)
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
-            print(f"✅ Yeni kullanıcı oluşturuldu: {user.email}")
+            await db.commit()
+            await db.refresh(user)
+            logger.info("✅ Yeni kullanıcı oluşturuldu: %s", user.id)
         else:
             # Mevcut kullanıcıyı güncelle (gerekirse)
             if not user.google_id:
@@ -55,8 +60,9 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
                 user.name = user_info["name"]
             if not user.is_verified and user_info.get("verified_email"):
                 user.is_verified = True
-            db.commit()
-            print(f"🔄 Mevcut kullanıcı güncellendi: {user.email}")
+            await db.commit()
+            invalidate_user(user.id)
+            logger.info("🔄 Mevcut kullanıcı güncellendi: %s", user.id)
 
         # 4. JWT token oluştur
         jwt_token = create_access_token(data={"sub": user.email, "user_id": user.id})
@@ -76,14 +82,14 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
         )
 
     except Exception as e:
-        print(f"❌ Google callback hatası: {e}")
+        logger.exception("❌ Google callback hatası: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Authentication hatası: {str(e)}"
         )
 
 @router.post("/register")
-async def register(user_data: dict, db: Session = Depends(get_db)):
+async def register(user_data: dict, db: AsyncSession = Depends(get_db)):
     """Email/password ile kullanıcı kaydı"""
     try:
         # Validate required fields
@@ -104,13 +110,12 @@ async def register(user_data: dict, db: Session = Depends(get_db)):
             raise HTTPException(status_code=400, detail="Şifre en az 6 karakter olmalıdır")
         
         # Check if user already exists
-        existing_user = db.query(User).filter(User.email == email).first()
+        existing_user = await db.scalar(select(User).filter(User.email == email))
         if existing_user:
             raise HTTPException(status_code=400, detail="Bu email adresi zaten kayıtlı")
         
-        # Hash password
-        from app.core.security import get_password_hash
-        hashed_password = get_password_hash(password)
+        # Hash password (event loop'u bloklamadan)
+        hashed_password = await get_password_hash_async(password)
         
         # Create user
         new_user = User(
@@ -120,8 +125,8 @@ async def register(user_data: dict, db: Session = Depends(get_db)):
             is_verified=False
         )
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
         
         # Create JWT token
         jwt_token = create_access_token(data={"sub": new_user.email, "user_id": new_user.id})
@@ -139,11 +144,11 @@ async def register(user_data: dict, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Registration error: {e}")
+        logger.exception("❌ Registration error: %s", e)
         raise HTTPException(status_code=500, detail=f"Kayıt hatası: {str(e)}")
 
 @router.post("/login")
-async def login(credentials: dict, db: Session = Depends(get_db)):
+async def login(credentials: dict, db: AsyncSession = Depends(get_db)):
     """Email/password ile giriş"""
     try:
         email = credentials.get("email")
@@ -153,7 +158,7 @@ async def login(credentials: dict, db: Session = Depends(get_db)):
             raise HTTPException(status_code=400, detail="Email ve şifre gereklidir")
         
         # Find user
-        user = db.query(User).filter(User.email == email).first()
+        user = await db.scalar(select(User).filter(User.email == email))
         if not user:
             raise HTTPException(status_code=401, detail="Email veya şifre hatalı")
         
@@ -161,9 +166,8 @@ async def login(credentials: dict, db: Session = Depends(get_db)):
         if not user.hashed_password:
             raise HTTPException(status_code=401, detail="Bu hesap Google ile oluşturulmuş. Lütfen Google ile giriş yapın.")
         
-        # Verify password
-        from app.core.security import verify_password
-        if not verify_password(password, user.hashed_password):
+        # Verify password (event loop'u bloklamadan)
+        if not await verify_password_async(password, user.hashed_password):
             raise HTTPException(status_code=401, detail="Email veya şifre hatalı")
         
         # Create JWT token
@@ -186,5 +190,5 @@ async def login(credentials: dict, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Login error: {e}")
+        logger.exception("❌ Login error: %s", e)
         raise HTTPException(status_code=500, detail=f"Giriş hatası: {str(e)}")
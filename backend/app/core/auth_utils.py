@@ -3,10 +3,13 @@ Enhanced authentication and authorization utilities
 Provides additional security layers beyond basic JWT validation
 """
 from fastapi import HTTPException, Depends, Request
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database.db import get_db
 from app.users.user_model import User
+from app.users.user_cache import load_user
 from app.core.security import verify_token
+from app.core.timing import span
 from fastapi.security import OAuth2PasswordBearer
 from functools import wraps
 from datetime import datetime
@@ -17,51 +20,71 @@ logger = logging.getLogger(__name__)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=401,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def user_from_payload(payload: dict, db: AsyncSession) -> User:
+    """
+    Resolve a verified token payload to its user.
+
+    Looks the user up by user_id through the identity cache (no query on a
+    hit); tokens without user_id fall back to the email in `sub`.
+    """
+    email = payload.get("sub")
+    if email is None:
+        raise _credentials_exception()
+    
+    user_id = payload.get("user_id")
+    with span("user"):
+        if user_id is not None:
+            user = await load_user(db, user_id)
+        else:
+            user = await db.scalar(select(User).filter(User.email == email))
+    
+    # Token başka bir kullanıcıya ait olamaz (silinip id'si yeniden kullanılmış hesap vb.)
+    if user is None or user.email != email:
+        logger.warning("Token for non-existent user: user_id=%s", user_id)
+        raise _credentials_exception()
+    return user
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+    """Shared dependency for every endpoint that needs the logged-in user"""
+    payload = verify_token(token)
+    if payload is None:
+        raise _credentials_exception()
+    return await user_from_payload(payload, db)
+
+
 async def get_current_user_enhanced(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     request: Request = None
 ) -> User:
     """
     Enhanced user authentication with additional security checks
     """
-    credentials_exception = HTTPException(
-        status_code=401,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
     # Verify token
     payload = verify_token(token)
     if payload is None:
-        logger.warning(f"Invalid token attempt from IP: {request.client.host if request else 'unknown'}")
-        raise credentials_exception
+        logger.warning("Invalid token attempt from IP: %s", request.client.host if request and request.client else "unknown")
+        raise _credentials_exception()
     
-    # Extract user email
-    email: str = payload.get("sub")
-    if email is None:
-        raise credentials_exception
-    
-    # Get user from database
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        logger.warning(f"Token for non-existent user: {email}")
-        raise credentials_exception
+    user = await user_from_payload(payload, db)
     
     # Check if user is active
     if hasattr(user, 'is_active') and not user.is_active:
         raise HTTPException(status_code=403, detail="User account is disabled")
     
-    # Optional: Check token's user_id matches database user_id
-    token_user_id = payload.get("user_id")
-    if token_user_id and token_user_id != user.id:
-        logger.error(f"Token user_id mismatch: token={token_user_id}, db={user.id}")
-        raise credentials_exception
-    
     # Log successful authentication (optional, for audit trail)
     # Be careful with logging in production - don't log sensitive data
     if request:
-        logger.info(f"User {user.id} authenticated from IP: {request.client.host}")
+        logger.info("User %s authenticated from IP: %s", user.id, request.client.host if request.client else "unknown")
     
     return user
 
@@ -94,10 +117,10 @@ def require_ownership(model_class, id_field: str = "id"):
                 raise HTTPException(status_code=500, detail="Database session not available")
             
             # Check ownership
-            resource = db.query(model_class).filter(
+            resource = await db.scalar(select(model_class).filter(
                 getattr(model_class, id_field.replace("_id", "")) == resource_id,
                 model_class.user_id == current_user.id
-            ).first()
+            ))
             
             if not resource:
                 raise HTTPException(
@@ -131,8 +154,8 @@ class RoleChecker:
         
         if current_user.role not in self.allowed_roles:
             logger.warning(
-                f"Access denied for user {current_user.id} "
-                f"(role: {current_user.role}, required: {self.allowed_roles})"
+                "Access denied for user %s (role: %s, required: %s)",
+                current_user.id, current_user.role, self.allowed_roles,
             )
             raise HTTPException(
                 status_code=403,
@@ -158,16 +181,16 @@ def log_sensitive_operation(operation: str):
             user_id = current_user.id if current_user else "unknown"
             
             logger.info(
-                f"AUDIT: Operation '{operation}' by user_id={user_id} "
-                f"at {datetime.utcnow().isoformat()}"
+                "AUDIT: Operation '%s' by user_id=%s at %s",
+                operation, user_id, datetime.utcnow().isoformat(),
             )
             
             try:
                 result = await func(*args, **kwargs)
-                logger.info(f"AUDIT: Operation '{operation}' completed successfully")
+                logger.info("AUDIT: Operation '%s' completed successfully", operation)
                 return result
             except Exception as e:
-                logger.error(f"AUDIT: Operation '{operation}' failed: {str(e)}")
+                logger.error("AUDIT: Operation '%s' failed: %s", operation, e)
                 raise
         
         return wrapper
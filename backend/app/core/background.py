@@ -0,0 +1,50 @@
+"""
+In-process periodic jobs
+
+Jobs are plain blocking functions; each run happens in the default thread
+pool so database work never blocks the event loop. A failing run is logged
+and the job keeps its schedule.
+"""
+from typing import Callable, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Run `func` every `interval` seconds on the running event loop"""
+
+    def __init__(self, name: str, func: Callable[[], object], interval: float, run_on_stop: bool = False):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.run_on_stop = run_on_stop
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self):
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, self.func)
+        except Exception as e:
+            logger.error("❌ Background job '%s' failed: %s", self.name, e)
+            return None
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_once()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.run_on_stop:
+            await self.run_once()
@@ -0,0 +1,122 @@
+"""
+Pluggable key/value cache used in front of hot read endpoints
+
+CacheBackend is the interface every backend implements. InMemoryLRUCache is
+the default per-process backend: a bounded LRU with a per-entry TTL and
+hit/miss counters. The shared backends in app/core/shared_state.py provide
+the same methods; values are always JSON-compatible so they can be stored
+out of process.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+import threading
+import time
+
+
+class CacheBackend:
+    """Interface for cache backends"""
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Atomically add `amount` to an integer entry; a missing or expired entry starts from 0 with `ttl`"""
+        raise NotImplementedError
+
+    def delete(self, keys: Iterable[str]):
+        raise NotImplementedError
+
+    def keys(self, prefix: str = "") -> List[str]:
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    # Olay döngüsünden çağrılacak sürümler; bellek içi arka uç doğrudan çalışır,
+    # paylaşılan arka uçlar (app/core/shared_state.py) çağrıyı bir thread'e taşır
+    async def aget(self, key: str) -> Optional[Any]:
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.set(key, value, ttl)
+
+
+class InMemoryLRUCache(CacheBackend):
+    """Thread-safe in-process LRU cache with TTL expiry"""
+
+    def __init__(self, max_entries: int = 512, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                entry = (now + (self.ttl if ttl is None else ttl), 0)
+            entry = (entry[0], entry[1] + amount)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return entry[1]
+
+    def delete(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def keys(self, prefix: str = "") -> List[str]:
+        with self._lock:
+            return [key for key in self._entries if key.startswith(prefix)]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
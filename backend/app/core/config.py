@@ -15,6 +15,9 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 180  # 3 saat
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000    # doğrulanmış token önbelleği (bkz. app/core/token_cache.py)
+    IDENTITY_CACHE_TTL_SECONDS: int = 30    # get_current_user kullanıcı önbelleği (bkz. app/users/user_cache.py)
+    IDENTITY_CACHE_MAX_ENTRIES: int = 10000
     
     # Frontend URL
     FRONTEND_URL: str = "https://findteam-ten.vercel.app"
@@ -26,6 +29,67 @@ class Settings(BaseSettings):
     # Admin
     ADMIN_EMAILS: str = ""           # comma-separated allowed admin emails
     ADMIN_MASTER_PASSWORD: str = ""  # master password for admin login
+
+    # Password hashing (PBKDF2, see app/core/password_hashing.py)
+    PASSWORD_HASH_WORKERS: int = 2     # aynı anda çalışan en fazla hash
+    PASSWORD_HASH_MAX_QUEUE: int = 32  # bekleyebilecek en fazla hash; aşılırsa 503
+
+    # Rate limiting (sliding window counter, see app/core/rate_limit.py)
+    RATE_LIMIT_PER_MINUTE: int = 100        # IP başına genel limit
+    RATE_LIMIT_AUTH_PER_MINUTE: int = 10    # login/register uçları için IP başına limit
+    RATE_LIMIT_MAX_KEYS: int = 100000       # bellekte tutulan en fazla (politika, IP) anahtarı
+    # X-Forwarded-For sadece bu adreslerden (önümüzdeki proxy'ler) gelirse dikkate alınır; "*" başlığı
+    # istemcinin yazdığı en soldaki değere güvenir ve rate limit / IP whitelist atlatılabilir
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1"  # virgülle ayrılmış proxy adresleri
+
+    # Worker'lar arası ortak durum: limiter sayaçları ve önbellekler (bkz. app/core/shared_state.py)
+    SHARED_STATE_BACKEND: str = "memory"    # memory | sqlite | redis
+    SHARED_STATE_URL: str = ""              # sqlite dosya yolu (zorunlu, sadece uygulama kullanıcısı yazabilmeli) ya da redis:// adresi
+
+    # Response compression (see app/middleware/compression.py)
+    COMPRESSION_MIN_SIZE: int = 1024        # bu boyutun altındaki yanıtlar sıkıştırılmaz
+    COMPRESSION_GZIP_LEVEL: int = 6         # 1 (hızlı) - 9 (küçük)
+    COMPRESSION_BROTLI_QUALITY: int = 4     # 0 - 11; brotli paketi kuruluysa kullanılır
+
+    # Request timing (see app/core/timing.py)
+    SERVER_TIMING_ENABLED: bool = True      # span ölçümü ve Server-Timing başlığı (kapalıysa istek logu da yazılmaz)
+    REQUEST_LOG_ENABLED: bool = True        # istek başına JSON log satırı
+
+    # Prometheus metrics (see app/core/metrics.py)
+    METRICS_ENABLED: bool = True            # GET /metrics ve istek sayaçları
+    METRICS_TOKEN: str = ""                 # doluysa /metrics "Authorization: Bearer <token>" ister; production'da boşsa /metrics kapalı
+    METRICS_DIR: str = ""                   # worker'ların anlık görüntülerini yazdığı dizin; boşsa sadece bu süreç
+    METRICS_FLUSH_SECONDS: int = 5          # anlık görüntünün METRICS_DIR'e yazılma aralığı
+
+    # Slow-query log (see app/core/query_log.py)
+    SLOW_QUERY_THRESHOLD_MS: int = 200      # bu süreyi aşan sorgular kaydedilir
+    SLOW_QUERY_LOG_SIZE: int = 200          # süreç başına tutulan en fazla kayıt
+    SLOW_QUERY_EXPLAIN_ENABLED: bool = False  # PostgreSQL'de yavaş SELECT'ler için EXPLAIN (ANALYZE, BUFFERS)
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.1     # yavaş sorguların ne kadarı EXPLAIN edilir
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: int = 60   # iki EXPLAIN arasındaki en kısa süre
+
+    # N+1 guard (see app/core/query_guard.py)
+    QUERY_GUARD_MODE: str = ""              # off | warn | raise; boşsa production'da off, diğer ortamlarda warn
+    QUERY_GUARD_MAX_REPEATS: int = 10       # aynı sorgunun tek istekte en fazla tekrarı
+
+    # Logging (see app/core/log_setup.py)
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"                # json | text
+    LOG_QUEUE_SIZE: int = 10000             # doluysa yeni kayıtlar atılır, istek beklemez
+    LOG_SAMPLE_RATE: float = 0.1            # aşağıdaki logger'ların INFO kayıtlarının tutulan oranı
+    LOG_SAMPLED_LOGGERS: str = "app.lineups.lineup_routes,app.core.auth_utils"  # virgülle ayrılmış
+
+    # Post feed
+    POST_COUNT_CACHE_TTL_SECONDS: int = 30  # serbest metin filtreli sayımlar için önbellek süresi
+    POST_FEED_CACHE_TTL_SECONDS: int = 30   # GET /posts yanıt önbelleği süresi
+    POST_FEED_CACHE_MAX_ENTRIES: int = 512
+    POST_VIEW_FLUSH_SECONDS: int = 30       # görüntülenme sayaçlarının veritabanına yazılma aralığı
+    POST_VIEW_DEDUP_SECONDS: int = 1800     # aynı kişinin tekrar görüntülemesi bu süre içinde sayılmaz
+    POST_EXPIRY_ENABLED: bool = False       # açıkça açılmadıkça ilanlar otomatik kapatılmaz (veri değiştirir)
+    POST_EXPIRY_INTERVAL_SECONDS: int = 600 # süresi dolan ilanları kapatan işin çalışma aralığı
+    POST_EXPIRY_BATCH_SIZE: int = 500       # tek UPDATE'te kapatılan en fazla ilan
+    POST_MAX_AGE_DAYS: int = 30             # bu kadar gün önce açılan aktif ilanlar "expired" olur
+    MATCH_TIMEZONE: str = "Europe/Istanbul" # match_time içindeki tarih/saatlerin saat dilimi
     
     class Config:
         env_file = ".env"
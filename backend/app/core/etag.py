@@ -0,0 +1,40 @@
+"""
+ETag / If-None-Match helpers for read endpoints
+
+ETags are derived from row versions (ids, created_at/updated_at, counts), not
+from the response body, so a route can answer a conditional request with a
+cheap fingerprint query before loading rows or building any models.
+"""
+from fastapi import Request, Response
+import hashlib
+
+
+def compute_etag(*parts) -> str:
+    """Strong ETag over the given version parts"""
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match header lists this ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        # If-None-Match zayıf karşılaştırma kullanır (RFC 7232 3.2)
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def etag_headers(etag: str, private: bool = False) -> dict:
+    """Headers that make clients revalidate with If-None-Match on every read"""
+    return {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache" if private else "no-cache",
+    }
+
+
+def not_modified_response(etag: str, private: bool = False) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag, private=private))
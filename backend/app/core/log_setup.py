@@ -0,0 +1,127 @@
+"""
+Logging setup: queued, sampled, JSON
+
+configure_logging() is called once from app/main.py. A log call on the
+event loop only builds a LogRecord and puts it on a bounded queue. A
+QueueListener thread formats it and writes to stderr, so a slow stderr
+never stalls request handling. When the queue is full, records are dropped
+and counted instead of blocking.
+
+Formatting happens in the listener thread. Pass arguments
+(logger.info("x %s", y)) rather than f-strings, and pass plain values, not
+ORM objects. INFO and lower records from LOG_SAMPLED_LOGGERS are kept with
+probability LOG_SAMPLE_RATE; warnings and errors are always kept.
+
+LOG_FORMAT=json writes one JSON object per line: ts, level, logger,
+message, any `extra` fields, and the formatted exception.
+LOG_FORMAT=text writes the usual one-line format for local development.
+"""
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Iterable, Optional
+from app.core.config import settings
+import atexit
+import logging
+import orjson
+import queue
+import random
+import sys
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# LogRecord'un kendi alanları; geri kalanlar `extra` ile gelmiştir
+_RECORD_FIELDS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, with `extra` fields at the top level"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return orjson.dumps(entry, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+class SamplingFilter(logging.Filter):
+    """Keep INFO and lower records of the given loggers (and their children) with probability `rate`"""
+
+    def __init__(self, names: Iterable[str], rate: float):
+        super().__init__()
+        self.names = tuple(names)
+        self.rate = rate
+        self._sampled: Dict[str, bool] = {}
+
+    def _is_sampled(self, name: str) -> bool:
+        sampled = self._sampled.get(name)
+        if sampled is None:
+            sampled = self._sampled[name] = any(name == n or name.startswith(n + ".") for n in self.names)
+        return sampled
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or not self._is_sampled(record.name):
+            return True
+        return random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the listener unformatted; drops them when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # QueueHandler varsayılanı mesajı burada (çağıran thread'de) biçimlendirir; biz dinleyiciye bırakıyoruz
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+
+
+def configure_logging():
+    """Route every log record through the queue to one stderr handler (idempotent)"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JSONFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    sampled = [name.strip() for name in settings.LOG_SAMPLED_LOGGERS.split(",") if name.strip()]
+    if sampled and settings.LOG_SAMPLE_RATE < 1:
+        _queue_handler.addFilter(SamplingFilter(sampled, settings.LOG_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    root.handlers = [_queue_handler]
+    root.setLevel(settings.LOG_LEVEL)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    # Çıkışta kuyrukta kalan kayıtlar yazılır
+    atexit.register(_listener.stop)
+
+
+def logging_stats() -> Dict[str, int]:
+    if _queue_handler is None:
+        return {"queued": 0, "dropped": 0}
+    return {"queued": _queue_handler.queue.qsize(), "dropped": _queue_handler.dropped}
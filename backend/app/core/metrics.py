@@ -0,0 +1,414 @@
+"""
+Prometheus metrics for GET /metrics
+
+Request counts, latency histograms and the in-flight gauge are recorded by
+MetricsMiddleware (app/middleware/metrics.py). It runs on the event loop
+thread only, so recording a request is a couple of dict updates with no
+lock. Connection pool wait times can come from worker threads as well and
+take a small lock. Rate limiter, cache and pool numbers are read from their
+stats() when a snapshot is taken, so they cost nothing per request.
+
+/metrics needs METRICS_TOKEN ("Authorization: Bearer <token>") when one is
+set. In production it is not served at all without a token (see
+metrics_enabled).
+
+Every gunicorn worker has its own numbers. With METRICS_DIR set, each worker
+writes a JSON snapshot to METRICS_DIR/metrics-<pid>-<random>.json every
+METRICS_FLUSH_SECONDS and once more on shutdown; the random part keeps a
+reused PID from overwriting an exited worker's file. /metrics merges the
+files of all workers:
+
+- Counters and histograms are summed, so totals never go backwards.
+- Gauges (in-flight requests, pool usage) only come from workers that wrote
+  within three flush intervals.
+- A file not rewritten for STALE_AFTER_FLUSHES intervals belongs to an
+  exited worker. Its counters and histograms are folded into
+  metrics-totals.json and the file is deleted, so the directory does not
+  grow with every worker restart. A worker that finds its own file folded
+  (it stalled that long) writes only what it counted since.
+
+Writing, folding and reading take a lock file in METRICS_DIR (flock), so
+they never see each other's half-done work. Without METRICS_DIR, /metrics
+shows the answering process only.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import uuid4
+from app.core.background import PeriodicTask
+from app.core.config import settings
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: dosya kilidi yok; yerel geliştirmede tek süreç yeterli
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+# name -> (type, help, histogram buckets)
+FAMILIES: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {
+    "findteam_http_requests_total": ("counter", "HTTP requests by method, route template and status", ()),
+    "findteam_http_request_duration_seconds": ("histogram", "HTTP request latency by method and route template", HTTP_BUCKETS),
+    "findteam_http_requests_in_flight": ("gauge", "HTTP requests being served", ()),
+    "findteam_rate_limit_requests_total": ("counter", "Rate limiter decisions", ()),
+    "findteam_cache_hits_total": ("counter", "Cache lookups that found an entry", ()),
+    "findteam_cache_misses_total": ("counter", "Cache lookups that found nothing", ()),
+    "findteam_shared_state_errors_total": ("counter", "Failed shared store calls, served as a cache miss or an allowed request", ()),
+    "findteam_cache_hit_ratio": ("gauge", "Cache hits / lookups since the workers started", ()),
+    "findteam_db_pool_size": ("gauge", "Configured connection pool size", ()),
+    "findteam_db_pool_checked_out": ("gauge", "Connections currently checked out of the pool", ()),
+    "findteam_db_pool_overflow": ("gauge", "Checked-out connections beyond the pool size", ()),
+    "findteam_db_pool_wait_seconds": ("histogram", "Time to get a connection from the pool, including connecting", POOL_WAIT_BUCKETS),
+    "findteam_log_records_dropped_total": ("counter", "Log records dropped because the log queue was full", ()),
+}
+
+_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+TOTALS_FILE = "metrics-totals.json"
+
+
+def metrics_enabled() -> bool:
+    """METRICS_ENABLED, except in production without a METRICS_TOKEN: /metrics is never public there"""
+    if not settings.METRICS_ENABLED:
+        return False
+    return bool(settings.METRICS_TOKEN) or settings.ENVIRONMENT != "production"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Counter:
+    """Monotonic values per rendered label set"""
+
+    __slots__ = ("series",)
+
+    def __init__(self):
+        self.series: Dict[str, float] = {}
+
+    def inc(self, labels: str, amount: float = 1):
+        self.series[labels] = self.series.get(labels, 0) + amount
+
+    def snapshot(self) -> Dict[str, float]:
+        return dict(self.series)
+
+
+class Histogram:
+    """Bucket counts per label set: one slot per bucket, one for +Inf, then the sum"""
+
+    __slots__ = ("buckets", "series")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.series: Dict[str, List[float]] = {}
+
+    def observe(self, labels: str, value: float):
+        counts = self.series.get(labels)
+        if counts is None:
+            counts = self.series[labels] = [0] * (len(self.buckets) + 2)
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def snapshot(self) -> Dict[str, List[float]]:
+        return {labels: list(counts) for labels, counts in list(self.series.items())}
+
+
+class Metrics:
+    """This process's metrics, plus writing and merging the per-worker snapshots"""
+
+    # Bu kadar flush aralığı yazılmayan dosya kapanmış bir worker'ındır
+    STALE_AFTER_FLUSHES = 12
+
+    def __init__(self, directory: str = "", flush_seconds: float = 5.0):
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self.in_flight = 0
+        self.requests = Counter()
+        self.durations = Histogram(HTTP_BUCKETS)
+        self.pool_waits = Histogram(POOL_WAIT_BUCKETS)
+        self._pool_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._file_pid: Optional[int] = None
+        self._file_name = ""
+        self._last_written: Optional[Dict[str, Any]] = None
+        self._base: Optional[Dict[str, Any]] = None
+        self.folded = 0
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        """Called from the event loop thread only"""
+        labels = f'method="{method if method in _METHODS else "OTHER"}",route="{_escape(route)}"'
+        self.requests.inc(f'{labels},status="{status}"')
+        self.durations.observe(labels, seconds)
+
+    def observe_pool_wait(self, engine: str, seconds: float):
+        with self._pool_lock:
+            self.pool_waits.observe(f'engine="{engine}"', seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._pool_lock:
+            pool_waits = self.pool_waits.snapshot()
+        counters = {"findteam_http_requests_total": self.requests.snapshot()}
+        gauges = {"findteam_http_requests_in_flight": {"": self.in_flight}}
+        _collect_app_stats(counters, gauges)
+        return {
+            "pid": os.getpid(),
+            "written": time.time(),
+            "counters": counters,
+            "gauges": gauges,
+            "histograms": {
+                "findteam_http_request_duration_seconds": self.durations.snapshot(),
+                "findteam_db_pool_wait_seconds": pool_waits,
+            },
+        }
+
+    def _own_path(self) -> str:
+        pid = os.getpid()
+        if self._file_pid != pid:
+            # fork sonrası ya da ilk yazımda; PID yeniden kullanılsa da dosya adı bu sürece özgü
+            self._file_pid, self._file_name = pid, f"metrics-{pid}-{uuid4().hex[:8]}.json"
+            self._last_written = self._base = None
+        return os.path.join(self.directory, self._file_name)
+
+    @contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def flush(self):
+        """Write this worker's snapshot for the others to merge and fold stale files (no-op without METRICS_DIR)"""
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with self._flush_lock:
+            path = self._own_path()
+            snapshot = self.snapshot()
+            with self._locked(exclusive=True):
+                if self._last_written is not None and not os.path.exists(path):
+                    # Dosyamız durgun sanılıp toplamlara katılmış; bundan sonra sadece yeni sayılar yazılır
+                    self._base = self._last_written
+                _write_json(path, subtract_snapshot(snapshot, self._base) if self._base else snapshot)
+                self._last_written = snapshot
+                self._fold_stale_files(path)
+
+    def _fold_stale_files(self, own_path: str):
+        # Dışlayıcı kilit altında çağrılır
+        totals_path = os.path.join(self.directory, TOTALS_FILE)
+        cutoff = time.time() - self.STALE_AFTER_FLUSHES * self.flush_seconds
+        stale = []
+        for path in glob.glob(os.path.join(self.directory, "metrics-*.json")):
+            if path in (own_path, totals_path):
+                continue
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    stale.append(path)
+            except OSError:
+                continue
+        if not stale:
+            return
+
+        snapshots = []
+        if os.path.exists(totals_path):
+            snapshots.append(_read_json(totals_path))
+        for path in stale:
+            try:
+                snapshots.append(_read_json(path))
+            except (OSError, ValueError) as e:
+                logger.warning("⚠️ Dropping unreadable metrics file %s: %s", path, e)
+        # Ölçerler (gauge) eski worker'lardan toplanmaz
+        merged = merge_snapshots(snapshots, fresh_after=float("inf"))
+        _write_json(totals_path, {"written": 0, "counters": merged["counters"], "histograms": merged["histograms"]})
+        for path in stale:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.folded += len(stale)
+        logger.info("🧹 Folded %d exited workers' metrics files into %s", len(stale), TOTALS_FILE)
+
+    def _worker_snapshots(self) -> List[Dict[str, Any]]:
+        snapshots = []
+        with self._locked(exclusive=False):
+            for path in glob.glob(os.path.join(self.directory, "metrics-*.json")):
+                try:
+                    snapshots.append(_read_json(path))
+                except (OSError, ValueError) as e:
+                    # Bozuk dosya bu taramada atlanır
+                    logger.warning("⚠️ Skipping metrics file %s: %s", path, e)
+        return snapshots
+
+    def render(self) -> str:
+        """Text exposition format of all workers' merged metrics"""
+        if self.directory:
+            # Kendi dosyamız önce yazılır; böylece bu süreç de diğerleri gibi dosyasından okunur
+            self.flush()
+            snapshots = self._worker_snapshots()
+        else:
+            snapshots = [self.snapshot()]
+        merged = merge_snapshots(snapshots, time.time() - 3 * self.flush_seconds)
+        _add_hit_ratios(merged)
+        return render_text(merged)
+
+
+def _read_json(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_json(path: str, data: Dict[str, Any]):
+    with open(path + ".tmp", "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(path + ".tmp", path)
+
+
+def subtract_snapshot(snapshot: Dict[str, Any], base: Dict[str, Any]) -> Dict[str, Any]:
+    """Counters and histograms of `snapshot` minus those of `base`; gauges as they are"""
+    result = dict(snapshot)
+    for kind in ("counters", "histograms"):
+        result[kind] = {}
+        for name, series in snapshot.get(kind, {}).items():
+            base_series = base.get(kind, {}).get(name, {})
+            target = result[kind][name] = {}
+            for labels, value in series.items():
+                previous = base_series.get(labels)
+                if previous is None:
+                    target[labels] = value
+                elif kind == "counters":
+                    target[labels] = value - previous
+                elif len(previous) == len(value):
+                    target[labels] = [a - b for a, b in zip(value, previous)]
+                else:
+                    target[labels] = value
+    return result
+
+
+def merge_snapshots(snapshots: Iterable[Dict[str, Any]], fresh_after: float) -> Dict[str, Dict[str, Any]]:
+    """Sum counters and histograms of every snapshot, gauges of those written after fresh_after"""
+    merged: Dict[str, Dict[str, Any]] = {"counters": {}, "gauges": {}, "histograms": {}}
+    for snapshot in snapshots:
+        fresh = snapshot.get("written", 0) >= fresh_after
+        for kind in ("counters", "gauges"):
+            if kind == "gauges" and not fresh:
+                continue
+            for name, series in snapshot.get(kind, {}).items():
+                target = merged[kind].setdefault(name, {})
+                for labels, value in series.items():
+                    target[labels] = target.get(labels, 0) + value
+        for name, series in snapshot.get("histograms", {}).items():
+            target = merged["histograms"].setdefault(name, {})
+            for labels, counts in series.items():
+                existing = target.get(labels)
+                if existing is None:
+                    target[labels] = list(counts)
+                elif len(existing) == len(counts):
+                    target[labels] = [a + b for a, b in zip(existing, counts)]
+    return merged
+
+
+def _add_hit_ratios(merged: Dict[str, Dict[str, Any]]):
+    hits = merged["counters"].get("findteam_cache_hits_total", {})
+    misses = merged["counters"].get("findteam_cache_misses_total", {})
+    ratios = {}
+    for labels in hits.keys() | misses.keys():
+        lookups = hits.get(labels, 0) + misses.get(labels, 0)
+        ratios[labels] = hits.get(labels, 0) / lookups if lookups else 0.0
+    merged["gauges"]["findteam_cache_hit_ratio"] = ratios
+
+
+def _sample(name: str, labels: str, value: float) -> str:
+    return f"{name}{{{labels}}} {value:g}" if labels else f"{name} {value:g}"
+
+
+def render_text(merged: Dict[str, Dict[str, Any]]) -> str:
+    lines: List[str] = []
+    for name, (kind, help_text, buckets) in FAMILIES.items():
+        series = merged[kind + "s"].get(name)
+        if series is None:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(series.items()):
+            if kind != "histogram":
+                lines.append(_sample(name, labels, value))
+                continue
+            prefix = labels + "," if labels else ""
+            cumulative = 0
+            for bound, count in zip(buckets + (float("inf"),), value[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(_sample(name + "_bucket", f'{prefix}le="{le}"', cumulative))
+            lines.append(_sample(name + "_sum", labels, value[-1]))
+            lines.append(_sample(name + "_count", labels, cumulative))
+    return "\n".join(lines) + "\n"
+
+
+def _collect_app_stats(counters: Dict[str, Dict[str, float]], gauges: Dict[str, Dict[str, float]]):
+    # Modüller burada import edilir: db.py bu modülü havuz ölçümü için import ediyor
+    from app.core.log_setup import logging_stats
+    from app.core.rate_limit import rate_limiter
+    from app.core.token_cache import token_cache
+    from app.database.db import async_engine, engine
+    from app.posts.post_cache import feed_cache
+    from app.posts.post_counts import count_cache
+    from app.users.user_cache import identity_cache
+
+    limiter = rate_limiter.stats()
+    counters["findteam_rate_limit_requests_total"] = {
+        'result="allowed"': limiter["allowed"],
+        'result="rejected"': limiter["rejected"],
+    }
+
+    errors = {'store="rate_limit"': limiter.get("failed_open", 0)}
+    hits, misses = {}, {}
+    caches = {"post_feed": feed_cache, "post_counts": count_cache, "identities": identity_cache, "auth_tokens": token_cache}
+    for name, cache in caches.items():
+        stats = cache.stats()
+        hits[f'cache="{name}"'] = stats.get("hits", 0)
+        misses[f'cache="{name}"'] = stats.get("misses", 0)
+        errors[f'store="{name}"'] = stats.get("errors", 0)
+    counters["findteam_cache_hits_total"] = hits
+    counters["findteam_cache_misses_total"] = misses
+    counters["findteam_shared_state_errors_total"] = errors
+
+    sizes, checked_out, overflow = {}, {}, {}
+    for name, pool in (("sync", engine.pool), ("async", async_engine.sync_engine.pool)):
+        # StaticPool (bellek içi SQLite) bu sayaçları tutmaz
+        if not hasattr(pool, "checkedout"):
+            continue
+        labels = f'engine="{name}"'
+        sizes[labels] = pool.size()
+        checked_out[labels] = pool.checkedout()
+        overflow[labels] = max(pool.overflow(), 0)
+    gauges["findteam_db_pool_size"] = sizes
+    gauges["findteam_db_pool_checked_out"] = checked_out
+    gauges["findteam_db_pool_overflow"] = overflow
+
+    counters["findteam_log_records_dropped_total"] = {"": logging_stats()["dropped"]}
+
+
+metrics = Metrics(directory=settings.METRICS_DIR, flush_seconds=settings.METRICS_FLUSH_SECONDS)
+
+metrics_flusher = PeriodicTask(
+    "metrics flush",
+    metrics.flush,
+    interval=settings.METRICS_FLUSH_SECONDS,
+    # Kapanan worker'ın son sayıları da toplamlarda kalsın
+    run_on_stop=True,
+)
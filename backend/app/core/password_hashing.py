@@ -0,0 +1,98 @@
+"""
+Password hashing off the event loop
+
+verify_password / get_password_hash run 100k PBKDF2 iterations, tens of
+milliseconds of CPU per call. The async handlers (login, register,
+admin_login) call the *_async variants here instead, which run the hash on
+a small dedicated thread pool (hashlib releases the GIL while hashing).
+
+At most PASSWORD_HASH_WORKERS hashes run at once and at most
+PASSWORD_HASH_MAX_QUEUE more may wait; beyond that a request gets 503 right
+away instead of piling up, so a burst of logins cannot starve the rest of
+the API.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+from fastapi import HTTPException
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_password
+import asyncio
+import threading
+import time
+
+T = TypeVar("T")
+
+
+class PasswordHasher:
+    """Bounded executor for CPU-heavy password hashing, with queueing metrics"""
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._pending = 0  # sadece event loop thread'inde değişir
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.max_queued = 0
+        self.wait_seconds = 0.0
+        self.hash_seconds = 0.0
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        if self._pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Sunucu şu an çok yoğun, lütfen tekrar deneyin",
+                headers={"Retry-After": "1"},
+            )
+
+        self._pending += 1
+        self.max_queued = max(self.max_queued, self._pending - self.max_workers)
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self.completed += 1
+                    self.wait_seconds += started - submitted
+                    self.hash_seconds += finished - started
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        finally:
+            self._pending -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            completed = self.completed
+            wait_seconds, hash_seconds = self.wait_seconds, self.hash_seconds
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": min(self._pending, self.max_workers),
+            "queued": max(self._pending - self.max_workers, 0),
+            "max_queued": self.max_queued,
+            "completed": completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(wait_seconds / completed * 1000, 2) if completed else 0.0,
+            "avg_hash_ms": round(hash_seconds / completed * 1000, 2) if completed else 0.0,
+        }
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.run(get_password_hash, password)
@@ -0,0 +1,133 @@
+"""
+Query-count guard (N+1 detector) for development and tests
+
+QueryCountMiddleware gives every request a QueryCounter keyed by normalized
+statement (see normalize_statement in app/core/query_log.py). When one
+statement runs more than QUERY_GUARD_MAX_REPEATS times in a single request,
+which is what a per-row lazy load looks like, the guard acts on
+QUERY_GUARD_MODE:
+
+    warn   log a warning once per statement and request (default outside production)
+    raise  raise RepeatedQueryError from the query itself, so the traceback
+           points at the loop that issues it
+    off    no middleware, no counting (default in production)
+
+For tests, capture_queries() / assert_max_queries() count every statement
+run while the block is active, in any thread, so they also see requests
+served through TestClient. The query_budget fixture in backend/conftest.py
+wraps assert_max_queries (see tests/test_query_budget.py):
+
+    def test_feed_queries(client, query_budget):
+        with query_budget(2):
+            client.get("/posts/")
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+from app.core.config import settings
+from app.core.query_log import normalize_statement
+from app.core.timing import current_timing
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class RepeatedQueryError(RuntimeError):
+    """The same statement ran more often in one request than the guard allows"""
+
+
+def guard_mode() -> str:
+    """QUERY_GUARD_MODE, or its environment default when unset"""
+    mode = settings.QUERY_GUARD_MODE or ("off" if settings.ENVIRONMENT == "production" else "warn")
+    if mode not in ("off", "warn", "raise"):
+        raise ValueError(f"QUERY_GUARD_MODE must be off, warn or raise, not {mode!r}")
+    return mode
+
+
+class QueryCounter:
+    """Statements run so far, per normalized statement"""
+
+    def __init__(self):
+        self.total = 0
+        self.counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, normalized: str) -> int:
+        with self._lock:
+            self.total += 1
+            count = self.counts[normalized] = self.counts.get(normalized, 0) + 1
+            return count
+
+    def most_repeated(self, limit: int = 5) -> List[Tuple[str, int]]:
+        with self._lock:
+            return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+_current: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+# capture_queries() blokları; istek bağlamından bağımsız, her thread'deki sorguyu sayar
+_captures: List[QueryCounter] = []
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = _current.get()
+    if counter is None and not _captures:
+        return
+    normalized = normalize_statement(statement)
+    for capture in list(_captures):
+        capture.add(normalized)
+    if counter is None:
+        return
+
+    count = counter.add(normalized)
+    # Eşik bir kez aşıldığında uyarılır; sonraki tekrarlar sessiz
+    if count != settings.QUERY_GUARD_MAX_REPEATS + 1:
+        return
+    timing = current_timing()
+    route = timing.route() if timing is not None else None
+    message = "Statement ran %d times in one request (route %s), likely an N+1: %s"
+    args = (count, route or "-", normalized[:300])
+    if guard_mode() == "raise":
+        raise RepeatedQueryError(message % args)
+    logger.warning("🔁 " + message, *args)
+
+
+def instrument_query_guard(sync_engine):
+    """Count statements on this engine for the request guard and capture_queries()"""
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def count_request_queries() -> Iterator[QueryCounter]:
+    """Make a fresh per-request QueryCounter current for the duration of the block"""
+    counter = QueryCounter()
+    token = _current.set(counter)
+    try:
+        yield counter
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryCounter]:
+    """Count every statement run on an instrumented engine while the block is active"""
+    counter = QueryCounter()
+    _captures.append(counter)
+    try:
+        yield counter
+    finally:
+        _captures.remove(counter)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int, max_repeats: Optional[int] = None) -> Iterator[QueryCounter]:
+    """Fail if the block runs more than max_queries statements, or one statement more than max_repeats times"""
+    with capture_queries() as counter:
+        yield counter
+    repeated = counter.most_repeated()
+    summary = "\n".join(f"  {count}x {statement[:200]}" for statement, count in repeated)
+    if counter.total > max_queries:
+        raise AssertionError(f"{counter.total} queries, expected at most {max_queries}:\n{summary}")
+    if max_repeats is not None and repeated and repeated[0][1] > max_repeats:
+        raise AssertionError(f"A statement ran {repeated[0][1]} times, expected at most {max_repeats}:\n{summary}")
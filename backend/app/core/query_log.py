@@ -0,0 +1,212 @@
+"""
+Slow-query log
+
+SQLAlchemy cursor events time every statement on the instrumented engines
+(sync and async alike). Statements slower than SLOW_QUERY_THRESHOLD_MS are
+kept in a bounded per-process log with:
+
+- the normalized SQL (literals and placeholders become ?, IN lists collapse)
+- the shape of the bind parameters (types only; values are never stored)
+- the duration
+- the route template of the request that ran it (None for background jobs)
+
+Entries are also aggregated per normalized statement. GET /admin/slow-queries
+shows both.
+
+On PostgreSQL a slow SELECT can also be run again under
+EXPLAIN (ANALYZE, BUFFERS) on the same connection, inside a savepoint so a
+failing EXPLAIN cannot abort the request's transaction. This is off by
+default, sampled (SLOW_QUERY_EXPLAIN_SAMPLE_RATE) and rate limited to one
+per SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS per process, because it doubles the
+cost of the query it explains.
+"""
+from collections import deque
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional
+from sqlalchemy import event
+from app.core.config import settings
+from app.core.timing import current_timing
+import logging
+import random
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_statement(statement: str) -> str:
+    """SQL with literals and bind placeholders replaced by ?, so equal queries group together"""
+    statement = _STRING.sub("?", statement)
+    statement = _PLACEHOLDER.sub("?", statement)
+    statement = _IN_LIST.sub("(?, ...)", statement)
+    return _SPACE.sub(" ", statement).strip()
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> Any:
+    """Type names of the bind parameters, e.g. ["int", "str"] or {"city": "str"}"""
+    if executemany:
+        rows = list(parameters or ())
+        return {"rows": len(rows), "row": parameter_shape(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+class SlowQueryLog:
+    """Recent slow statements and per-statement totals of this process"""
+
+    # Tek süreçte izlenen en fazla farklı normalize sorgu
+    MAX_STATEMENTS = 500
+
+    def __init__(
+        self,
+        threshold_ms: float = 200.0,
+        max_entries: int = 200,
+        explain: bool = False,
+        explain_sample_rate: float = 0.1,
+        explain_interval: float = 60.0,
+    ):
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_interval = explain_interval
+        self._entries: Deque[Dict[str, Any]] = deque(maxlen=max_entries)
+        self._statements: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._last_explain = float("-inf")
+        self.recorded = 0
+        self.explained = 0
+
+    def record(self, statement: str, parameters: Any, executemany: bool, seconds: float, conn=None):
+        normalized = normalize_statement(statement)
+        timing = current_timing()
+        route = timing.route() if timing is not None else None
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "statement": normalized,
+            "parameters": parameter_shape(parameters, executemany),
+            "duration_ms": round(seconds * 1000, 2),
+            "route": route,
+        }
+        if conn is not None and self._should_explain(statement, conn):
+            entry["explain"] = self._run_explain(conn, statement, parameters)
+
+        with self._lock:
+            self.recorded += 1
+            self._entries.append(entry)
+            totals = self._statements.get(normalized)
+            if totals is None and len(self._statements) < self.MAX_STATEMENTS:
+                totals = self._statements[normalized] = {
+                    "statement": normalized, "count": 0, "total_ms": 0.0, "max_ms": 0.0, "routes": [],
+                }
+            if totals is not None:
+                totals["count"] += 1
+                totals["total_ms"] = round(totals["total_ms"] + entry["duration_ms"], 2)
+                totals["max_ms"] = max(totals["max_ms"], entry["duration_ms"])
+                if route and route not in totals["routes"] and len(totals["routes"]) < 10:
+                    totals["routes"].append(route)
+                if "explain" in entry:
+                    totals["explain"] = entry["explain"]
+        logger.warning("🐢 Slow query (%.1f ms, route %s): %s", seconds * 1000, route or "-", normalized[:500])
+
+    def _should_explain(self, statement: str, conn) -> bool:
+        # Sadece PostgreSQL ve sadece SELECT: ANALYZE sorguyu gerçekten tekrar çalıştırır
+        if not self.explain or conn.dialect.name != "postgresql":
+            return False
+        if statement.lstrip()[:6].upper() != "SELECT":
+            return False
+        if random.random() >= self.explain_sample_rate:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_explain < self.explain_interval:
+                return False
+            self._last_explain = now
+        return True
+
+    def _run_explain(self, conn, statement: str, parameters: Any) -> Optional[List[str]]:
+        # Aynı DBAPI bağlantısında, savepoint içinde: başarısız bir EXPLAIN isteğin transaction'ını bozmaz
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+                plan = [row[0] for row in cursor.fetchall()]
+            except Exception:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                raise
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            with self._lock:
+                self.explained += 1
+            return plan
+        except Exception as e:
+            logger.warning("⚠️ EXPLAIN of slow query failed: %s", e)
+            return None
+        finally:
+            cursor.close()
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Most recent first"""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def top(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Statements with the most total slow time"""
+        with self._lock:
+            statements = [dict(totals, routes=list(totals["routes"])) for totals in self._statements.values()]
+        statements.sort(key=lambda totals: totals["total_ms"], reverse=True)
+        return statements[:limit]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._statements.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "threshold_ms": self.threshold * 1000,
+                "recorded": self.recorded,
+                "explained": self.explained,
+                "statements": len(self._statements),
+                "explain_enabled": self.explain,
+            }
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_slow_query_started", None)
+        if started is None:
+            return
+        seconds = time.perf_counter() - started
+        if seconds >= self.threshold:
+            try:
+                self.record(statement, parameters, executemany, seconds, conn)
+            except Exception as e:
+                # Kayıt hatası sorguyu asla bozmamalı
+                logger.error("❌ Slow query log failed: %s", e)
+
+    def instrument(self, sync_engine):
+        """Watch every statement on this engine"""
+        event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    max_entries=settings.SLOW_QUERY_LOG_SIZE,
+    explain=settings.SLOW_QUERY_EXPLAIN_ENABLED,
+    explain_sample_rate=settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    explain_interval=settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS,
+)
@@ -0,0 +1,211 @@
+"""
+Sliding-window-counter rate limiting
+
+Each (policy, client) key keeps two counters: requests in the current
+fixed window and in the previous one. The request rate is estimated as
+
+    previous * (1 - elapsed / window) + current
+
+which smooths the burst a plain fixed window allows at window edges. Every
+check is O(1) and a key costs a few numbers of memory. Keys idle for two
+windows are evicted as new requests come in, and at most max_keys are kept
+(least recently seen first out), so scanning traffic cannot grow memory
+without bound.
+
+With SHARED_STATE_BACKEND set to sqlite or redis, SharedWindowLimiter keeps
+the same two counters per window in the shared store instead, so the limit
+holds across all workers rather than once per worker. Its ahit() runs the
+store round trips off the event loop, and when the store fails the request
+is let through (fail open); failures are counted in stats() and logged.
+"""
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple, Union
+import logging
+import math
+import threading
+import time
+from app.core.cache import CacheBackend
+from app.core.config import settings
+from app.core.shared_state import create_cache, run_in_store_thread
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitPolicy(NamedTuple):
+    name: str
+    limit: int
+    window_seconds: float = 60.0
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: int
+
+
+class SlidingWindowLimiter:
+    """In-process limiter; one instance serves every policy"""
+
+    # Tek çağrıda en fazla bu kadar boşta anahtar temizlenir (amortize O(1))
+    _EVICT_PER_CALL = 8
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        # key -> [window_start, current, previous, window_seconds]
+        self._windows: "OrderedDict[Tuple[str, str], list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+        self.evicted = 0
+
+    def hit(self, policy: RateLimitPolicy, client: str, now: Optional[float] = None) -> RateLimitResult:
+        """Count one request for `client` under `policy` and say whether it may proceed"""
+        now = time.monotonic() if now is None else now
+        window = policy.window_seconds
+        key = (policy.name, client)
+
+        with self._lock:
+            state = self._windows.get(key)
+            if state is None:
+                state = [now - now % window, 0, 0, window]
+                self._windows[key] = state
+            else:
+                self._windows.move_to_end(key)
+                self._roll(state, now)
+
+            elapsed = now - state[0]
+            estimate = state[2] * (1 - elapsed / window) + state[1]
+            if estimate + 1 > policy.limit:
+                self.rejected += 1
+                result = RateLimitResult(False, policy.limit, 0, self._retry_after(state, policy, now))
+            else:
+                state[1] += 1
+                self.allowed += 1
+                result = RateLimitResult(True, policy.limit, max(int(policy.limit - estimate - 1), 0), 0)
+
+            self._evict(now)
+        return result
+
+    async def ahit(self, policy: RateLimitPolicy, client: str) -> RateLimitResult:
+        # Bellek içi; olay döngüsünde doğrudan çalışır
+        return self.hit(policy, client)
+
+    @staticmethod
+    def _roll(state: list, now: float):
+        window = state[3]
+        windows_passed = int((now - state[0]) // window)
+        if windows_passed >= 1:
+            state[2] = state[1] if windows_passed == 1 else 0
+            state[1] = 0
+            state[0] += windows_passed * window
+
+    @staticmethod
+    def _retry_after(state: list, policy: RateLimitPolicy, now: float) -> int:
+        # Önceki pencerenin ağırlığı, tahmin limitin altına inene kadar azalır
+        window = policy.window_seconds
+        if state[2] <= 0 or state[1] + 1 > policy.limit:
+            return max(math.ceil(state[0] + window - now), 1)
+        needed_fraction = 1 - (policy.limit - 1 - state[1]) / state[2]
+        wait = state[0] + needed_fraction * window - now
+        return max(math.ceil(wait), 1)
+
+    def _evict(self, now: float):
+        for _ in range(self._EVICT_PER_CALL):
+            if not self._windows:
+                return
+            key, state = next(iter(self._windows.items()))
+            idle = now - state[0] >= 2 * state[3]
+            if not idle and len(self._windows) <= self.max_keys:
+                return
+            del self._windows[key]
+            self.evicted += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "keys": len(self._windows),
+                "max_keys": self.max_keys,
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+                "evicted": self.evicted,
+            }
+
+
+class SharedWindowLimiter:
+    """The same sliding window counter, with the counters kept in a shared CacheBackend"""
+
+    # Depo hatası en fazla bu sıklıkta loglanır
+    _ERROR_LOG_INTERVAL = 60.0
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._last_error_log = float("-inf")
+        self.allowed = 0
+        self.rejected = 0
+        self.failed_open = 0
+
+    def hit(self, policy: RateLimitPolicy, client: str, now: Optional[float] = None) -> RateLimitResult:
+        """Blocking; request handling goes through ahit()"""
+        try:
+            return self._hit(policy, client, now)
+        except Exception as e:
+            # Depo çalışmıyorsa istek reddedilmez; limitsiz geçer
+            self._failed_open(e)
+            return RateLimitResult(True, policy.limit, policy.limit, 0)
+
+    async def ahit(self, policy: RateLimitPolicy, client: str) -> RateLimitResult:
+        return await run_in_store_thread(self.hit, policy, client)
+
+    def _failed_open(self, error: Exception):
+        now = time.monotonic()
+        with self._lock:
+            self.failed_open += 1
+            failed = self.failed_open
+            if now - self._last_error_log < self._ERROR_LOG_INTERVAL:
+                return
+            self._last_error_log = now
+        logger.error("❌ Rate limit store failed, letting requests through (%d so far): %r", failed, error)
+
+    def _hit(self, policy: RateLimitPolicy, client: str, now: Optional[float]) -> RateLimitResult:
+        # Süreçler arası ortak pencere sınırları için monotonic değil duvar saati
+        now = time.time() if now is None else now
+        window = policy.window_seconds
+        index = int(now // window)
+        elapsed = now - index * window
+        key = f"{policy.name}:{client}:"
+
+        previous = self.backend.get(key + str(index - 1)) or 0
+        current = self.backend.incr(key + str(index), 1, ttl=2 * window)
+        estimate = previous * (1 - elapsed / window) + current
+        if estimate > policy.limit:
+            # Reddedilen istek sayılmaz; bellek içi limiter ile aynı davranış
+            self.backend.incr(key + str(index), -1, ttl=2 * window)
+            with self._lock:
+                self.rejected += 1
+            state = [index * window, current - 1, previous, window]
+            return RateLimitResult(False, policy.limit, 0, SlidingWindowLimiter._retry_after(state, policy, now))
+
+        with self._lock:
+            self.allowed += 1
+        return RateLimitResult(True, policy.limit, max(int(policy.limit - estimate), 0), 0)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = {"allowed": self.allowed, "rejected": self.rejected, "failed_open": self.failed_open}
+        stats["store"] = self.backend.stats()
+        return stats
+
+
+RateLimiter = Union[SlidingWindowLimiter, SharedWindowLimiter]
+
+
+def create_rate_limiter() -> RateLimiter:
+    if settings.SHARED_STATE_BACKEND == "memory":
+        return SlidingWindowLimiter(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+    # Sayaç anahtarları 2 pencere sonra kendiliğinden düşer
+    return SharedWindowLimiter(create_cache("rate_limit", max_entries=settings.RATE_LIMIT_MAX_KEYS))
+
+
+rate_limiter = create_rate_limiter()
@@ -4,6 +4,8 @@ from jose import JWTError, jwt
 import hashlib
 import os
 from app.core.config import settings
+from app.core.timing import span
+from app.core.token_cache import cache_payload, get_cached_payload
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
@@ -42,6 +44,18 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 def verify_token(token: str) -> Optional[dict]:
+    """Verify JWT token; verified payloads are cached until exp (see app/core/token_cache.py)"""
+    with span("jwt"):
+        payload = get_cached_payload(token)
+        if payload is not None:
+            return payload
+        
+        payload = _decode_token(token)
+        if payload is not None:
+            cache_payload(token, payload)
+        return payload
+
+def _decode_token(token: str) -> Optional[dict]:
     """Verify JWT token with enhanced security checks"""
     try:
         # Decode and verify token signature
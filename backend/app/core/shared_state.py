@@ -0,0 +1,361 @@
+"""
+Cache backends shared between worker processes
+
+Under gunicorn every worker has its own InMemoryLRUCache, so caches warm
+once per worker and an invalidation in one worker leaves the others stale.
+SHARED_STATE_BACKEND picks where cache entries and rate-limit counters live:
+
+    memory  per-process LRU (default, no setup, nothing shared)
+    sqlite  one SQLite file in WAL mode, shared by every worker on the box
+            (SHARED_STATE_URL is the file path; required, see below)
+    redis   a Redis-compatible server, shared by every node
+            (SHARED_STATE_URL is the redis:// URL; needs the redis package)
+
+Each cache gets its own namespace, so clear() and stats() only touch its
+own entries. incr() is atomic in every backend; the rate limiter is built on
+it (see app/core/rate_limit.py).
+
+The SQLite file holds identity cache entries and rate-limit counters, so it
+must not be readable or writable by anyone else on the box. There is no
+default path: put it in a directory only the app user can write. The file
+is created 0600, and a file owned by another user, or one that other users
+can read or write, is refused rather than opened.
+
+A shared store that is down or slow must not take requests with it. Store
+errors in get/set/delete/keys/clear are counted and logged (at most once per
+minute per cache), and the cache behaves as if it were empty; incr() raises
+and leaves the decision to its caller (the rate limiter lets the request
+through). The async aget/aset used by request handlers run the call on a
+small dedicated thread pool, so the event loop never waits on the store.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+from app.core.cache import CacheBackend, InMemoryLRUCache
+from app.core.config import settings
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import stat
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Paylaşılan depoya giden çağrılar için; varsayılan havuzu (ve SQLite bağlantı sayısını) sınırlı tutar
+_store_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="shared-state")
+
+
+async def run_in_store_thread(func, *args):
+    """Run a blocking shared-store call off the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(_store_executor, func, *args)
+
+
+class SharedCache(CacheBackend):
+    """Base of the out-of-process backends: fail-open public methods around the _-prefixed store calls"""
+
+    store_errors: Tuple[Type[BaseException], ...] = (OSError, ValueError)
+    # Aynı önbellek için en fazla bu sıklıkta hata loglanır
+    _ERROR_LOG_INTERVAL = 60.0
+
+    def __init__(self, namespace: str, max_entries: int, ttl: float):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._last_error_log = float("-inf")
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _store_failed(self, operation: str, error: BaseException):
+        now = time.monotonic()
+        with self._lock:
+            self.errors += 1
+            errors = self.errors
+            if now - self._last_error_log < self._ERROR_LOG_INTERVAL:
+                return
+            self._last_error_log = now
+        logger.error(
+            "❌ Shared cache %r: %s failed, continuing without it (%d errors so far): %r",
+            self.namespace, operation, errors, error,
+        )
+
+    def _count_lookup(self, found: bool):
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            value = self._get(key)
+        except self.store_errors as e:
+            self._store_failed("get", e)
+            value = None
+        self._count_lookup(value is not None)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        try:
+            self._set(key, json.dumps(value, separators=(",", ":")), self.ttl if ttl is None else ttl)
+        except self.store_errors as e:
+            self._store_failed("set", e)
+
+    def delete(self, keys: Iterable[str]):
+        keys = list(keys)
+        if not keys:
+            return
+        try:
+            self._delete(keys)
+        except self.store_errors as e:
+            # Silinemeyen kayıtlar TTL dolana kadar eski kalır
+            self._store_failed("delete", e)
+
+    def keys(self, prefix: str = "") -> List[str]:
+        try:
+            return self._keys(prefix)
+        except self.store_errors as e:
+            self._store_failed("keys", e)
+            return []
+
+    def clear(self):
+        try:
+            self._clear()
+        except self.store_errors as e:
+            self._store_failed("clear", e)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        return await run_in_store_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None):
+        await run_in_store_thread(self.set, key, value, ttl)
+
+    def _lookup_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "errors": self.errors,
+            }
+
+    def _get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def _set(self, key: str, raw: str, ttl: float):
+        raise NotImplementedError
+
+    def _delete(self, keys: List[str]):
+        raise NotImplementedError
+
+    def _keys(self, prefix: str) -> List[str]:
+        raise NotImplementedError
+
+    def _clear(self):
+        raise NotImplementedError
+
+
+def _check_private_file(path: str, create: bool = False):
+    """Create `path` 0600 if asked; raise PermissionError unless it is ours and private"""
+    flags = os.O_RDWR | getattr(os, "O_NOFOLLOW", 0) | (os.O_CREAT if create else 0)
+    try:
+        fd = os.open(path, flags, 0o600)
+    except FileNotFoundError:
+        return
+    try:
+        info = os.fstat(fd)
+        if not stat.S_ISREG(info.st_mode):
+            raise PermissionError(f"Shared state file {path} is not a regular file")
+        if hasattr(os, "getuid") and info.st_uid != os.getuid():
+            raise PermissionError(f"Shared state file {path} is owned by another user (uid {info.st_uid})")
+        if info.st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+            raise PermissionError(f"Shared state file {path} is accessible to other users (mode {info.st_mode & 0o777:o})")
+    finally:
+        os.close(fd)
+
+
+class SQLiteCache(SharedCache):
+    """Cache entries in a local SQLite file, visible to every process that opens it"""
+
+    store_errors = (sqlite3.Error, OSError, ValueError)
+    # Her bu kadar yazmada bir süresi dolan/fazla kayıtlar temizlenir
+    _PRUNE_EVERY = 256
+
+    def __init__(self, path: str, namespace: str, max_entries: int = 512, ttl: float = 30.0):
+        super().__init__(namespace, max_entries, ttl)
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        self.evictions = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Bağlantılar thread ve süreç başına; fork sonrası ebeveynin bağlantısı kullanılmaz
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            # WAL/SHM dosyaları SQLite tarafından ana dosyanın izinleriyle açılır; önceden konmuş olanlar da denetlenir
+            _check_private_file(self.path, create=True)
+            for suffix in ("-wal", "-shm"):
+                _check_private_file(self.path + suffix)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS shared_state ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL, PRIMARY KEY (namespace, key)) WITHOUT ROWID"
+            )
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _get(self, key: str) -> Optional[Any]:
+        row = self._connection().execute(
+            "SELECT value FROM shared_state WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (self.namespace, key, time.time()),
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def _set(self, key: str, raw: str, ttl: float):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO shared_state (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (self.namespace, key, raw, time.time() + ttl),
+        )
+        self._maybe_prune()
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        # Tek bir UPSERT ifadesi; SQLite yazma kilidi altında atomik çalışır
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        row = self._connection().execute(
+            "INSERT INTO shared_state (namespace, key, value, expires_at) VALUES (:ns, :key, :amount, :expires_at)"
+            " ON CONFLICT (namespace, key) DO UPDATE SET"
+            "  value = CASE WHEN expires_at <= :now THEN :amount ELSE CAST(value AS INTEGER) + :amount END,"
+            "  expires_at = CASE WHEN expires_at <= :now THEN :expires_at ELSE expires_at END"
+            " RETURNING value",
+            {"ns": self.namespace, "key": key, "amount": amount, "expires_at": expires_at, "now": now},
+        ).fetchone()
+        self._maybe_prune()
+        return int(row[0])
+
+    def _delete(self, keys: List[str]):
+        self._connection().executemany(
+            "DELETE FROM shared_state WHERE namespace = ? AND key = ?", [(self.namespace, key) for key in keys]
+        )
+
+    def _keys(self, prefix: str) -> List[str]:
+        rows = self._connection().execute(
+            "SELECT key FROM shared_state WHERE namespace = ? AND key >= ? AND key < ? AND expires_at > ?",
+            (self.namespace, prefix, prefix + "\U0010ffff", time.time()),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def _clear(self):
+        self._connection().execute("DELETE FROM shared_state WHERE namespace = ?", (self.namespace,))
+
+    def _maybe_prune(self):
+        with self._lock:
+            self._writes += 1
+            if self._writes % self._PRUNE_EVERY:
+                return
+        conn = self._connection()
+        conn.execute(
+            "DELETE FROM shared_state WHERE namespace = ? AND expires_at <= ?", (self.namespace, time.time())
+        )
+        # Hâlâ fazlaysa süresi en erken dolacak olanlar atılır
+        deleted = conn.execute(
+            "DELETE FROM shared_state WHERE namespace = ? AND key IN ("
+            " SELECT key FROM shared_state WHERE namespace = ? ORDER BY expires_at"
+            " LIMIT max((SELECT count(*) FROM shared_state WHERE namespace = ?) - ?, 0))",
+            (self.namespace, self.namespace, self.namespace, self.max_entries),
+        ).rowcount
+        with self._lock:
+            self.evictions += max(deleted, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            entries = self._connection().execute(
+                "SELECT count(*) FROM shared_state WHERE namespace = ? AND expires_at > ?",
+                (self.namespace, time.time()),
+            ).fetchone()[0]
+        except self.store_errors as e:
+            self._store_failed("stats", e)
+            entries = None
+        stats = {"backend": "sqlite", "entries": entries, **self._lookup_stats()}
+        with self._lock:
+            stats["evictions"] = self.evictions
+        return stats
+
+
+class RedisCache(SharedCache):
+    """Cache entries in Redis (or anything speaking its protocol); size is bounded by TTLs and maxmemory"""
+
+    def __init__(self, url: str, namespace: str, max_entries: int = 512, ttl: float = 30.0, client=None):
+        super().__init__(namespace, max_entries, ttl)
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("SHARED_STATE_BACKEND=redis requires the redis package (pip install redis)")
+            client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+            self.store_errors = (redis.RedisError, OSError, ValueError)
+        self.client = client
+        self._prefix = f"findteam:{namespace}:"
+
+    def _ttl_ms(self, ttl: Optional[float]) -> int:
+        return max(int((self.ttl if ttl is None else ttl) * 1000), 1)
+
+    def _get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self._prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def _set(self, key: str, raw: str, ttl: float):
+        self.client.set(self._prefix + key, raw, px=self._ttl_ms(ttl))
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        # MULTI/EXEC: süre sadece anahtar ilk oluşturulurken atanır
+        pipe = self.client.pipeline(transaction=True)
+        pipe.set(self._prefix + key, 0, px=self._ttl_ms(ttl), nx=True)
+        pipe.incrby(self._prefix + key, amount)
+        return int(pipe.execute()[1])
+
+    def _delete(self, keys: List[str]):
+        self.client.delete(*[self._prefix + key for key in keys])
+
+    def _keys(self, prefix: str) -> List[str]:
+        start = len(self._prefix)
+        return [
+            name.decode("utf-8")[start:]
+            for name in self.client.scan_iter(match=self._escape(self._prefix + prefix) + "*", count=500)
+        ]
+
+    @staticmethod
+    def _escape(pattern: str) -> str:
+        for char in "\\*?[]":
+            pattern = pattern.replace(char, "\\" + char)
+        return pattern
+
+    def _clear(self):
+        names = self._keys("")
+        if names:
+            self._delete(names)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis", **self._lookup_stats()}
+
+
+def create_cache(namespace: str, max_entries: int = 512, ttl: float = 30.0) -> CacheBackend:
+    """The cache for `namespace` on the configured SHARED_STATE_BACKEND"""
+    backend = settings.SHARED_STATE_BACKEND
+    if backend == "memory":
+        return InMemoryLRUCache(max_entries=max_entries, ttl=ttl)
+    if backend == "sqlite":
+        if not settings.SHARED_STATE_URL:
+            raise ValueError("SHARED_STATE_BACKEND=sqlite requires SHARED_STATE_URL (a file path only the app user can write)")
+        return SQLiteCache(settings.SHARED_STATE_URL, namespace, max_entries, ttl)
+    if backend == "redis":
+        return RedisCache(settings.SHARED_STATE_URL or "redis://localhost:6379/0", namespace, max_entries, ttl)
+    raise ValueError(f"Unknown SHARED_STATE_BACKEND: {backend}")
@@ -0,0 +1,110 @@
+"""
+Per-request timing spans
+
+ServerTimingMiddleware (app/middleware/timing.py) starts a RequestTiming for
+every request and keeps it in a context variable, so any code on the request
+path can add to it without passing it around:
+
+    with span("count"):
+        total = await count_feed_posts(...)
+
+SQLAlchemy cursor events add the time of every statement to the "db" entry,
+for the async engine (request handlers) and the sync one alike. Outside a
+request the context variable is empty and all of this is a no-op. A span is
+two perf_counter calls and a dict update, cheap enough to leave on.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+import time
+
+
+def route_template(scope: dict) -> str:
+    """The matched route's path template (/posts/{post_id}), so it can be grouped on"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+class RequestTiming:
+    """Accumulated durations (seconds) and counts per span name for one request"""
+
+    __slots__ = ("scope", "started", "spans", "counts")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.started = time.perf_counter()
+        self.spans: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, name: str, seconds: float):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: total first, then each span"""
+        entries: List[str] = [f"total;dur={self.elapsed() * 1000:.1f}"]
+        for name, seconds in self.spans.items():
+            entry = f"{name};dur={seconds * 1000:.1f}"
+            if self.counts[name] > 1:
+                entry += f';desc="{self.counts[name]}x"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(seconds * 1000, 2) for name, seconds in self.spans.items()}
+
+    def route(self) -> Optional[str]:
+        return route_template(self.scope) if self.scope is not None else None
+
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+def current_timing() -> Optional[RequestTiming]:
+    return _current.get()
+
+
+def start_request_timing(scope: Optional[dict] = None) -> Tuple[RequestTiming, Token]:
+    """Make a fresh RequestTiming current; pass the token to end_request_timing"""
+    timing = RequestTiming(scope)
+    return timing, _current.set(timing)
+
+
+def end_request_timing(token: Token):
+    _current.reset(token)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time the block under `name` for the current request (no-op outside a request)"""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - started)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._timing_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timing = _current.get()
+    started = getattr(context, "_timing_started", None)
+    if timing is not None and started is not None:
+        timing.add("db", time.perf_counter() - started)
+
+
+def instrument_engine(sync_engine):
+    """Count statement time on this engine into the current request's "db" span"""
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
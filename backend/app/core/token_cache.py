@@ -0,0 +1,85 @@
+"""
+Cache of verified JWT payloads
+
+A bearer token is reused for up to ACCESS_TOKEN_EXPIRE_MINUTES, so
+verify_token keeps each successfully verified payload in a bounded LRU,
+keyed by the SHA-256 digest of the token (the raw token is never stored),
+until the token's own exp. Repeat requests cost a hash and a dict lookup
+instead of an HS256 decode. Invalid tokens are never cached.
+
+purge_user_tokens drops every cached token of a user, e.g. when the user is
+deleted; it does not revoke the token itself. The per-user index behind it
+keeps at most MAX_TOKENS_PER_USER keys per user: a new login beyond that
+drops the user's oldest cached token, which is then simply verified again
+on its next use.
+"""
+from typing import Dict, Optional
+from app.core.cache import CacheBackend, InMemoryLRUCache
+from app.core.config import settings
+import hashlib
+import threading
+import time
+
+TOKEN_KEY_PREFIX = "auth:token:"
+
+token_cache: CacheBackend = InMemoryLRUCache(max_entries=settings.TOKEN_CACHE_MAX_ENTRIES)
+
+# Bir kullanıcı için indekste (ve önbellekte) tutulan en fazla token
+MAX_TOKENS_PER_USER = 16
+
+# user_id -> o kullanıcının önbellekteki token anahtarları, eskiden yeniye (kullanıcı bazlı temizlik için)
+_keys_by_user: Dict[int, Dict[str, None]] = {}
+_index_lock = threading.Lock()
+
+
+def _token_key(token: str) -> str:
+    return TOKEN_KEY_PREFIX + hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def get_cached_payload(token: str) -> Optional[dict]:
+    return token_cache.get(_token_key(token))
+
+
+def cache_payload(token: str, payload: dict):
+    """Keep a verified payload until the token expires"""
+    ttl = payload.get("exp", 0) - time.time()
+    if ttl <= 0:
+        return
+    key = _token_key(token)
+    token_cache.set(key, payload, ttl=ttl)
+
+    user_id = payload.get("user_id")
+    if user_id is None:
+        return
+    with _index_lock:
+        keys = _keys_by_user.setdefault(user_id, {})
+        keys.pop(key, None)
+        keys[key] = None
+        # Sık giriş yapan tek bir hesap indeksi sınırsız büyütemez; en eski token önbellekten de düşer
+        dropped = []
+        while len(keys) > MAX_TOKENS_PER_USER:
+            oldest = next(iter(keys))
+            del keys[oldest]
+            dropped.append(oldest)
+        if len(_keys_by_user) > 2 * settings.TOKEN_CACHE_MAX_ENTRIES:
+            _prune_index()
+    if dropped:
+        token_cache.delete(dropped)
+
+
+def _prune_index():
+    # LRU'dan düşmüş anahtarları indeksten at
+    live = set(token_cache.keys(TOKEN_KEY_PREFIX))
+    for user_id in list(_keys_by_user):
+        keys = {key: None for key in _keys_by_user[user_id] if key in live}
+        if keys:
+            _keys_by_user[user_id] = keys
+        else:
+            del _keys_by_user[user_id]
+
+
+def purge_user_tokens(user_id: int):
+    """Forget every cached token of this user"""
+    with _index_lock:
+        keys = _keys_by_user.pop(user_id, {})
+    token_cache.delete(list(keys))
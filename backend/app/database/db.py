@@ -1,39 +1,121 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.query_guard import instrument_query_guard
+from app.core.query_log import slow_query_log
+from app.core.timing import instrument_engine
 from app.database.base import Base
+import time
+
+
+class _TimedPoolMixin:
+    """Records how long each checkout took to get a connection (see app/core/metrics.py)"""
+    metrics_label = "sync"
+    # Havuz logları SQLAlchemy'nin kendi logger'ında kalsın (sqlalchemy.pool.*)
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.QueuePool"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe_pool_wait(self.metrics_label, time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.AsyncAdaptedQueuePool"
+
 
 # Create database engine
 db_url = settings.DATABASE_URL
 if db_url and db_url.startswith("postgres://"):
     db_url = db_url.replace("postgres://", "postgresql://", 1)
 
+# Keepalive options are psycopg2-specific; local SQLite runs only need thread sharing
+if db_url and db_url.startswith("sqlite"):
+    connect_args = {"check_same_thread": False}
+else:
+    connect_args = {
+        "connect_timeout": 10,  # Connection timeout in seconds
+        "keepalives": 1,
+        "keepalives_idle": 30,
+        "keepalives_interval": 10,
+        "keepalives_count": 5
+    }
+
 # Configure connection pool to handle idle connections
 engine = create_engine(
     db_url,
+    poolclass=TimedQueuePool,
     pool_pre_ping=True,  # Test connections before using them
     pool_recycle=600,    # Recycle connections after 10 minutes
     pool_size=5,         # Number of connections to maintain
     max_overflow=10,     # Maximum extra connections
-    connect_args={
-        "connect_timeout": 10,  # Connection timeout in seconds
-        "keepalives": 1,
-        "keepalives_idle": 30,
-        "keepalives_interval": 10,
-        "keepalives_count": 5
-    }
+    connect_args=connect_args
 )
 
-# Create SessionLocal class
+# Create SessionLocal class (scripts, startup and background jobs)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Create tables
 #Base.metadata.create_all(bind=engine)
 
+
+def _async_engine_args(url: str):
+    """Async driver URL (asyncpg / aiosqlite) and its connect_args for the sync URL"""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite"), {"check_same_thread": False}
+
+    # asyncpg libpq parametrelerini tanımaz; sslmode'u ssl'e çevir, channel_binding'i at
+    query = dict(url.query)
+    sslmode = query.pop("sslmode", None)
+    query.pop("channel_binding", None)
+    args = {"timeout": 10, "command_timeout": 60}
+    if sslmode:
+        args["ssl"] = sslmode
+    return url.set(drivername="postgresql+asyncpg", query=query), args
+
+
+# Request handlers use the async engine so a slow query never blocks the event loop
+async_db_url, async_connect_args = _async_engine_args(db_url)
+async_pool_args = {"poolclass": TimedAsyncQueuePool, "pool_size": 5, "max_overflow": 10}
+if async_db_url.get_backend_name() == "sqlite":
+    # aiosqlite varsayılan olarak her istekte yeni bağlantı açar (NullPool); dosya veritabanında
+    # bağlantıları havuzda tut, bellek içi veritabanında ise tek bağlantı paylaşılmalı
+    if not async_db_url.database or async_db_url.database == ":memory:":
+        async_pool_args = {"poolclass": StaticPool}
+async_engine = create_async_engine(
+    async_db_url,
+    pool_pre_ping=True,
+    pool_recycle=600,
+    connect_args=async_connect_args,
+    **async_pool_args
+)
+
+# Sorgu süreleri istek başına "db" span'ine eklenir (Server-Timing, bkz. app/core/timing.py)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+# Eşiği aşan sorgular yavaş sorgu loguna (bkz. app/core/query_log.py, GET /admin/slow-queries)
+slow_query_log.instrument(engine)
+slow_query_log.instrument(async_engine.sync_engine)
+# Tek istekte tekrar eden sorgular (N+1) için sayaç (bkz. app/core/query_guard.py)
+instrument_query_guard(engine)
+instrument_query_guard(async_engine.sync_engine)
+
+# expire_on_commit=False: commit sonrası nesne alanlarına erişim yeni sorgu (lazy IO) tetiklemesin
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Dependency to get database session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,25 @@
+"""
+LineupResponse-shaped dicts straight from Lineup rows
+
+GET /lineups returns these in an ORJSONResponse instead of handing ORM
+objects to FastAPI, which would validate every player dict of every lineup
+against LineupList again before encoding.
+"""
+from typing import Any, Dict
+from pydantic_core import to_jsonable_python
+from app.lineups.lineup_model import Lineup
+
+
+def lineup_to_dict(lineup: Lineup) -> Dict[str, Any]:
+    """JSON-ready LineupResponse dict; datetimes are rendered the way Pydantic would"""
+    return {
+        "name": lineup.name,
+        "formation": lineup.formation,
+        "home_team": lineup.home_team,
+        "away_team": lineup.away_team,
+        "notes": lineup.notes,
+        "id": lineup.id,
+        "user_id": lineup.user_id,
+        "created_at": to_jsonable_python(lineup.created_at),
+        "updated_at": to_jsonable_python(lineup.updated_at),
+    }
@@ -1,4 +1,5 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from app.auth.auth_routes import router as auth_router
@@ -7,19 +8,26 @@ from app.posts.post_routes import router as post_router
 from app.lineups.lineup_routes import router as lineup_router
 from app.admin import router as admin_router
 from app.core.config import settings
+from app.core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, metrics, metrics_enabled, metrics_flusher
 from datetime import datetime
+from typing import Optional
+import hmac
 import os
 
 # Database models
 from app.database.base import Base
-from app.database.db import engine
+from app.database.db import async_engine, engine, SessionLocal
 from app.users.user_model import User
 from app.posts.post_model import Post
 from app.lineups.lineup_model import Lineup
+from app.posts.post_counts import ensure_post_counts
+from app.posts.post_views import view_flusher
+from app.posts.post_expiry import expiry_job
+from app.core.log_setup import configure_logging
 import logging
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+# Kayıtlar kuyruktan arka plan thread'inde JSON olarak yazılır (bkz. app/core/log_setup.py)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Disable Swagger docs in production for security
@@ -29,10 +37,14 @@ if settings.ENVIRONMENT == "production":
         title="FindTeam API",
         docs_url=None,  # Disable /docs
         redoc_url=None,  # Disable /redoc
-        openapi_url=None  # Disable /openapi.json
+        openapi_url=None,  # Disable /openapi.json
+        # Responses are encoded with orjson; hot read endpoints (GET /posts, GET /lineups)
+        # return an ORJSONResponse of already-shaped data and skip response_model validation
+        default_response_class=ORJSONResponse,
     )
 else:
-    app = FastAPI(title="FindTeam API")
+    # orjson encoding, as above
+    app = FastAPI(title="FindTeam API", default_response_class=ORJSONResponse)
 
 # Create database tables on startup
 @app.on_event("startup")
@@ -44,16 +56,47 @@ async def startup_event():
         
         # List all tables that will be created
         tables = Base.metadata.tables.keys()
-        logger.info(f"📋 Tables to create/verify: {list(tables)}")
+        logger.info("📋 Tables to create/verify: %s", list(tables))
         
         Base.metadata.create_all(bind=engine)
         
         logger.info("✅ Database tables created/verified successfully")
-        logger.info(f"✅ Tables: {', '.join(tables)}")
+        logger.info("✅ Tables: %s", ", ".join(tables))
+        
+        # İlan sayaçları boşsa mevcut ilanlardan doldur
+        db = SessionLocal()
+        try:
+            ensure_post_counts(db)
+        finally:
+            db.close()
     except Exception as e:
-        logger.error(f"❌ Error creating database tables: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
+        logger.exception("❌ Error creating database tables: %s", e)
+    
+    # İlan görüntülenmelerini periyodik olarak toplu yaz
+    view_flusher.start()
+    # Süresi dolan ilanları periyodik olarak kapat
+    if settings.POST_EXPIRY_ENABLED:
+        expiry_job.start()
+    # Worker'ın metrik anlık görüntüsünü diğer worker'lar için periyodik olarak yaz
+    if metrics_enabled() and settings.METRICS_DIR:
+        metrics_flusher.start()
+    if settings.METRICS_ENABLED and not metrics_enabled():
+        logger.warning("⚠️ /metrics is disabled: set METRICS_TOKEN to serve it in production")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background jobs and flush buffered view counts before the worker exits"""
+    await expiry_job.stop()
+    await view_flusher.stop()
+    if metrics_enabled() and settings.METRICS_DIR:
+        await metrics_flusher.stop()
+    await async_engine.dispose()
+
+# Middleware order: add_middleware prepends, so the middleware added last runs
+# first. A request passes through them outermost first:
+#   Metrics -> QueryCount -> ServerTiming -> Compression -> SecurityHeaders
+#   -> ProxyHeaders -> RateLimit -> TrustedHost -> CORS -> routes
+# (Metrics, QueryCount and ServerTiming only when enabled)
 
 # Restrict CORS to specific frontend domain only
 allowed_origins = [
@@ -87,19 +130,59 @@ app.add_middleware(
     ]
 )
 
-# Trust proxy headers (Critical for Render/Heroku HTTPS)
-from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
-app.add_middleware(ProxyHeadersMiddleware, trusted_hosts=["*"])
-
 # Add security middleware
 from app.middleware.security import RateLimitMiddleware, SecurityHeadersMiddleware
+from app.core.rate_limit import RateLimitPolicy
 
-# Rate limiting: 100 requests per minute per IP
-app.add_middleware(RateLimitMiddleware, requests_per_minute=100)
+# Rate limiting per IP; login/register get a stricter policy of their own
+auth_policy = RateLimitPolicy("auth", settings.RATE_LIMIT_AUTH_PER_MINUTE)
+app.add_middleware(
+    RateLimitMiddleware,
+    requests_per_minute=settings.RATE_LIMIT_PER_MINUTE,
+    route_policies={
+        "/auth/login": auth_policy,
+        "/auth/register": auth_policy,
+        "/admin/auth/login": auth_policy,
+    },
+)
+
+# Trust proxy headers (Critical for Render/Heroku HTTPS)
+# add_middleware başa ekler: bu, IP'ye bakan middleware'lerden (rate limit, IP whitelist) sonra
+# eklenmeli ki onlardan önce çalışsın ve onlar proxy'nin değil istemcinin IP'sini görsün.
+# Başlık sadece FORWARDED_ALLOW_IPS'teki bir proxy'den gelirse kullanılır; istemci adresi olarak
+# X-Forwarded-For'daki güvenilmeyen en sağdaki adres alınır (proxy'nin eklediği), istemcinin yazdığı değil
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+app.add_middleware(ProxyHeadersMiddleware, trusted_hosts=settings.FORWARDED_ALLOW_IPS)
 
 # Security headers
 app.add_middleware(SecurityHeadersMiddleware)
 
+# gzip/brotli for list responses (outside SecurityHeaders and everything below it, so it sees the final headers)
+from app.middleware.compression import CompressionMiddleware
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+)
+
+# Server-Timing spans and a JSON log line per request (outside Compression: times everything
+# from compression down; only QueryCount and Metrics run outside it)
+if settings.SERVER_TIMING_ENABLED:
+    from app.middleware.timing import ServerTimingMiddleware
+    app.add_middleware(ServerTimingMiddleware, log_requests=settings.REQUEST_LOG_ENABLED)
+
+# Statements repeated within one request (N+1) are logged or raise; off in production (outside ServerTiming)
+from app.core.query_guard import guard_mode
+if guard_mode() != "off":
+    from app.middleware.query_guard import QueryCountMiddleware
+    app.add_middleware(QueryCountMiddleware)
+
+# Request counts, latency histograms and in-flight gauge for GET /metrics (outermost, added last)
+if metrics_enabled():
+    from app.middleware.metrics import MetricsMiddleware
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth_router, tags=["auth"])
 app.include_router(user_router, prefix="/users", tags=["users"])
@@ -120,6 +203,15 @@ def health_check():
         "timestamp": datetime.now().isoformat()
     }
 
+# Production'da token yoksa /metrics hiç açılmaz
+if metrics_enabled():
+    @app.get("/metrics", include_in_schema=False)
+    def metrics_endpoint(authorization: Optional[str] = Header(None)):
+        """Prometheus metrics merged over all workers (see app/core/metrics.py)"""
+        if settings.METRICS_TOKEN and not hmac.compare_digest((authorization or "").encode(), f"Bearer {settings.METRICS_TOKEN}".encode()):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+        return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
 @app.get("/ping")
 def ping():
     """Simple ping endpoint to keep Render awake"""
@@ -0,0 +1,175 @@
+"""
+Response compression for the FindTeam API
+
+Negotiates brotli (when the optional brotli package is installed) or gzip
+from Accept-Encoding and compresses JSON/text responses of at least
+minimum_size bytes. Small bodies are sent as-is: below roughly one packet
+compression saves nothing on the wire and only costs CPU.
+
+Whole bodies (the usual JSONResponse) are compressed in one call, in a
+worker thread once they are large enough that doing it on the event loop
+would hold up other requests; zlib and brotli release the GIL while they
+work. Streaming responses are compressed chunk by chunk. Strong ETags are
+weakened on compressed responses, since the bytes differ from the identity
+representation; If-None-Match already compares weakly (app/core/etag.py).
+"""
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Optional
+import asyncio
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli isteğe bağlı; yoksa sadece gzip sunulur
+    brotli = None
+
+# Bu boyuttan büyük gövdeler event loop yerine thread'de sıkıştırılır
+THREAD_THRESHOLD = 128 * 1024
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def negotiate_encoding(accept_encoding: str, brotli_available: bool = brotli is not None) -> Optional[str]:
+    """The best of br/gzip the client accepts, or None for identity"""
+    qualities = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        qualities[name.strip()] = q
+
+    wildcard = qualities.get("*", 0.0)
+    candidates = (["br"] if brotli_available else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for name in candidates:
+        q = qualities.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class CompressionMiddleware:
+    """Compress eligible responses with the client's preferred encoding"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def compressor(self, encoding: str):
+        if encoding == "br":
+            return _BrotliStream(self.brotli_quality)
+        # wbits=31: gzip başlığı ve CRC ile deflate
+        return zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        compressor = self.compressor(encoding)
+        return compressor.compress(body) + compressor.flush()
+
+
+class _BrotliStream:
+    """brotli.Compressor with the zlib compressobj interface"""
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.stream = None
+
+    async def send(self, message: Message):
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            # Gövdenin ilk parçası gelene kadar başlıklar bekletilir
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.stream is not None:
+            chunk = self.stream.compress(body)
+            if not more_body:
+                chunk += self.stream.flush()
+            await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+            return
+
+        headers = MutableHeaders(scope=self.start_message)
+        if not self._compressible(headers) or (not more_body and len(body) < self.middleware.minimum_size):
+            self.passthrough = True
+            await self._send(self.start_message)
+            await self._send(message)
+            return
+
+        self._mark_encoded(headers)
+        if more_body:
+            # Akış yanıtı: uzunluk önceden bilinmez, parça parça sıkıştırılır
+            self.stream = self.middleware.compressor(self.encoding)
+            del headers["content-length"]
+            await self._send(self.start_message)
+            await self._send({"type": "http.response.body", "body": self.stream.compress(body), "more_body": True})
+            return
+
+        if len(body) >= THREAD_THRESHOLD:
+            body = await asyncio.get_running_loop().run_in_executor(
+                None, self.middleware.compress, self.encoding, body
+            )
+        else:
+            body = self.middleware.compress(self.encoding, body)
+        headers["content-length"] = str(len(body))
+        await self._send(self.start_message)
+        await self._send({"type": "http.response.body", "body": body})
+
+    def _compressible(self, headers: MutableHeaders) -> bool:
+        status = self.start_message["status"]
+        if status < 200 or status in (204, 304) or "content-encoding" in headers:
+            return False
+        return headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+
+    def _mark_encoded(self, headers: MutableHeaders):
+        headers["content-encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["etag"] = "W/" + etag
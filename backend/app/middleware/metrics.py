@@ -0,0 +1,39 @@
+"""
+Request metrics for GET /metrics
+
+Counts every request by method, route template and status, records its
+latency in a histogram and keeps the in-flight gauge (see
+app/core/metrics.py). Runs on the event loop, so recording takes no lock.
+"""
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.metrics import Metrics, metrics
+from app.core.timing import route_template
+from typing import Optional
+import time
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, registry: Optional[Metrics] = None):
+        self.app = app
+        self.metrics = registry or metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.in_flight -= 1
+            self.metrics.observe_request(scope["method"], route_template(scope), status, time.perf_counter() - started)
@@ -0,0 +1,17 @@
+"""
+Per-request query counter for the N+1 guard (see app/core/query_guard.py)
+"""
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.query_guard import count_request_queries
+
+
+class QueryCountMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with count_request_queries():
+            await self.app(scope, receive, send)
@@ -1,89 +1,126 @@
 """
 Security middleware for the FindTeam API
 Implements rate limiting and additional security headers
+
+All three are plain ASGI middleware rather than BaseHTTPMiddleware, which
+runs every request through an extra task and memory stream; here a request
+is only looked at (and a response start message only patched) in place.
 """
-from fastapi import Request, HTTPException
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from collections import defaultdict
-from datetime import datetime, timedelta
-import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Dict, Optional
+from app.core.rate_limit import RateLimiter, RateLimitPolicy, rate_limiter
+
+
+def _client_ip(scope: Scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+
+class RateLimitMiddleware:
     """
     Rate limiting middleware to prevent abuse
-    Limits requests per IP address
+    Limits requests per IP address; paths in route_policies get their own,
+    usually stricter, policy instead of the default one
     """
-    def __init__(self, app, requests_per_minute: int = 60):
-        super().__init__(app)
-        self.requests_per_minute = requests_per_minute
-        self.requests = defaultdict(list)
-        
-    async def dispatch(self, request: Request, call_next):
-        # Get client IP
-        client_ip = request.client.host
-        
-        # Clean old requests
-        now = time.time()
-        self.requests[client_ip] = [
-            req_time for req_time in self.requests[client_ip]
-            if now - req_time < 60
-        ]
-        
+    def __init__(
+        self,
+        app: ASGIApp,
+        requests_per_minute: int = 60,
+        route_policies: Optional[Dict[str, RateLimitPolicy]] = None,
+        limiter: Optional[RateLimiter] = None,
+    ):
+        self.app = app
+        self.default_policy = RateLimitPolicy("default", requests_per_minute)
+        self.route_policies = {
+            path.rstrip("/"): policy for path, policy in (route_policies or {}).items()
+        }
+        self.limiter = limiter or rate_limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # Check rate limit
-        if len(self.requests[client_ip]) >= self.requests_per_minute:
-            return JSONResponse(
+        policy = self.route_policies.get(scope["path"].rstrip("/"), self.default_policy)
+        result = await self.limiter.ahit(policy, _client_ip(scope))
+        if not result.allowed:
+            response = JSONResponse(
                 status_code=429,
                 content={
                     "detail": "Too many requests. Please try again later.",
-                    "retry_after": 60
+                    "retry_after": result.retry_after
                 },
-                headers={"Retry-After": "60"}
+                headers={"Retry-After": str(result.retry_after)}
             )
-        
-        # Add current request
-        self.requests[client_ip].append(now)
-        
-        response = await call_next(request)
-        return response
+            await response(scope, receive, send)
+            return
 
+        await self.app(scope, receive, send)
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+
+class SecurityHeadersMiddleware:
     """
     Add security headers to all responses
     """
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        
-        # Security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Content-Security-Policy"] = "default-src 'self'"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
-        
-        return response
-
-
-class IPWhitelistMiddleware(BaseHTTPMiddleware):
+    HEADERS = {
+        "X-Content-Type-Options": "nosniff",
+        "X-Frame-Options": "DENY",
+        "X-XSS-Protection": "1; mode=block",
+        "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+        "Content-Security-Policy": "default-src 'self'",
+        "Referrer-Policy": "strict-origin-when-cross-origin",
+        "Permissions-Policy": "geolocation=(), microphone=(), camera=()",
+    }
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # Başlıklar bir kez byte'a çevrilir; her yanıtta sadece listeye eklenir
+        self._raw_headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in self.HEADERS.items()
+        ]
+        self._raw_names = frozenset(name for name, _ in self._raw_headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                # Uygulamanın koyduğu aynı isimli başlıkların yerine geçer
+                headers = [header for header in message.get("headers", ()) if header[0] not in self._raw_names]
+                headers.extend(self._raw_headers)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class IPWhitelistMiddleware:
     """
     Optional: Whitelist specific IPs for admin endpoints
+
+    Like RateLimitMiddleware it reads the client address from the scope, so
+    add it before ProxyHeadersMiddleware in app/main.py; otherwise it sees
+    the proxy's address instead of the client's. ProxyHeadersMiddleware must
+    trust only the real proxy addresses (FORWARDED_ALLOW_IPS), never "*":
+    with "*" any caller can send X-Forwarded-For with a whitelisted address.
     """
-    def __init__(self, app, whitelist: list = None):
-        super().__init__(app)
-        self.whitelist = whitelist or []
-        
-    async def dispatch(self, request: Request, call_next):
+    def __init__(self, app: ASGIApp, whitelist: list = None):
+        self.app = app
+        self.whitelist = frozenset(whitelist or ())
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         # Only check for specific admin paths
-        if request.url.path.startswith("/admin"):
-            client_ip = request.client.host
-            if client_ip not in self.whitelist and self.whitelist:
-                return JSONResponse(
+        if scope["type"] == "http" and self.whitelist and scope["path"].startswith("/admin"):
+            if _client_ip(scope) not in self.whitelist:
+                response = JSONResponse(
                     status_code=403,
                     content={"detail": "Access forbidden"}
                 )
-        
-        response = await call_next(request)
-        return response
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
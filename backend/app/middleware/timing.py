@@ -0,0 +1,53 @@
+"""
+Server-Timing header and one structured log line per request
+
+Starts the request's RequestTiming (app/core/timing.py), adds a
+Server-Timing header with the total and every span recorded so far when the
+response starts (browser devtools show it under Timing), and logs one line
+per finished response. Method, route, status, duration and the spans go in
+the record's `request` extra, which the JSON log formatter writes out
+(app/core/log_setup.py).
+"""
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.timing import end_request_timing, start_request_timing
+import logging
+
+logger = logging.getLogger("app.requests")
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app: ASGIApp, log_requests: bool = True):
+        self.app = app
+        self.log_requests = log_requests
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing, token = start_request_timing(scope)
+        status = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", ()))
+                message["headers"].append((b"server-timing", timing.server_timing().encode("latin-1")))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_request_timing(token)
+            if self.log_requests and logger.isEnabledFor(logging.INFO):
+                duration_ms = round(timing.elapsed() * 1000, 2)
+                logger.info("%s %s %s %.1fms", scope["method"], scope["path"], status, duration_ms, extra={"request": {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": timing.route(),
+                    "status": status,
+                    "duration_ms": duration_ms,
+                    "db_queries": timing.counts.get("db", 0),
+                    "spans": timing.as_dict(),
+                }})
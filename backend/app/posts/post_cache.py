@@ -0,0 +1,103 @@
+"""
+Read-through cache for the public post feed (GET /posts)
+
+Each cached page is keyed by its normalized filters and page position. On a
+write, the routes pass snapshots of the post before/after the change and only
+the feed keys whose filters would match one of those snapshots are dropped.
+"""
+from typing import Iterable, NamedTuple, Optional, Tuple
+from app.core.cache import CacheBackend
+from app.core.config import settings
+from app.core.shared_state import create_cache
+from app.posts.post_model import Post
+from app.utils.helpers import json_to_positions
+import json
+
+FEED_KEY_PREFIX = "posts:feed:"
+
+feed_cache: CacheBackend = create_cache(
+    "post_feed",
+    max_entries=settings.POST_FEED_CACHE_MAX_ENTRIES,
+    ttl=settings.POST_FEED_CACHE_TTL_SECONDS,
+)
+
+
+class PostSnapshot(NamedTuple):
+    """The fields of a post that decide which feed pages it shows up on"""
+    status: Optional[str]
+    city: str
+    post_type: Optional[str]
+    positions: Tuple[str, ...]
+
+
+def snapshot_post(post: Post) -> PostSnapshot:
+    return PostSnapshot(
+        status=post.status,
+        city=(post.city or "").lower(),
+        post_type=post.post_type,
+        positions=tuple(json_to_positions(post.positions_needed)),
+    )
+
+
+def snapshot_post_dict(post: dict) -> PostSnapshot:
+    """Same as snapshot_post, for a PostResponse-shaped dict"""
+    return PostSnapshot(
+        status=post["status"],
+        city=(post["city"] or "").lower(),
+        post_type=post["post_type"],
+        positions=tuple(post["positions_needed"] or ()),
+    )
+
+
+def feed_cache_key(
+    city: Optional[str],
+    post_type: Optional[str],
+    position: Optional[str],
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    with_total: bool,
+    match_window: Optional[tuple] = None,
+) -> str:
+    # city ilike ile büyük/küçük harf duyarsız eşleşir; anahtar da öyle olmalı
+    filters = [
+        (city or "").lower(),
+        post_type or "",
+        (position or "").strip(),
+        0 if cursor else skip,
+        limit,
+        cursor or "",
+        bool(with_total),
+        list(match_window or ()),
+    ]
+    return FEED_KEY_PREFIX + json.dumps(filters, ensure_ascii=False, separators=(",", ":"))
+
+
+def _key_matches(key: str, snapshot: PostSnapshot) -> bool:
+    city, post_type, position = json.loads(key[len(FEED_KEY_PREFIX):])[:3]
+    if snapshot.status != "active":
+        return False
+    if post_type and post_type != snapshot.post_type:
+        return False
+    if position and position not in snapshot.positions:
+        return False
+    if city and city not in snapshot.city:
+        return False
+    return True
+
+
+def invalidate_feed(snapshots: Iterable[PostSnapshot]):
+    """Drop every cached feed page a post with one of these snapshots appears on"""
+    snapshots = [s for s in snapshots if s is not None]
+    if not snapshots:
+        return
+    stale = [
+        key for key in feed_cache.keys(FEED_KEY_PREFIX)
+        if any(_key_matches(key, snapshot) for snapshot in snapshots)
+    ]
+    feed_cache.delete(stale)
+
+
+def invalidate_all_feeds():
+    """For bulk writes where per-post snapshots are not available"""
+    feed_cache.delete(feed_cache.keys(FEED_KEY_PREFIX))
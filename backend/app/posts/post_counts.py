@@ -0,0 +1,192 @@
+"""
+Cheap total counts for the post feed
+
+Instead of running COUNT(*) over the joined, filtered posts query on every
+GET /posts, per-(status, city, post_type) counters are kept in the
+post_counts table. ORM insert/update/delete events on Post keep the counters
+in the same transaction as the write, so they never drift for ORM writes.
+Bulk deletes bypass those events and must call forget_user_posts first;
+bulk status changes call move_post_counts in their own transaction.
+
+Filters the counters cannot answer (position, match time window) fall back
+to a short-lived cache of the real COUNT(*) (shared between workers when
+SHARED_STATE_BACKEND is, see app/core/shared_state.py).
+"""
+from collections import Counter
+from typing import Awaitable, Callable, Iterable, Optional
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.cache import CacheBackend
+from app.core.config import settings
+from app.core.shared_state import create_cache
+from app.posts.post_model import Post, PostCount
+import json
+
+_MAX_CACHED_COUNTS = 1024
+
+count_cache: CacheBackend = create_cache(
+    "post_counts",
+    max_entries=_MAX_CACHED_COUNTS,
+    ttl=settings.POST_COUNT_CACHE_TTL_SECONDS,
+)
+
+
+def _counter_insert(dialect_name: str):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+
+def _bump(connection, status: Optional[str], city: Optional[str], post_type: Optional[str], delta: int):
+    """Atomically add delta to one counter row, creating it if needed"""
+    if not status or not city or not post_type or not delta:
+        return
+
+    table = PostCount.__table__
+    insert = _counter_insert(connection.dialect.name)
+    if insert is not None:
+        stmt = insert(table).values(status=status, city=city, post_type=post_type, count=delta)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.status, table.c.city, table.c.post_type],
+            set_={"count": table.c.count + delta},
+        )
+        connection.execute(stmt)
+        return
+
+    # Upsert desteği olmayan veritabanları için UPDATE, yoksa INSERT
+    result = connection.execute(
+        update(table)
+        .where(table.c.status == status, table.c.city == city, table.c.post_type == post_type)
+        .values(count=table.c.count + delta)
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(status=status, city=city, post_type=post_type, count=delta))
+
+
+def _committed_value(target: Post, field: str):
+    """Value of a column as it was before the pending change"""
+    history = inspect(target).attrs[field].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, field)
+
+
+@event.listens_for(Post, "after_insert")
+def _count_inserted_post(mapper, connection, target: Post):
+    _bump(connection, target.status, target.city, target.post_type, 1)
+
+
+@event.listens_for(Post, "after_update")
+def _count_updated_post(mapper, connection, target: Post):
+    old_key = tuple(_committed_value(target, f) for f in ("status", "city", "post_type"))
+    new_key = (target.status, target.city, target.post_type)
+    if old_key == new_key:
+        return
+    _bump(connection, *old_key, -1)
+    _bump(connection, *new_key, 1)
+
+
+@event.listens_for(Post, "after_delete")
+def _count_deleted_post(mapper, connection, target: Post):
+    _bump(connection, *(_committed_value(target, f) for f in ("status", "city", "post_type")), -1)
+
+
+def forget_user_posts(db: Session, user_id: int):
+    """
+    Decrement counters for every post of a user.
+
+    Call this before a bulk query(Post).delete(), which skips ORM events;
+    from an AsyncSession use `await db.run_sync(forget_user_posts, user_id)`.
+    """
+    rows = (
+        db.query(Post.status, Post.city, Post.post_type, func.count(Post.id))
+        .filter(Post.user_id == user_id)
+        .group_by(Post.status, Post.city, Post.post_type)
+        .all()
+    )
+    connection = db.connection()
+    for status, city, post_type, n in rows:
+        _bump(connection, status, city, post_type, -n)
+
+
+def move_post_counts(connection, rows: Iterable, old_status: str, new_status: str):
+    """
+    Move counters for posts whose status changed in a Core UPDATE.
+
+    `rows` are (city, post_type) pairs of the updated posts; run this in the
+    same transaction as the UPDATE.
+    """
+    groups = Counter((row.city, row.post_type) for row in rows)
+    for (city, post_type), n in groups.items():
+        _bump(connection, old_status, city, post_type, -n)
+        _bump(connection, new_status, city, post_type, n)
+
+
+def rebuild_post_counts(db: Session):
+    """Recompute every counter from the posts table"""
+    db.query(PostCount).delete()
+    rows = (
+        db.query(Post.status, Post.city, Post.post_type, func.count(Post.id))
+        .group_by(Post.status, Post.city, Post.post_type)
+        .all()
+    )
+    for status, city, post_type, n in rows:
+        if status and city and post_type:
+            db.add(PostCount(status=status, city=city, post_type=post_type, count=n))
+    db.commit()
+    _clear_cached_counts()
+
+
+def ensure_post_counts(db: Session):
+    """Backfill the counters once if posts exist but no counter has been written yet"""
+    if db.query(PostCount).first() is None and db.query(Post.id).first() is not None:
+        rebuild_post_counts(db)
+
+
+def _clear_cached_counts():
+    count_cache.clear()
+
+
+async def _cached_count(key: tuple, compute: Callable[[], Awaitable[int]]) -> int:
+    cache_key = json.dumps(key, ensure_ascii=False, separators=(",", ":"))
+    hit = await count_cache.aget(cache_key)
+    if hit is not None:
+        return hit
+
+    value = await compute()
+    await count_cache.aset(cache_key, value)
+    return value
+
+
+async def count_feed_posts(
+    db: AsyncSession,
+    query,
+    status: str,
+    city: Optional[str] = None,
+    post_type: Optional[str] = None,
+    position: Optional[str] = None,
+    match_window: Optional[tuple] = None,
+) -> int:
+    """
+    Total number of posts matching the feed filters.
+
+    `query` is the filtered feed query; it is only counted directly (and then
+    cached) when a filter cannot be answered from the counters.
+    """
+    if position or match_window:
+        async def count_rows():
+            return await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+        return await _cached_count(("feed", status, city, post_type, position, match_window), count_rows)
+
+    counts = select(func.coalesce(func.sum(PostCount.count), 0)).filter(PostCount.status == status)
+    if city:
+        # Sayaç tablosu şehir başına tek satır tutar; ilike burada küçük bir tabloyu tarar
+        counts = counts.filter(PostCount.city.ilike(f"%{city}%"))
+    if post_type:
+        counts = counts.filter(PostCount.post_type == post_type)
+    return max(int(await db.scalar(counts) or 0), 0)
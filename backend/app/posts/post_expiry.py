@@ -0,0 +1,114 @@
+"""
+Background expiry of stale posts
+
+A periodic job marks active posts as "expired" once their dated match is
+over (match_ends_at, see app/posts/post_match_time.py) or they are older
+than POST_MAX_AGE_DAYS. Posts are closed in batches of POST_EXPIRY_BATCH_SIZE,
+each batch its own short transaction, so a large backlog never holds long
+row locks. The candidate scans use the partial indexes on active posts
+(ix_posts_active_created_at_id, ix_posts_active_match_ends_at).
+
+The job changes data, so it only runs when POST_EXPIRY_ENABLED is set; on
+its first run it closes every post that is already past those limits.
+
+Every worker schedules the job, but on Postgres a run only proceeds while
+holding a session advisory lock, so at most one worker expires posts at a
+time and the others skip that round.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import func, or_, select, update
+from app.core.background import PeriodicTask
+from app.core.config import settings
+from app.database.db import engine
+from app.posts.post_cache import invalidate_all_feeds
+from app.posts.post_counts import move_post_counts
+from app.posts.post_model import Post
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# pg_try_advisory_lock anahtarı; uygulama genelinde benzersiz olmalı
+EXPIRY_LOCK_KEY = 4_620_001
+
+_BATCH_PAUSE_SECONDS = 0.05
+
+
+def _expiry_condition(now: datetime):
+    """SQL condition matching active posts that should be expired at `now`"""
+    table = Post.__table__
+    return or_(
+        table.c.match_ends_at < now,
+        table.c.created_at < now - timedelta(days=settings.POST_MAX_AGE_DAYS),
+    )
+
+
+def _try_lock(conn) -> bool:
+    if conn.dialect.name != "postgresql":
+        return True
+    locked = conn.execute(select(func.pg_try_advisory_lock(EXPIRY_LOCK_KEY))).scalar()
+    conn.commit()  # oturum kilidi commit'ten etkilenmez
+    return bool(locked)
+
+
+def _unlock(conn):
+    if conn.dialect.name == "postgresql":
+        conn.execute(select(func.pg_advisory_unlock(EXPIRY_LOCK_KEY)))
+        conn.commit()
+
+
+def _expire_batch(conn, condition, batch_size: int) -> int:
+    table = Post.__table__
+    with conn.begin():
+        rows = conn.execute(
+            select(table.c.id, table.c.city, table.c.post_type)
+            .where(table.c.status == "active", condition)
+            .order_by(table.c.id)
+            .limit(batch_size)
+            # Aynı anda düzenlenen ilanları atla, bir sonraki turda alınır
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not rows:
+            return 0
+        conn.execute(
+            update(table)
+            .where(table.c.id.in_([row.id for row in rows]), table.c.status == "active")
+            .values(status="expired")
+        )
+        move_post_counts(conn, rows, "active", "expired")
+    return len(rows)
+
+
+def expire_stale_posts(bind=None, now: Optional[datetime] = None, batch_size: Optional[int] = None) -> int:
+    """Expire every stale active post; returns how many were expired"""
+    bind = bind if bind is not None else engine
+    now = now or datetime.now(timezone.utc)
+    batch_size = batch_size or settings.POST_EXPIRY_BATCH_SIZE
+    condition = _expiry_condition(now)
+
+    total = 0
+    with bind.connect() as conn:
+        if not _try_lock(conn):
+            return 0
+        try:
+            while True:
+                expired = _expire_batch(conn, condition, batch_size)
+                total += expired
+                if expired < batch_size:
+                    break
+                time.sleep(_BATCH_PAUSE_SECONDS)
+        finally:
+            _unlock(conn)
+
+    if total:
+        invalidate_all_feeds()
+        logger.info("⏰ Expired %d stale posts", total)
+    return total
+
+
+expiry_job = PeriodicTask(
+    "post expiry",
+    expire_stale_posts,
+    interval=settings.POST_EXPIRY_INTERVAL_SECONDS,
+)
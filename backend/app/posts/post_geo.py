@@ -0,0 +1,151 @@
+"""
+"Near me" search from venue location links
+
+Whenever Post.location_link is set, coordinates are pulled out of the Google
+Maps URL into location_lat / location_lon. Short links (maps.app.goo.gl/...)
+carry no coordinates and would need a network round trip to resolve, so
+those posts simply have no location.
+
+GET /posts?lat=&lon=&radius_km= first narrows the feed query with a
+latitude/longitude bounding box on the (location_lat, location_lon) index of
+active posts. Only (id, location_lat, location_lon) of those candidates is
+read; the exact haversine distance is computed and sorted on that, and the
+full response columns are then fetched for the ids of the requested page
+alone (see page_rows_by_distance).
+"""
+from typing import List, Optional, Tuple
+from urllib.parse import unquote
+from sqlalchemy import and_, bindparam, event, or_, select, update
+from app.posts.post_model import Post
+import math
+import re
+import time
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+_NUMBER = r"(-?\d{1,3}(?:\.\d+)?)"
+# Öncelik sırasıyla: işaretli yer (!3d..!4d..), arama parametresi, harita merkezi, yol içi "lat,lon"
+_COORDINATE_PATTERNS = [
+    re.compile(r"!3d" + _NUMBER + r"!4d" + _NUMBER),
+    re.compile(r"[?&](?:q|query|ll|sll|destination|center)=(?:loc:)?\s*" + _NUMBER + r"\s*,\s*\+?" + _NUMBER),
+    re.compile(r"@" + _NUMBER + r"," + _NUMBER),
+    re.compile(r"/" + _NUMBER + r",\s*\+?" + _NUMBER + r"(?=[/?,]|$)"),
+]
+
+
+def parse_coordinates(link: Optional[str]) -> Optional[Tuple[float, float]]:
+    """(lat, lon) from a Google Maps URL, or None if it carries no coordinates"""
+    if not link:
+        return None
+    link = unquote(link)
+    for pattern in _COORDINATE_PATTERNS:
+        for lat, lon in pattern.findall(link):
+            lat, lon = float(lat), float(lon)
+            if -90 <= lat <= 90 and -180 <= lon <= 180 and (lat, lon) != (0.0, 0.0):
+                return lat, lon
+    return None
+
+
+@event.listens_for(Post.location_link, "set")
+def _parse_on_set(target: Post, value, oldvalue, initiator):
+    coordinates = parse_coordinates(value)
+    target.location_lat, target.location_lon = coordinates or (None, None)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def filter_by_bounding_box(query, lat: float, lon: float, radius_km: float):
+    """Index-friendly prefilter: keep posts inside the box around the circle"""
+    d_lat = radius_km / KM_PER_DEGREE_LAT
+    query = query.filter(Post.location_lat.between(lat - d_lat, lat + d_lat))
+
+    cos_lat = math.cos(math.radians(min(abs(lat) + d_lat, 90.0)))
+    if cos_lat < 1e-6:
+        return query  # Kutup yakınında boylam sınırı anlamsız
+    d_lon = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+    if d_lon >= 180:
+        return query
+
+    west, east = lon - d_lon, lon + d_lon
+    if west < -180:
+        # Kutu 180. meridyeni geçiyor; iki aralığa böl
+        return query.filter(or_(Post.location_lon >= west + 360, Post.location_lon <= east))
+    if east > 180:
+        return query.filter(or_(Post.location_lon >= west, Post.location_lon <= east - 360))
+    return query.filter(Post.location_lon.between(west, east))
+
+
+async def nearest_post_ids(db, query, lat: float, lon: float, radius_km: float) -> List[Tuple[float, int]]:
+    """
+    (distance_km, post_id) pairs within radius_km, nearest first.
+
+    `query` is the filtered select(Post) statement; only id and coordinates
+    are read, and the exact distance is only computed inside the bounding box.
+    """
+    candidates = (await db.execute(filter_by_bounding_box(
+        query.with_only_columns(Post.id, Post.location_lat, Post.location_lon), lat, lon, radius_km
+    ))).all()
+    nearby = []
+    for post_id, post_lat, post_lon in candidates:
+        distance = haversine_km(lat, lon, post_lat, post_lon)
+        if distance <= radius_km:
+            nearby.append((distance, post_id))
+    # Eşit mesafede yeni ilan önce gelsin
+    nearby.sort(key=lambda item: (item[0], -item[1]))
+    return nearby
+
+
+async def page_rows_by_distance(db, rows_query, page: List[Tuple[float, int]]) -> List[Tuple[float, object]]:
+    """(distance_km, row) for one page of nearest_post_ids, fetching rows_query only for those ids"""
+    if not page:
+        return []
+    rows = (await db.execute(rows_query.filter(Post.id.in_([post_id for _, post_id in page])))).all()
+    rows_by_id = {row.id: row for row in rows}
+    # İki sorgu arasında pasife alınan ilan sayfadan düşer
+    return [(distance, rows_by_id[post_id]) for distance, post_id in page if post_id in rows_by_id]
+
+
+def backfill_post_coordinates(bind, batch_size: int = 500, pause_seconds: float = 0.0) -> int:
+    """
+    Extract coordinates from location_link for existing posts.
+
+    Walks posts by id in small committed batches; updated_at is left as is,
+    since the visible post does not change. Returns the number of posts located.
+    """
+    table = Post.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("post_id"))
+        .values(location_lat=bindparam("new_lat"), location_lon=bindparam("new_lon"), updated_at=table.c.updated_at)
+    )
+    last_id = 0
+    located = 0
+    while True:
+        with bind.begin() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.location_link)
+                .where(table.c.id > last_id, and_(table.c.location_link.isnot(None), table.c.location_link != ""))
+                .order_by(table.c.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            params = []
+            for row in rows:
+                coordinates = parse_coordinates(row.location_link)
+                if coordinates:
+                    params.append({"post_id": row.id, "new_lat": coordinates[0], "new_lon": coordinates[1]})
+            if params:
+                conn.execute(stmt, params)
+
+        last_id = rows[-1].id
+        located += len(params)
+        if pause_seconds:
+            time.sleep(pause_seconds)
+
+    return located
@@ -0,0 +1,184 @@
+"""
+Structured match times
+
+Post.match_time stays the free-form text shown to users ("18:00-20:00",
+"25.10.2026 20:30", ...). Whenever it is set, it is also parsed into
+indexed columns:
+
+- match_date: the calendar date, when the text contains one
+- match_start_minute / match_end_minute: minutes since midnight; a match
+  that runs past midnight ends after 1440 ("23:00-01:00" -> 1380, 1500)
+- match_ends_at: when a dated match is over (UTC), used by the expiry job
+
+GET /posts filters on these with an overlap test (start < to AND end > from)
+backed by the (match_start_minute, match_end_minute) index on active posts.
+"""
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import NamedTuple, Optional
+from zoneinfo import ZoneInfo
+from sqlalchemy import and_, bindparam, event, or_, select, update
+from app.core.config import settings
+from app.posts.post_model import Post
+import re
+import time
+
+MINUTES_PER_DAY = 24 * 60
+
+# Tek saat yazılmışsa maçın bu kadar süreceği varsayılır
+DEFAULT_MATCH_MINUTES = 60
+
+_ISO_DATE = re.compile(r"(?<!\d)(\d{4})-(\d{1,2})-(\d{1,2})(?!\d)")
+_TR_DATE = re.compile(r"(?<!\d)(\d{1,2})[./](\d{1,2})[./](\d{4})(?!\d)")
+_TIME = re.compile(r"(?<!\d)(\d{1,2})[:.](\d{2})(?!\d)")
+
+
+class MatchTime(NamedTuple):
+    match_date: Optional[date]
+    start_minute: Optional[int]
+    end_minute: Optional[int]
+
+
+def _find_date(text: str):
+    """Return (date, text without the date) or (None, text)"""
+    for pattern, order in ((_ISO_DATE, (0, 1, 2)), (_TR_DATE, (2, 1, 0))):
+        match = pattern.search(text)
+        if not match:
+            continue
+        year, month, day = (int(match.group(i + 1)) for i in order)
+        try:
+            found = date(year, month, day)
+        except ValueError:
+            continue
+        return found, text[:match.start()] + " " + text[match.end():]
+    return None, text
+
+
+def _find_minutes(text: str):
+    minutes = []
+    for hour, minute in _TIME.findall(text):
+        hour, minute = int(hour), int(minute)
+        if hour > 24 or minute > 59 or (hour == 24 and minute):
+            continue
+        minutes.append(hour * 60 + minute)
+        if len(minutes) == 2:
+            break
+    return minutes
+
+
+def parse_match_time(text: Optional[str]) -> MatchTime:
+    """Best-effort parse of a free-form match time; unknown parts are None"""
+    if not text:
+        return MatchTime(None, None, None)
+
+    match_date, rest = _find_date(text)
+    minutes = _find_minutes(rest)
+    if not minutes:
+        return MatchTime(match_date, None, None)
+
+    start = minutes[0]
+    end = minutes[1] if len(minutes) > 1 else start + DEFAULT_MATCH_MINUTES
+    if end <= start:
+        end += MINUTES_PER_DAY
+    return MatchTime(match_date, start, end)
+
+
+def match_ends_at(parsed: MatchTime) -> Optional[datetime]:
+    """UTC end of a dated match; an undated match never ends by itself"""
+    if parsed.match_date is None:
+        return None
+    end_minute = parsed.end_minute if parsed.end_minute is not None else MINUTES_PER_DAY
+    local = datetime.combine(parsed.match_date, dt_time(), tzinfo=ZoneInfo(settings.MATCH_TIMEZONE))
+    return (local + timedelta(minutes=end_minute)).astimezone(timezone.utc)
+
+
+_STRUCTURED_COLUMNS = ("match_date", "match_start_minute", "match_end_minute", "match_ends_at")
+
+
+def _match_time_values(text: Optional[str]) -> dict:
+    parsed = parse_match_time(text)
+    return {
+        "match_date": parsed.match_date,
+        "match_start_minute": parsed.start_minute,
+        "match_end_minute": parsed.end_minute,
+        "match_ends_at": match_ends_at(parsed),
+    }
+
+
+@event.listens_for(Post.match_time, "set")
+def _parse_on_set(target: Post, value, oldvalue, initiator):
+    # Post(**data) ve setattr(post, "match_time", ...) ikisi de buradan geçer
+    for column, parsed in _match_time_values(value).items():
+        setattr(target, column, parsed)
+
+
+def parse_clock(value: str) -> int:
+    """'HH:MM' -> minutes since midnight; raises ValueError otherwise"""
+    minutes = _find_minutes(value)
+    if len(minutes) != 1 or not _TIME.fullmatch(value.strip()):
+        raise ValueError(f"Invalid time: {value!r}")
+    return minutes[0]
+
+
+def _overlaps(start: int, end: int):
+    return and_(Post.match_start_minute < end, Post.match_end_minute > start)
+
+
+def filter_by_match_window(query, start: int, end: int, on_date: Optional[date] = None):
+    """
+    Keep posts whose match overlaps the [start, end) window (minutes since midnight).
+
+    A window with end <= start runs past midnight. Posts without a parsed
+    time never match; with on_date, undated posts are kept alongside posts
+    on that date.
+    """
+    if end <= start:
+        end += MINUTES_PER_DAY
+    # Gece yarısını geçen maçlar/aralıklar için bir gün kaydırılmış pencereleri de dene
+    query = query.filter(or_(
+        _overlaps(start, end),
+        _overlaps(start + MINUTES_PER_DAY, end + MINUTES_PER_DAY),
+        _overlaps(start - MINUTES_PER_DAY, end - MINUTES_PER_DAY),
+    ))
+    if on_date is not None:
+        query = query.filter(or_(Post.match_date == on_date, Post.match_date.is_(None)))
+    return query
+
+
+def backfill_match_times(bind, batch_size: int = 500, pause_seconds: float = 0.0) -> int:
+    """
+    Parse match_time into the structured columns for existing posts.
+
+    Walks posts by id in small committed batches; updated_at is left as is,
+    since the visible post does not change. Returns the number of posts parsed.
+    """
+    table = Post.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("post_id"))
+        # Kolon adlarıyla aynı bindparam isimleri UPDATE'te kullanılamaz
+        .values({column: bindparam(f"new_{column}") for column in _STRUCTURED_COLUMNS})
+        .values(updated_at=table.c.updated_at)
+    )
+    last_id = 0
+    parsed = 0
+    while True:
+        with bind.begin() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.match_time)
+                .where(table.c.id > last_id, table.c.match_time.isnot(None))
+                .order_by(table.c.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            conn.execute(stmt, [
+                {"post_id": row.id, **{f"new_{k}": v for k, v in _match_time_values(row.match_time).items()}}
+                for row in rows
+            ])
+
+        last_id = rows[-1].id
+        parsed += len(rows)
+        if pause_seconds:
+            time.sleep(pause_seconds)
+
+    return parsed
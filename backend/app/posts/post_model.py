@@ -1,10 +1,37 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float, Text, ForeignKey, JSON, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database.base import Base
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        # Sadece aktif ilanlar: feed keyset pagination (created_at DESC, id DESC)
+        # ve süresi dolan ilanları bulan arka plan işi bu kısmi indeksi kullanır
+        Index(
+            "ix_posts_active_created_at_id", "created_at", "id",
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'"),
+        ),
+        # GET /posts from/to saat aralığı filtresi (bkz. app/posts/post_match_time.py)
+        Index(
+            "ix_posts_active_match_minutes", "match_start_minute", "match_end_minute",
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'"),
+        ),
+        # "Yakınımdaki ilanlar" için enlem/boylam kutusu ön filtresi (bkz. app/posts/post_geo.py)
+        Index(
+            "ix_posts_active_location", "location_lat", "location_lon",
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'"),
+        ),
+        # Tarihi belli maçların bitişi; süresi dolan ilanları bulan iş için
+        Index(
+            "ix_posts_active_match_ends_at", "match_ends_at",
+            postgresql_where=text("status = 'active'"),
+            sqlite_where=text("status = 'active'"),
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
@@ -14,8 +41,15 @@ class Post(Base):
     positions_needed = Column(Text, nullable=True)  # JSON string of positions
     contact_info = Column(JSON, nullable=False)  # {"phone": "...", "email": "..."}
     match_time = Column(String(50), nullable=True)  # "18:00-20:00" formatında saat aralığı
+    # match_time'dan ayrıştırılan alanlar (bkz. app/posts/post_match_time.py)
+    match_date = Column(Date, nullable=True)
+    match_start_minute = Column(Integer, nullable=True)  # gece yarısından itibaren dakika
+    match_end_minute = Column(Integer, nullable=True)  # gece yarısını geçerse 1440'tan büyük
+    match_ends_at = Column(DateTime(timezone=True), nullable=True)  # sadece tarihi belli maçlar
     venue = Column(String(255), nullable=True)  # Saha adı/yeri
     location_link = Column(String(500), nullable=True)  # Google Maps linki
+    location_lat = Column(Float, nullable=True)  # location_link'ten ayrıştırılır
+    location_lon = Column(Float, nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     status = Column(String(10), default="active")  # "active", "closed", "expired"
     views_count = Column(Integer, default=0)
@@ -24,6 +58,34 @@ class Post(Base):
     
     # Relationships
     user = relationship("User", backref="posts")
+    position_links = relationship("PostPosition", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<Post(id={self.id}, title={self.title}, user_id={self.user_id})>"
+
+
+class PostPosition(Base):
+    """One row per (post, position); indexed copy of Post.positions_needed for exact-match filtering"""
+    __tablename__ = "post_positions"
+    __table_args__ = (
+        Index("ix_post_positions_position_post_id", "position", "post_id"),
+    )
+    
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(String(50), primary_key=True)  # "Kaleci", "Forvet", ...
+    
+    def __repr__(self):
+        return f"<PostPosition(post_id={self.post_id}, position={self.position})>"
+
+
+class PostCount(Base):
+    """Denormalized post counts per (status, city, post_type), kept by app/posts/post_counts.py"""
+    __tablename__ = "post_counts"
+    
+    status = Column(String(10), primary_key=True)
+    city = Column(String(100), primary_key=True)
+    post_type = Column(String(20), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<PostCount(status={self.status}, city={self.city}, post_type={self.post_type}, count={self.count})>"
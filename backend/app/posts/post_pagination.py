@@ -0,0 +1,70 @@
+"""
+Keyset (cursor) pagination for the post feed
+
+The feed is ordered by (created_at DESC, id DESC). A cursor encodes the
+(created_at, id) of the last post on a page, so the next page starts with a
+single index seek instead of scanning and discarding every earlier row.
+"""
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy import func, tuple_
+from app.posts.post_model import Post
+import base64
+import json
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue"""
+
+
+def encode_cursor(created_at: datetime, post_id: int) -> str:
+    """Build an opaque cursor pointing just past the given post"""
+    raw = json.dumps({"c": created_at.isoformat(), "i": post_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Parse a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        created_at = datetime.fromisoformat(data["c"])
+        post_id = data["i"]
+    except Exception:
+        raise InvalidCursor(cursor)
+
+    if not isinstance(post_id, int):
+        raise InvalidCursor(cursor)
+
+    return created_at, post_id
+
+
+def apply_feed_order(query):
+    """Newest first, with id as a tie-breaker so the order is total"""
+    return query.order_by(Post.created_at.desc(), Post.id.desc())
+
+
+def apply_cursor(query, cursor: Optional[str], dialect_name: str):
+    """Restrict a feed query to rows strictly after the cursor position"""
+    if not cursor:
+        return query
+    created_at, post_id = decode_cursor(cursor)
+    created_col, created_value = Post.created_at, created_at
+    if dialect_name == "sqlite":
+        # SQLite CURRENT_TIMESTAMP mikro saniyesiz metin yazar; iki tarafı aynı formata indir
+        created_col, created_value = func.datetime(Post.created_at), func.datetime(created_at)
+    return query.filter(tuple_(created_col, Post.id) < tuple_(created_value, post_id))
+
+
+def next_cursor_for(posts: list, limit: int) -> Optional[str]:
+    """
+    Return the cursor for the page after `posts`.
+
+    Callers fetch limit + 1 rows; the extra row only signals that another page
+    exists and is trimmed off here.
+    """
+    if len(posts) <= limit:
+        return None
+    del posts[limit:]
+    last = posts[-1]
+    return encode_cursor(last.created_at, last.id)
@@ -0,0 +1,81 @@
+"""
+Indexed storage for Post.positions_needed
+
+positions_needed stays as the JSON text returned to clients, while every
+position is also written to post_positions (post_id, position). The feed
+filters with an EXISTS on the (position, post_id) index, which is an exact
+match and never scans the posts table.
+"""
+from typing import Iterable, List, Optional
+from sqlalchemy.orm import Session
+from app.posts.post_model import Post, PostPosition
+from app.utils.helpers import json_to_positions
+import json
+import time
+
+_MAX_POSITION_LENGTH = PostPosition.__table__.c.position.type.length
+
+
+def normalize_positions(positions: Optional[Iterable[str]]) -> List[str]:
+    """Strip, drop empties and de-duplicate while keeping the client's order"""
+    result = []
+    for position in positions or []:
+        position = (position or "").strip()
+        if position and position not in result:
+            result.append(position)
+    return result
+
+
+def _position_links(positions: List[str]) -> List[PostPosition]:
+    # Sütuna sığmayan değerler filtrede zaten eşleşemez; indekse yazılmaz
+    return [
+        PostPosition(position=position)
+        for position in positions
+        if len(position) <= _MAX_POSITION_LENGTH
+    ]
+
+
+def set_post_positions(post: Post, positions: Optional[Iterable[str]]):
+    """Write positions to both the JSON column and the post_positions rows"""
+    positions = normalize_positions(positions)
+    post.positions_needed = json.dumps(positions) if positions else None
+    post.position_links = _position_links(positions)
+
+
+def filter_by_position(query, position: str):
+    """Exact-match position filter backed by ix_post_positions_position_post_id"""
+    return query.filter(Post.position_links.any(PostPosition.position == position.strip()))
+
+
+def backfill_post_positions(db: Session, batch_size: int = 500, pause_seconds: float = 0.0) -> int:
+    """
+    Copy positions_needed into post_positions for posts written before the table existed.
+
+    Walks posts by id in small committed batches so it can run against a live
+    database; posts that already have rows are left alone. Returns the number
+    of posts backfilled.
+    """
+    last_id = 0
+    backfilled = 0
+    while True:
+        posts = (
+            db.query(Post)
+            .filter(Post.id > last_id, Post.positions_needed.isnot(None), ~Post.position_links.any())
+            .order_by(Post.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not posts:
+            break
+
+        for post in posts:
+            # Yalnızca indeks satırları eklenir; posts satırı (ve updated_at) değişmez
+            post.position_links = _position_links(normalize_positions(json_to_positions(post.positions_needed)))
+        db.commit()
+
+        last_id = posts[-1].id
+        backfilled += len(posts)
+        if pause_seconds:
+            time.sleep(pause_seconds)
+
+    return backfilled
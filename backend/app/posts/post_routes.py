@@ -1,52 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List, Optional
+from datetime import date
 from app.database.db import get_db
 from app.posts.post_model import Post
 from app.posts.post_schema import PostCreate, PostResponse, PostList, PostUpdate
+from app.posts.post_cache import feed_cache, feed_cache_key, invalidate_feed, snapshot_post, snapshot_post_dict
+from app.posts.post_counts import count_feed_posts
+from app.posts.post_positions import filter_by_position, set_post_positions
+from app.posts.post_match_time import filter_by_match_window, parse_clock
+from app.posts.post_geo import nearest_post_ids, page_rows_by_distance
+from app.posts.post_search import apply_search
+from app.posts.post_pagination import InvalidCursor, apply_cursor, apply_feed_order, next_cursor_for
+from app.posts.post_views import view_counter
+from app.posts.post_serialization import fetch_post_dict, post_row_to_dict, select_post_rows, serialize_post_rows
 from app.users.user_model import User
 from app.core.security import verify_token
+from app.core.auth_utils import get_current_user
+from app.core.etag import compute_etag, etag_headers, etag_matches, not_modified_response
+from app.core.timing import span
 from fastapi.security import OAuth2PasswordBearer
-import json
 
 router = APIRouter()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    from fastapi import HTTPException
-    credentials_exception = HTTPException(
-        status_code=401,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    payload = verify_token(token)
-    if payload is None:
-        raise credentials_exception
-    
-    email: str = payload.get("sub")
-    if email is None:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise credentials_exception
-    
-    return user
 
 @router.post("/", response_model=PostResponse)
 async def create_post(
     post: PostCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     post_data = post.dict()
-    
-    # Handle positions_needed
-    if post_data.get("positions_needed") and len(post_data["positions_needed"]) > 0:
-        post_data["positions_needed"] = json.dumps(post_data["positions_needed"])
-    else:
-        post_data["positions_needed"] = None
+    positions = post_data.pop("positions_needed", None)
     
     # Handle contact_info
     if post_data.get("contact_info"):
@@ -54,43 +43,66 @@ async def create_post(
         pass
     
     db_post = Post(**post_data, user_id=current_user.id)
+    # positions_needed hem JSON olarak hem de post_positions tablosuna yazılır
+    set_post_positions(db_post, positions)
     db.add(db_post)
-    db.commit()
-    db.refresh(db_post)
-    
-    # Get user name for response
-    user_name = db.query(User.name).filter(User.id == current_user.id).scalar()
-    
-    positions_needed = json.loads(db_post.positions_needed) if db_post.positions_needed else []
-    
-    return PostResponse(
-        id=db_post.id,
-        title=db_post.title,
-        description=db_post.description,
-        post_type=db_post.post_type,
-        city=db_post.city,
-        positions_needed=positions_needed,
-        contact_info=db_post.contact_info,
-        match_time=db_post.match_time,
-        venue=db_post.venue,
-        location_link=db_post.location_link,
-        user_id=db_post.user_id,
-        status=db_post.status,
-        views_count=db_post.views_count,
-        created_at=db_post.created_at,
-        user_name=user_name
-    )
+    await db.commit()
+    
+    result = await fetch_post_dict(db, db_post.id)
+    invalidate_feed([snapshot_post_dict(result)])
+    return result
 
 @router.get("/", response_model=PostList)
 async def get_posts(
+    request: Request,
     city: Optional[str] = Query(None),
     post_type: Optional[str] = Query(None),
     position: Optional[str] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None),
+    with_total: bool = Query(True),
+    time_from: Optional[str] = Query(None, alias="from", description="HH:MM; maçı bu aralıkla çakışan ilanlar"),
+    time_to: Optional[str] = Query(None, alias="to", description="HH:MM"),
+    match_date: Optional[date] = Query(None, alias="date"),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: float = Query(10, gt=0, le=100),
+    db: AsyncSession = Depends(get_db)
 ):
-    query = db.query(Post).join(User)
+    """
+    Aktif ilanlar, en yeniden eskiye.
+    
+    lat/lon verilirse radius_km içindeki ilanlar en yakından uzağa sıralanır ve
+    her ilana distance_km eklenir; bu modda cursor yerine skip kullanılır.
+    """
+    near = lat is not None or lon is not None
+    if near and (lat is None or lon is None):
+        raise HTTPException(status_code=400, detail="Both lat and lon are required")
+    if near and cursor:
+        raise HTTPException(status_code=400, detail="cursor cannot be combined with lat/lon")
+    
+    # from/to saat aralığı: ikisi birlikte verilmeli
+    match_window = None
+    if time_from or time_to or match_date:
+        if not (time_from and time_to):
+            raise HTTPException(status_code=400, detail="Both from and to are required")
+        try:
+            match_window = (parse_clock(time_from), parse_clock(time_to), match_date.isoformat() if match_date else None)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="from/to must be HH:MM")
+    
+    # Aynı filtre/sayfa için önbellekteki yanıtı doğrudan döndür
+    # (konum aramaları her seferinde farklı koordinatla gelir; önbelleğe alınmaz)
+    cache_key = feed_cache_key(city, post_type, position, skip, limit, cursor, with_total, match_window)
+    with span("cache"):
+        cached = await feed_cache.aget(cache_key) if not near else None
+    if cached is not None:
+        if etag_matches(request, cached["etag"]):
+            return not_modified_response(cached["etag"])
+        return ORJSONResponse(cached["body"], headers=etag_headers(cached["etag"]))
+    
+    query = select(Post).join(User)
     
     if city:
         query = query.filter(Post.city.ilike(f"%{city}%"))
@@ -99,163 +111,197 @@ async def get_posts(
         query = query.filter(Post.post_type == post_type)
     
     if position:
-        query = query.filter(Post.positions_needed.ilike(f"%{position}%"))
+        query = filter_by_position(query, position)
+    
+    if match_window:
+        query = filter_by_match_window(query, match_window[0], match_window[1], match_date)
     
     # Sadece aktif ilanları göster
     query = query.filter(Post.status == "active")
     
+    if near:
+        # Kutu içindeki adayların sadece id/koordinatı okunur; tüm kolonlar yalnızca sayfadaki ilanlar için çekilir
+        nearby = await nearest_post_ids(db, query, lat, lon, radius_km)
+        page = await page_rows_by_distance(db, select_post_rows(query), nearby[skip:skip + limit])
+        posts = []
+        for distance, row in page:
+            post = post_row_to_dict(row, json_ready=True)
+            post["distance_km"] = round(distance, 2)
+            posts.append(post)
+        return ORJSONResponse({"posts": posts, "total": len(nearby) if with_total else None, "next_cursor": None})
+    
+    # Toplam sayı sayaç tablosundan gelir; istemci istemezse hiç hesaplanmaz
+    total = None
+    if with_total:
+        with span("count"):
+            total = await count_feed_posts(
+                db, query, "active", city=city, post_type=post_type, position=position, match_window=match_window
+            )
+    
     # En yeniden eskiye sırala
-    query = query.order_by(Post.created_at.desc())
-    
-    total = query.count()
-    posts = query.offset(skip).limit(limit).all()
-    
-    result = []
-    for post in posts:
-        positions_needed = json.loads(post.positions_needed) if post.positions_needed else []
-        result.append(PostResponse(
-            id=post.id,
-            title=post.title,
-            description=post.description,
-            post_type=post.post_type,
-            city=post.city,
-            positions_needed=positions_needed,
-            contact_info=post.contact_info,
-            match_time=post.match_time,
-            venue=post.venue,
-            location_link=post.location_link,
-            user_id=post.user_id,
-            status=post.status,
-            views_count=post.views_count,
-            created_at=post.created_at,
-            user_name=post.user.name if post.user else None
-        ))
-    
-    return PostList(posts=result, total=total)
+    query = apply_feed_order(query)
+    
+    # cursor verilmişse keyset pagination, yoksa eski skip/offset davranışı
+    if cursor:
+        try:
+            query = apply_cursor(query, cursor, db.get_bind().dialect.name)
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    elif skip:
+        query = query.offset(skip)
+    
+    # Koşullu istekte önce sadece sürüm kolonlarını çek; değişmediyse satırları hiç yükleme
+    if request.headers.get("if-none-match"):
+        versions = (await db.execute(
+            query.with_only_columns(Post.id, Post.created_at, Post.updated_at, User.updated_at).limit(limit + 1)
+        )).all()
+        etag = compute_etag(cache_key, total, [tuple(row) for row in versions])
+        if etag_matches(request, etag):
+            return not_modified_response(etag)
+    
+    with span("page"):
+        rows = (await db.execute(select_post_rows(query, with_versions=True).limit(limit + 1))).all()
+    
+    with span("serialize"):
+        versions = [(row.id, row.created_at, row.updated_at, row.user_updated_at) for row in rows]
+        etag = compute_etag(cache_key, total, versions)
+        next_cursor = next_cursor_for(rows, limit)
+        content = {
+            "posts": serialize_post_rows(rows, json_ready=True),
+            "total": total,
+            "next_cursor": next_cursor,
+        }
+    await feed_cache.aset(cache_key, {"etag": etag, "body": content})
+    return ORJSONResponse(content, headers=etag_headers(etag))
+
+@router.get("/search", response_model=PostList)
+async def search_posts(
+    q: str = Query(..., min_length=2, max_length=100),
+    city: Optional[str] = Query(None),
+    post_type: Optional[str] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    with_total: bool = Query(True),
+    db: AsyncSession = Depends(get_db)
+):
+    """İlan başlığı, saha adı ve açıklamasında tam metin arama (alaka sırasına göre)"""
+    query = select(Post).join(User).filter(Post.status == "active")
+    
+    if city:
+        query = query.filter(Post.city.ilike(f"%{city}%"))
+    
+    if post_type:
+        query = query.filter(Post.post_type == post_type)
+    
+    query = apply_search(query, q, db.get_bind().dialect.name)
+    if query is None:
+        return ORJSONResponse({"posts": [], "total": 0 if with_total else None, "next_cursor": None})
+    
+    total = None
+    if with_total:
+        total = await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+    rows = (await db.execute(select_post_rows(query).offset(skip).limit(limit))).all()
+    
+    return ORJSONResponse({"posts": serialize_post_rows(rows, json_ready=True), "total": total, "next_cursor": None})
 
 @router.get("/my", response_model=List[PostResponse])
 async def get_my_posts(
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    posts = db.query(Post).filter(Post.user_id == current_user.id).all()
-    
-    result = []
-    for post in posts:
-        positions_needed = json.loads(post.positions_needed) if post.positions_needed else []
-        result.append(PostResponse(
-            id=post.id,
-            title=post.title,
-            description=post.description,
-            post_type=post.post_type,
-            city=post.city,
-            positions_needed=positions_needed,
-            contact_info=post.contact_info,
-            match_time=post.match_time,
-            venue=post.venue,
-            location_link=post.location_link,
-            user_id=post.user_id,
-            status=post.status,
-            views_count=post.views_count,
-            created_at=post.created_at,
-            user_name=current_user.name
-        ))
-    
-    return result
+    # İlanlar ve kullanıcı adı değişmediyse 304 dön
+    fingerprint = (await db.execute(
+        select(func.count(Post.id), func.max(Post.id), func.max(func.coalesce(Post.updated_at, Post.created_at)))
+        .filter(Post.user_id == current_user.id)
+    )).one()
+    etag = compute_etag("posts:my", current_user.id, current_user.name, tuple(fingerprint))
+    if etag_matches(request, etag):
+        return not_modified_response(etag, private=True)
+    
+    rows = (await db.execute(select_post_rows(select(Post).join(User)).filter(Post.user_id == current_user.id))).all()
+    return ORJSONResponse(serialize_post_rows(rows, json_ready=True), headers=etag_headers(etag, private=True))
 
 @router.get("/{post_id}", response_model=PostResponse)
 async def get_post_by_id(
     post_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_post = db.query(Post).filter(Post.id == post_id).first()
+    row = (await db.execute(select_post_rows(select(Post).join(User)).filter(Post.id == post_id))).first()
     
-    if not db_post:
+    if not row:
         raise HTTPException(status_code=404, detail="Post not found")
     
     # Only the owner can view their own post details for editing
-    if db_post.user_id != current_user.id:
+    if row.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to access this post")
     
-    positions_needed = json.loads(db_post.positions_needed) if db_post.positions_needed else []
-    
-    return PostResponse(
-        id=db_post.id,
-        title=db_post.title,
-        description=db_post.description,
-        post_type=db_post.post_type,
-        city=db_post.city,
-        positions_needed=positions_needed,
-        contact_info=db_post.contact_info,
-        match_time=db_post.match_time,
-        venue=db_post.venue,
-        location_link=db_post.location_link,
-        user_id=db_post.user_id,
-        status=db_post.status,
-        views_count=db_post.views_count,
-        created_at=db_post.created_at,
-        user_name=current_user.name
-    )
+    return post_row_to_dict(row)
+
+@router.post("/{post_id}/view", status_code=202)
+async def record_post_view(
+    post_id: int,
+    request: Request,
+    token: Optional[str] = Depends(optional_oauth2_scheme)
+):
+    """İlan görüntülenmesini kaydet; sayaç arka planda toplu olarak yazılır"""
+    payload = verify_token(token) if token else None
+    if payload and payload.get("user_id"):
+        viewer = f"user:{payload['user_id']}"
+    else:
+        viewer = f"ip:{request.client.host if request.client else 'unknown'}"
+    
+    return {"counted": view_counter.record(post_id, viewer)}
 
 @router.put("/{post_id}", response_model=PostResponse)
 async def update_post(
     post_id: int,
     post_update: PostUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_post = db.query(Post).filter(Post.id == post_id, Post.user_id == current_user.id).first()
+    # Pozisyon satırları değiştirilecek/silinecek; async session'da lazy load olmaz, önceden yükle
+    db_post = await db.scalar(
+        select(Post).options(selectinload(Post.position_links))
+        .filter(Post.id == post_id, Post.user_id == current_user.id)
+    )
     
     if not db_post:
         raise HTTPException(status_code=404, detail="Post not found")
     
     update_data = post_update.dict(exclude_unset=True)
+    before = snapshot_post(db_post)
     
     if "positions_needed" in update_data:
-        if update_data["positions_needed"] and len(update_data["positions_needed"]) > 0:
-            update_data["positions_needed"] = json.dumps(update_data["positions_needed"])
-        else:
-            update_data["positions_needed"] = None
+        set_post_positions(db_post, update_data.pop("positions_needed"))
     
     for field, value in update_data.items():
         setattr(db_post, field, value)
     
-    db.commit()
-    db.refresh(db_post)
-    
-    positions_needed = json.loads(db_post.positions_needed) if db_post.positions_needed else []
-    
-    return PostResponse(
-        id=db_post.id,
-        title=db_post.title,
-        description=db_post.description,
-        post_type=db_post.post_type,
-        city=db_post.city,
-        positions_needed=positions_needed,
-        contact_info=db_post.contact_info,
-        match_time=db_post.match_time,
-        venue=db_post.venue,
-        location_link=db_post.location_link,
-        user_id=db_post.user_id,
-        status=db_post.status,
-        views_count=db_post.views_count,
-        created_at=db_post.created_at,
-        user_name=current_user.name
-    )
+    await db.commit()
+    
+    result = await fetch_post_dict(db, post_id)
+    invalidate_feed([before, snapshot_post_dict(result)])
+    return result
 
 @router.delete("/{post_id}")
 async def delete_post(
     post_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_post = db.query(Post).filter(Post.id == post_id, Post.user_id == current_user.id).first()
+    db_post = await db.scalar(
+        select(Post).options(selectinload(Post.position_links))
+        .filter(Post.id == post_id, Post.user_id == current_user.id)
+    )
     
     if not db_post:
         raise HTTPException(status_code=404, detail="Post not found")
     
-    db.delete(db_post)
-    db.commit()
+    before = snapshot_post(db_post)
+    await db.delete(db_post)
+    await db.commit()
+    invalidate_feed([before])
     
     return {"message": "Post deleted successfully"}
@@ -34,10 +34,12 @@ class PostResponse(PostBase):
     views_count: int
     created_at: datetime
     user_name: Optional[str] = None
+    distance_km: Optional[float] = None  # sadece lat/lon ile yapılan aramada dolu
     
     class Config:
         from_attributes = True
 
 class PostList(BaseModel):
     posts: List[PostResponse]
-    total: int
+    total: Optional[int] = None  # with_total=false ile istenmezse None
+    next_cursor: Optional[str] = None  # Sonraki sayfa için opak cursor
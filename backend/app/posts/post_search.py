@@ -0,0 +1,131 @@
+"""
+Full-text search over post title, venue and description
+
+Postgres: a stored tsvector column (Turkish configuration, title > venue >
+description weights) with a GIN index, plus a pg_trgm index on title/venue so
+small typos still match. SQLite: an external-content FTS5 table kept in sync
+by triggers, so the same endpoint can be exercised locally.
+
+The DDL is installed automatically when the posts table is created; existing
+databases run add_post_search_index.py once.
+"""
+from typing import List
+from sqlalchemy import String, event, func, literal, literal_column, or_, select, text
+from sqlalchemy.sql.expression import Grouping
+from app.posts.post_model import Post
+import re
+
+SEARCH_CONFIG = "turkish"
+
+_POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""
+    ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(venue, '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_posts_search_vector ON posts USING gin (search_vector)",
+    """
+    CREATE INDEX IF NOT EXISTS ix_posts_search_trgm ON posts
+    USING gin ((coalesce(title, '') || ' ' || coalesce(venue, '')) gin_trgm_ops)
+    """,
+]
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+        title, venue, description,
+        content='posts', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts(rowid, title, venue, description)
+        VALUES (new.id, new.title, new.venue, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, venue, description)
+        VALUES ('delete', old.id, old.title, old.venue, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, venue, description)
+        VALUES ('delete', old.id, old.title, old.venue, old.description);
+        INSERT INTO posts_fts(rowid, title, venue, description)
+        VALUES (new.id, new.title, new.venue, new.description);
+    END
+    """,
+]
+
+SEARCH_DDL = {"postgresql": _POSTGRES_DDL, "sqlite": _SQLITE_DDL}
+
+
+def install_search_index(connection, rebuild: bool = False):
+    """Create the search column/table, triggers and indexes for this dialect"""
+    for statement in SEARCH_DDL.get(connection.dialect.name, []):
+        connection.exec_driver_sql(statement)
+    if rebuild and connection.dialect.name == "sqlite":
+        # Mevcut ilanları FTS tablosuna doldur
+        connection.exec_driver_sql("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')")
+
+
+@event.listens_for(Post.__table__, "after_create")
+def _install_search_index_on_create(target, connection, **kw):
+    install_search_index(connection)
+
+
+def search_terms(q: str) -> List[str]:
+    """Word tokens of a user query; punctuation and FTS operators are dropped"""
+    return re.findall(r"\w+", q or "")
+
+
+def apply_search(query, q: str, dialect_name: str):
+    """
+    Restrict a posts query to matches for `q` and order it by relevance.
+
+    Returns None when the query has no searchable terms.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return None
+
+    if dialect_name == "postgresql":
+        search_vector = literal_column("posts.search_vector")
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, " ".join(terms))
+        # ix_posts_search_trgm ile birebir aynı ifade olmalı; <% ile || aynı önceliktedir, parantez şart
+        trgm_text = Grouping(func.coalesce(Post.title, "") + " " + func.coalesce(Post.venue, ""))
+        phrase = literal(" ".join(terms), String)
+        rank = func.ts_rank_cd(search_vector, ts_query) + func.word_similarity(phrase, trgm_text)
+        return (
+            query.filter(or_(search_vector.op("@@")(ts_query), phrase.op("<%")(trgm_text)))
+            .order_by(rank.desc(), Post.id.desc())
+        )
+
+    if dialect_name == "sqlite":
+        # Her kelime önek olarak aranır; remove_diacritics ile "besik" -> "Beşiktaş" eşleşir
+        match = " ".join(f'"{term}"*' for term in terms)
+        ranked = (
+            select(
+                literal_column("rowid").label("post_id"),
+                literal_column("bm25(posts_fts, 10.0, 5.0, 1.0)").label("rank"),
+            )
+            .select_from(text("posts_fts"))
+            .where(text("posts_fts MATCH :match").bindparams(match=match))
+            .subquery()
+        )
+        return (
+            query.join(ranked, ranked.c.post_id == Post.id)
+            .order_by(ranked.c.rank.asc(), Post.id.desc())
+        )
+
+    # Diğer veritabanları için indekssiz yedek yol
+    pattern_filters = [
+        or_(Post.title.ilike(f"%{term}%"), Post.venue.ilike(f"%{term}%"), Post.description.ilike(f"%{term}%"))
+        for term in terms
+    ]
+    return query.filter(*pattern_filters).order_by(Post.created_at.desc(), Post.id.desc())
@@ -0,0 +1,83 @@
+"""
+Shared serialization path for PostResponse
+
+Every post endpoint selects the same projected columns (the PostResponse
+fields plus User.name) in one query and turns the rows straight into
+response dicts, instead of loading full ORM objects, lazy-loading post.user
+and building PostResponse field by field.
+"""
+from typing import Any, Dict, Iterable, List
+from pydantic_core import to_jsonable_python
+from sqlalchemy import select
+from app.posts.post_model import Post
+from app.users.user_model import User
+from app.utils.helpers import json_to_positions
+
+POST_RESPONSE_COLUMNS = (
+    Post.id,
+    Post.title,
+    Post.description,
+    Post.post_type,
+    Post.city,
+    Post.positions_needed,
+    Post.contact_info,
+    Post.match_time,
+    Post.venue,
+    Post.location_link,
+    Post.user_id,
+    Post.status,
+    Post.views_count,
+    Post.created_at,
+    User.name.label("user_name"),
+)
+
+# ETag için satır sürümleri (bkz. app/core/etag.py)
+POST_VERSION_COLUMNS = (
+    Post.updated_at,
+    User.updated_at.label("user_updated_at"),
+)
+
+
+def select_post_rows(query, with_versions: bool = False):
+    """Project a select(Post).join(User) statement onto the response columns"""
+    columns = POST_RESPONSE_COLUMNS + POST_VERSION_COLUMNS if with_versions else POST_RESPONSE_COLUMNS
+    return query.with_only_columns(*columns)
+
+
+def post_row_to_dict(row, json_ready: bool = False) -> Dict[str, Any]:
+    """
+    Build a PostResponse-shaped dict from a projected row.
+
+    With json_ready=True, created_at is rendered the way Pydantic would, so
+    the dict can be sent without going through the response model.
+    """
+    created_at = row.created_at
+    if json_ready:
+        created_at = to_jsonable_python(created_at)
+    return {
+        "title": row.title,
+        "description": row.description,
+        "post_type": row.post_type,
+        "city": row.city,
+        "positions_needed": json_to_positions(row.positions_needed),
+        "contact_info": row.contact_info,
+        "match_time": row.match_time,
+        "venue": row.venue,
+        "location_link": row.location_link,
+        "id": row.id,
+        "user_id": row.user_id,
+        "status": row.status,
+        "views_count": row.views_count,
+        "created_at": created_at,
+        "user_name": row.user_name,
+    }
+
+
+def serialize_post_rows(rows: Iterable, json_ready: bool = False) -> List[Dict[str, Any]]:
+    return [post_row_to_dict(row, json_ready=json_ready) for row in rows]
+
+
+async def fetch_post_dict(db, post_id: int) -> Dict[str, Any]:
+    """Response dict for a single post, e.g. right after it was written"""
+    row = (await db.execute(select_post_rows(select(Post).join(User)).filter(Post.id == post_id))).one()
+    return post_row_to_dict(row)
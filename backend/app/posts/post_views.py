@@ -0,0 +1,134 @@
+"""
+Write-behind view counter for posts
+
+POST /posts/{id}/view only touches memory: increments are buffered per
+process, repeat views by the same viewer within POST_VIEW_DEDUP_SECONDS are
+dropped, and a background task flushes the buffer every
+POST_VIEW_FLUSH_SECONDS as one batched UPDATE (one row per viewed post). The
+write rate to the database is therefore bounded by the flush interval, not by
+read traffic.
+
+Lost-update behaviour (by design, views are not billing data):
+- Increments buffered since the last flush are lost if the process dies
+  without a clean shutdown (SIGKILL, OOM). A clean shutdown flushes.
+- If a flush fails, its increments are merged back and retried next time.
+- Each worker process deduplicates on its own, so a viewer whose requests
+  land on several workers can be counted once per worker.
+- Ids of deleted or unknown posts simply update no rows.
+- The view UPDATE keeps updated_at as is, so views do not change ETags or
+  invalidate caches; counts shown in cached pages can lag by the cache TTL.
+"""
+from collections import OrderedDict
+from typing import Dict
+from sqlalchemy import bindparam, func, update
+from app.core.background import PeriodicTask
+from app.core.config import settings
+from app.database.db import engine
+from app.posts.post_model import Post
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """Per-process buffer of pending view increments"""
+
+    def __init__(self, dedup_seconds: float, max_pending_posts: int = 10000, max_viewers: int = 100000):
+        self.dedup_seconds = dedup_seconds
+        self.max_pending_posts = max_pending_posts
+        self.max_viewers = max_viewers
+        self._pending: Dict[int, int] = {}
+        self._seen: "OrderedDict[tuple, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.flushed = 0
+
+    def record(self, post_id: int, viewer: str) -> bool:
+        """Buffer one view; returns False if it was a repeat or the buffer is full"""
+        now = time.monotonic()
+        key = (post_id, viewer)
+        with self._lock:
+            # Süresi dolan görüntülemeleri baştan temizle (ekleme sırası = süre sırası)
+            while self._seen:
+                expires_at = next(iter(self._seen.values()))
+                if expires_at > now and len(self._seen) < self.max_viewers:
+                    break
+                self._seen.popitem(last=False)
+
+            if key in self._seen:
+                self.deduplicated += 1
+                return False
+            if post_id not in self._pending and len(self._pending) >= self.max_pending_posts:
+                self.dropped += 1
+                return False
+
+            self._seen[key] = now + self.dedup_seconds
+            self._pending[post_id] = self._pending.get(post_id, 0) + 1
+            self.recorded += 1
+            return True
+
+    def _take(self) -> Dict[int, int]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def _restore(self, pending: Dict[int, int]):
+        with self._lock:
+            for post_id, n in pending.items():
+                self._pending[post_id] = self._pending.get(post_id, 0) + n
+
+    def flush(self, engine) -> int:
+        """Write buffered increments in one batched UPDATE; returns rows sent"""
+        pending = self._take()
+        if not pending:
+            return 0
+
+        table = Post.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("post_id"))
+            .values(
+                views_count=func.coalesce(table.c.views_count, 0) + bindparam("increment"),
+                # onupdate=func.now() tetiklenmesin; görüntülenme içerik değişikliği değil
+                updated_at=table.c.updated_at,
+            )
+        )
+        params = [{"post_id": post_id, "increment": n} for post_id, n in pending.items()]
+        try:
+            with engine.begin() as conn:
+                conn.execute(stmt, params)
+        except Exception as e:
+            logger.error("❌ View count flush failed, will retry: %s", e)
+            self._restore(pending)
+            return 0
+
+        with self._lock:
+            self.flushed += sum(pending.values())
+        return len(params)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending_posts": len(self._pending),
+                "pending_views": sum(self._pending.values()),
+                "tracked_viewers": len(self._seen),
+                "recorded": self.recorded,
+                "deduplicated": self.deduplicated,
+                "dropped": self.dropped,
+                "flushed": self.flushed,
+            }
+
+
+view_counter = ViewCounter(dedup_seconds=settings.POST_VIEW_DEDUP_SECONDS)
+
+view_flusher = PeriodicTask(
+    "post view flush",
+    lambda: view_counter.flush(engine),
+    interval=settings.POST_VIEW_FLUSH_SECONDS,
+    # Kapanışta tampondaki görüntülenmeleri yaz
+    run_on_stop=True,
+)
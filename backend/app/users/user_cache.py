@@ -0,0 +1,95 @@
+"""
+Short-lived identity cache for the current user
+
+get_current_user runs on every authenticated request. Instead of a
+SELECT ... FROM users per request, the columns authentication needs are
+cached by user_id for IDENTITY_CACHE_TTL_SECONDS and merged back into the
+request's session with merge(load=False), which attaches the instance
+without any SQL so handlers can still modify and commit it as usual.
+
+Only IDENTITY_COLUMNS are cached: the id, the email tokens are checked
+against, the display name and the active/admin/role flags. Password hashes,
+phone numbers and the rest of the profile never reach the cache (which may
+be a shared file or a Redis server). Handlers that read those columns call
+load_profile() first; on a cached user it loads them with one query.
+
+Writes that change a user (profile update, admin flag, delete) call
+invalidate_user. With the default per-process backend other workers keep
+their copy until the TTL runs out, which is why the TTL is short; a shared
+SHARED_STATE_BACKEND drops it for every worker at once.
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import DateTime, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from app.core.cache import CacheBackend
+from app.core.config import settings
+from app.core.shared_state import create_cache
+from app.users.user_model import User
+
+IDENTITY_KEY_PREFIX = "auth:user:"
+
+identity_cache: CacheBackend = create_cache(
+    "identities",
+    max_entries=settings.IDENTITY_CACHE_MAX_ENTRIES,
+    ttl=settings.IDENTITY_CACHE_TTL_SECONDS,
+)
+
+# Kimlik doğrulamanın ihtiyaç duyduğu alanlar; şifre özeti ve profil bilgileri önbelleğe yazılmaz
+IDENTITY_COLUMNS = ("id", "email", "name", "is_active", "is_admin", "role", "updated_at")
+_COLUMNS = [User.__table__.columns[key] for key in IDENTITY_COLUMNS]
+_DATETIME_COLUMNS = {column.key for column in _COLUMNS if isinstance(column.type, DateTime)}
+
+
+def _identity_key(user_id: int) -> str:
+    return f"{IDENTITY_KEY_PREFIX}{user_id}"
+
+
+def _snapshot(user: User) -> Dict[str, Any]:
+    # Önbellek değerleri JSON uyumlu olmalı; tarihler ISO metni olarak saklanır
+    data = {}
+    for column in _COLUMNS:
+        value = getattr(user, column.key)
+        if column.key in _DATETIME_COLUMNS and value is not None:
+            value = value.isoformat()
+        data[column.key] = value
+    return data
+
+
+def _restore(data: Dict[str, Any]) -> User:
+    # Diğer sütunlar "expired" kalır ve load_profile ile yüklenir
+    user = User()
+    for key, value in data.items():
+        if key not in IDENTITY_COLUMNS:
+            continue
+        if key in _DATETIME_COLUMNS and value is not None:
+            value = datetime.fromisoformat(value)
+        setattr(user, key, value)
+    make_transient_to_detached(user)
+    return user
+
+
+async def load_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    """The user with this id, attached to `db`; from the cache when possible"""
+    key = _identity_key(user_id)
+    data = await identity_cache.aget(key)
+    if data is not None:
+        return await db.merge(_restore(data), load=False)
+
+    user = await db.get(User, user_id)
+    if user is not None:
+        await identity_cache.aset(key, _snapshot(user))
+    return user
+
+
+async def load_profile(db: AsyncSession, user: User) -> User:
+    """Load the columns the identity cache leaves out; no query when they are already loaded"""
+    unloaded = inspect(user).unloaded
+    if unloaded:
+        await db.refresh(user, attribute_names=sorted(unloaded))
+    return user
+
+
+def invalidate_user(user_id: int):
+    identity_cache.delete([_identity_key(user_id)])
@@ -1,39 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.database.db import get_db
 from app.users.user_model import User
 from app.users.user_schema import UserProfile, UserUpdate
-from app.core.security import verify_token
+from app.core.auth_utils import get_current_user
+from app.users.user_cache import invalidate_user, load_profile
+from app.posts.post_cache import invalidate_all_feeds
 import json
 
 router = APIRouter()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=401,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    payload = verify_token(token)
-    if payload is None:
-        raise credentials_exception
-    
-    email: str = payload.get("sub")
-    if email is None:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise credentials_exception
-    
-    return user
 
 @router.get("/profile", response_model=UserProfile)
-async def get_user_profile(current_user: User = Depends(get_current_user)):
+async def get_user_profile(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    # Kimlik önbelleğinde profil alanları yok; gerekiyorsa tek sorguyla yüklenir
+    await load_profile(db, current_user)
     return UserProfile(
         id=current_user.id,
         email=current_user.email,
@@ -50,7 +33,7 @@ async def get_user_profile(current_user: User = Depends(get_current_user)):
 async def update_user_profile(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     update_data = user_update.dict(exclude_unset=True)
     
@@ -62,8 +45,12 @@ async def update_user_profile(
     for field, value in update_data.items():
         setattr(current_user, field, value)
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    invalidate_user(current_user.id)
+    # Önbellekteki ilan sayfaları yazar adını (user_name) içerir
+    if "name" in update_data:
+        invalidate_all_feeds()
+    await db.refresh(current_user)
     
     return UserProfile(
         id=current_user.id,
@@ -81,9 +68,9 @@ async def update_user_profile(
 async def search_users(
     city: str = None,
     position: str = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    query = db.query(User)
+    query = select(User)
     
     if city:
         query = query.filter(User.city.ilike(f"%{city}%"))
@@ -91,7 +78,7 @@ async def search_users(
     if position:
         query = query.filter(User.positions.ilike(f"%{position}%"))
     
-    users = query.all()
+    users = (await db.scalars(query)).all()
     
     result = []
     for user in users:
@@ -0,0 +1,24 @@
+"""
+Creates the post_positions table and fills it from posts.positions_needed.
+Runs in small committed batches, so it is safe against a live database and
+can be re-run; posts that already have position rows are skipped.
+Run once: python backfill_post_positions.py [batch_size]
+"""
+import sys
+from app.database.db import engine, SessionLocal
+from app.posts.post_model import PostPosition
+from app.posts.post_positions import backfill_post_positions
+
+batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+PostPosition.__table__.create(bind=engine, checkfirst=True)
+print("✅ post_positions tablosu hazır")
+
+db = SessionLocal()
+try:
+    backfilled = backfill_post_positions(db, batch_size=batch_size, pause_seconds=0.05)
+    print(f"✅ {backfilled} ilanın pozisyonları aktarıldı")
+finally:
+    db.close()
+
+print("✅ Migration tamamlandı")
@@ -0,0 +1,177 @@
+"""
+Benchmark: bandwidth and latency of compressed list responses.
+
+Seeds a temporary SQLite database with PAGE_SIZE posts, a user's lineups
+and a list of users. Then it fetches GET /posts?limit=100, GET /lineups/
+and GET /admin/users through the ASGI app. For each encoding it reports the
+body size and the CPU cost of compressing on the server and decompressing
+on the client. It also estimates the download time on typical mobile links:
+
+    RTT + size / bandwidth + compress + decompress
+
+This leaves out TCP slow start, which favours smaller bodies even more.
+Link presets follow the browser devtools throttling profiles.
+Run: python benchmark_compression.py [repetitions]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import tempfile
+import statistics
+import zlib
+
+db_path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+os.environ["RATE_LIMIT_PER_MINUTE"] = str(10**9)
+os.environ["SHARED_STATE_BACKEND"] = "memory"
+os.environ.setdefault("GOOGLE_CLIENT_ID", "benchmark")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.main import app
+from app.core.security import create_access_token
+from app.database.base import Base
+from app.database.db import SessionLocal, async_engine, engine
+from app.lineups.lineup_model import Lineup
+from app.middleware.compression import brotli
+from app.posts.post_model import Post
+from app.users.user_model import User
+
+REPETITIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+PAGE_SIZE = 100
+
+LINKS = [
+    ("Slow 3G", 400_000, 0.400),
+    ("Fast 3G", 1_600_000, 0.150),
+    ("4G", 9_000_000, 0.060),
+]
+
+WORDS = (
+    "akşam maç halı saha kaleci forvet defans orta saha eksik oyuncu aranıyor "
+    "kadıköy beşiktaş ataşehir saat 21:00 7v7 8v8 ücret kişi başı iletişim "
+    "düzenli takım hafta içi cumartesi pazar tecrübeli amatör turnuva lig"
+).split()
+
+
+def sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def seed():
+    rng = random.Random(42)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        users = [
+            User(email=f"oyuncu{i}@example.com", name=f"Oyuncu {i}", city="İstanbul",
+                 bio=sentence(rng, 20), positions=json.dumps(rng.sample(["Kaleci", "Defans", "Orta Saha", "Forvet"], 2)))
+            for i in range(100)
+        ]
+        admin = User(email="admin@example.com", name="Admin", is_admin=True)
+        db.add_all(users + [admin])
+        db.flush()
+        for i in range(PAGE_SIZE):
+            db.add(Post(
+                title=sentence(rng, 5),
+                description=sentence(rng, 40),
+                post_type=rng.choice(["team", "player"]),
+                city=rng.choice(["İstanbul", "Ankara", "İzmir"]),
+                positions_needed=json.dumps(rng.sample(["Kaleci", "Defans", "Orta Saha", "Forvet"], 2)),
+                contact_info={"phone": f"0555{rng.randint(1000000, 9999999)}", "whatsapp": True},
+                match_time=f"2026-10-{rng.randint(1, 28):02d} {rng.randint(18, 22)}:00",
+                venue=sentence(rng, 3),
+                user_id=users[i].id,
+                status="active",
+            ))
+        for i in range(20):
+            team = [{"name": f"Oyuncu {rng.randint(1, 99)}", "number": n, "position": rng.choice(WORDS),
+                     "x": rng.randint(0, 100), "y": rng.randint(0, 100)} for n in range(1, 8)]
+            db.add(Lineup(name=sentence(rng, 3), formation="7v7", home_team=team, away_team=list(reversed(team)),
+                          notes=sentence(rng, 15), user_id=users[0].id))
+        db.commit()
+        user_token = create_access_token({"sub": users[0].email, "user_id": users[0].id})
+        admin_token = create_access_token({"sub": admin.email, "user_id": admin.id, "role": "admin"})
+    return user_token, admin_token
+
+
+async def fetch(path: str, query: bytes, token: str) -> bytes:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": query,
+        "headers": [(b"host", b"localhost"), (b"authorization", f"Bearer {token}".encode())],
+        "client": ("10.0.0.1", 1234), "server": ("localhost", 80),
+    }
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    chunks = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.Future()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(chunks)
+
+
+def encoders():
+    result = [("identity", lambda b: b, lambda b: b)]
+    for level in (1, 6, 9):
+        result.append((
+            f"gzip-{level}",
+            lambda b, level=level: (lambda c: c.compress(b) + c.flush())(zlib.compressobj(level, zlib.DEFLATED, 31)),
+            lambda b: zlib.decompress(b, 47),
+        ))
+    if brotli is not None:
+        for quality in (4, 11):
+            result.append((f"br-{quality}", lambda b, q=quality: brotli.compress(b, quality=q), brotli.decompress))
+    return result
+
+
+def median_ms(func, arg) -> float:
+    samples = []
+    for _ in range(REPETITIONS):
+        start = time.perf_counter()
+        func(arg)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+async def main():
+    user_token, admin_token = seed()
+    endpoints = [
+        ("GET /posts?limit=100", "/posts/", b"limit=100", user_token),
+        ("GET /lineups/", "/lineups/", b"", user_token),
+        ("GET /admin/users", "/admin/users", b"", admin_token),
+    ]
+    for label, path, query, token in endpoints:
+        body = await fetch(path, query, token)
+        print(f"\n{label}: {len(body):,} bytes uncompressed")
+        print(f"  {'encoding':<9} {'bytes':>8} {'ratio':>6} {'comp ms':>8} {'decomp ms':>9}"
+              + "".join(f" {name:>9}" for name, _, _ in LINKS))
+        for name, compress, decompress in encoders():
+            encoded = compress(body)
+            assert decompress(encoded) == body
+            compress_ms = median_ms(compress, body) if name != "identity" else 0.0
+            decompress_ms = median_ms(decompress, encoded) if name != "identity" else 0.0
+            times = [
+                (rtt + len(encoded) * 8 / bandwidth) * 1000 + compress_ms + decompress_ms
+                for _, bandwidth, rtt in LINKS
+            ]
+            print(f"  {name:<9} {len(encoded):>8,} {len(body) / len(encoded):>5.1f}x {compress_ms:>8.2f} {decompress_ms:>9.2f}"
+                  + "".join(f" {t:>7.0f}ms" for t in times))
+    if brotli is None:
+        print("\n(brotli not installed: br rows skipped, the API serves gzip only)")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
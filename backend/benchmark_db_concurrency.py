@@ -0,0 +1,102 @@
+"""
+Benchmark: request throughput under mixed slow/fast queries.
+
+Runs the same two endpoints in two ways against a temporary SQLite file:
+"blocking" uses a sync Session inside `async def` handlers (the old request
+path), "async" uses the AsyncSession from app/database/db.py. Each round
+fires SLOW slow queries and FAST cheap queries through the ASGI app with at
+most CONCURRENCY requests in flight (kept below the connection pool size)
+and reports fast-request latency and overall throughput.
+Run: python benchmark_db_concurrency.py [slow_requests] [fast_requests] [concurrency]
+"""
+import os
+import sys
+import tempfile
+import time
+import asyncio
+import statistics
+
+db_path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+os.environ.setdefault("GOOGLE_CLIENT_ID", "benchmark")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.database.db import SessionLocal, async_engine, get_db
+
+SLOW = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+FAST = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+CONCURRENCY = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+
+# ~0.5 s CPU in SQLite; stands in for a slow feed/count query
+SLOW_SQL = text("WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 1000000) SELECT count(*) FROM c")
+FAST_SQL = text("SELECT 1")
+
+
+def get_sync_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+app = FastAPI()
+
+
+@app.get("/blocking/{kind}")
+async def blocking(kind: str, db: Session = Depends(get_sync_db)):
+    return {"v": db.execute(SLOW_SQL if kind == "slow" else FAST_SQL).scalar()}
+
+
+@app.get("/async/{kind}")
+async def non_blocking(kind: str, db: AsyncSession = Depends(get_db)):
+    return {"v": (await db.execute(SLOW_SQL if kind == "slow" else FAST_SQL)).scalar()}
+
+
+async def timed(client, url, latencies, slots):
+    async with slots:
+        start = time.perf_counter()
+        response = await client.get(url)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run(mode: str):
+    fast_latencies, slow_latencies = [], []
+    slots = asyncio.Semaphore(CONCURRENCY)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get(f"/{mode}/fast")  # ısınma
+        start = time.perf_counter()
+        # Yavaş istekler hızlıların arasına eşit aralıklarla serpiştirilir
+        every = max(FAST // max(SLOW, 1), 1)
+        tasks = []
+        for i in range(FAST):
+            if i % every == 0 and len(tasks) - i < SLOW:
+                tasks.append(timed(client, f"/{mode}/slow", slow_latencies, slots))
+            tasks.append(timed(client, f"/{mode}/fast", fast_latencies, slots))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+    await async_engine.dispose()  # aiosqlite bağlantı thread'leri kapanmadan süreç bitmez
+    fast_latencies.sort()
+    return {
+        "fast_p50": statistics.median(fast_latencies),
+        "fast_p95": fast_latencies[int(len(fast_latencies) * 0.95) - 1],
+        "slow_p50": statistics.median(slow_latencies),
+        "throughput": (SLOW + FAST) / elapsed,
+    }
+
+
+print(f"📊 {SLOW} slow + {FAST} fast requests, {CONCURRENCY} in flight (SQLite file database)")
+for mode in ("blocking", "async"):
+    r = asyncio.run(run(mode))
+    print(
+        f"  {mode:<9} fast p50 {r['fast_p50']:7.1f} ms  fast p95 {r['fast_p95']:7.1f} ms  "
+        f"slow p50 {r['slow_p50']:7.1f} ms  throughput {r['throughput']:6.1f} req/s"
+    )
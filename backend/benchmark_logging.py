@@ -0,0 +1,91 @@
+"""
+Benchmark: cost of a log call on the request path.
+
+Compares the old setup with app/core/log_setup.py:
+- old: logging.basicConfig, a StreamHandler writing synchronously,
+  messages built with f-strings
+- new: NonBlockingQueueHandler, with lazy %s arguments, formatted and
+  written as JSON by the QueueListener thread
+
+Each setup writes to /dev/null and to a "slow stderr" that takes 1 ms per
+write (a full pipe, or a log shipper that falls behind). The numbers are
+the time the calling thread (the event loop) spends per logger.info call.
+Run: python benchmark_logging.py [calls]
+"""
+import os
+import sys
+import time
+import queue
+import logging
+from logging.handlers import QueueListener
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///benchmark.db")
+os.environ.setdefault("GOOGLE_CLIENT_ID", "benchmark")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.core.log_setup import JSONFormatter, NonBlockingQueueHandler
+
+CALLS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+
+class SlowStream:
+    """A stream whose every write blocks for 1 ms"""
+
+    def write(self, text):
+        time.sleep(0.001)
+
+    def flush(self):
+        pass
+
+
+def old_setup(stream) -> logging.Logger:
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+    logger = logging.getLogger("benchmark.old")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def new_setup(stream):
+    output = logging.StreamHandler(stream)
+    output.setFormatter(JSONFormatter())
+    log_queue = queue.Queue(maxsize=10000)
+    logger = logging.getLogger("benchmark.new")
+    handler = NonBlockingQueueHandler(log_queue)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    listener = QueueListener(log_queue, output)
+    listener.start()
+    return logger, handler, listener
+
+
+def per_call_us(log, calls: int) -> float:
+    user_id, name, home_team = 42, "Cumartesi Halı Saha", list(range(7))
+    start = time.perf_counter()
+    for _ in range(calls):
+        log(user_id, name, home_team)
+    return (time.perf_counter() - start) / calls * 1_000_000
+
+
+def main():
+    print(f"µs spent in the calling thread per logger.info ({CALLS} calls, slow stderr: {CALLS // 20}):")
+    with open(os.devnull, "w") as devnull:
+        for label, stream, calls in (("/dev/null", devnull, CALLS), ("slow stderr", SlowStream(), CALLS // 20)):
+            old = old_setup(stream)
+            old_us = per_call_us(
+                lambda u, n, t: old.info(f"📤 Lineup data: user={u} name='{n}', home_team_count={len(t)}"), calls
+            )
+            new, handler, listener = new_setup(stream)
+            new_us = per_call_us(
+                lambda u, n, t: new.info("📤 Lineup data: user=%s name=%r, home_team_count=%d", u, n, len(t)), calls
+            )
+            listener.stop()
+            print(f"  {label:<12} old {old_us:8.1f}   new {new_us:6.1f}   (new dropped {handler.dropped} on a full queue)")
+
+
+if __name__ == "__main__":
+    main()
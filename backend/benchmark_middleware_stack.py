@@ -0,0 +1,160 @@
+"""
+Benchmark: requests/sec through the full app with the old BaseHTTPMiddleware
+security middleware vs the pure ASGI ones in app/middleware/security.py.
+
+"before" swaps the old RateLimitMiddleware / SecurityHeadersMiddleware
+(BaseHTTPMiddleware, reproduced below) into app.main's middleware list;
+everything else (CORS, TrustedHost, ProxyHeaders, routes) is the same.
+Requests go straight into the ASGI app, so no HTTP client or socket is
+measured. Uses a temporary SQLite file with PAGE_SIZE posts.
+Run: python benchmark_middleware_stack.py [requests] [concurrency]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+
+db_path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+os.environ["RATE_LIMIT_PER_MINUTE"] = str(10**9)
+os.environ["SHARED_STATE_BACKEND"] = "memory"
+os.environ.setdefault("GOOGLE_CLIENT_ID", "benchmark")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.main import app
+from app.core.rate_limit import RateLimitPolicy, rate_limiter
+from app.database.base import Base
+from app.database.db import SessionLocal, async_engine, engine
+from app.middleware import security
+from app.posts.post_cache import feed_cache
+from app.posts.post_model import Post
+from app.users.user_model import User
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+CONCURRENCY = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+PAGE_SIZE = 20
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    """RateLimitMiddleware with the sliding-window limiter, still on BaseHTTPMiddleware"""
+
+    def __init__(self, app, requests_per_minute=60, route_policies=None, limiter=None):
+        super().__init__(app)
+        self.policy = RateLimitPolicy("default", requests_per_minute)
+        self.route_policies = {path.rstrip("/"): policy for path, policy in (route_policies or {}).items()}
+        self.limiter = limiter or rate_limiter
+
+    async def dispatch(self, request: Request, call_next):
+        policy = self.route_policies.get(request.url.path.rstrip("/"), self.policy)
+        result = self.limiter.hit(policy, request.client.host)
+        if not result.allowed:
+            return JSONResponse(status_code=429, content={"detail": "Too many requests. Please try again later."})
+        return await call_next(request)
+
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        for name, value in security.SecurityHeadersMiddleware.HEADERS.items():
+            response.headers[name] = value
+        return response
+
+
+LEGACY = {
+    security.RateLimitMiddleware: LegacyRateLimitMiddleware,
+    security.SecurityHeadersMiddleware: LegacySecurityHeadersMiddleware,
+}
+CURRENT = list(app.user_middleware)
+
+
+def use_middleware(legacy: bool):
+    app.user_middleware = [
+        Middleware(LEGACY.get(m.cls, m.cls), **m.options) if legacy else m for m in CURRENT
+    ]
+    app.middleware_stack = None
+
+
+def seed():
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        users = [User(email=f"user{i}@example.com", name=f"Oyuncu {i}") for i in range(5)]
+        db.add_all(users)
+        db.flush()
+        for i in range(PAGE_SIZE):
+            db.add(Post(
+                title=f"Halı saha maçı #{i}",
+                description="Akşam 8'de 7v7 maç, eksik oyuncu aranıyor.",
+                post_type="team",
+                city="İstanbul",
+                positions_needed=json.dumps(["Kaleci", "Forvet"]),
+                contact_info={"phone": "05550000000"},
+                user_id=users[i % len(users)].id,
+                status="active",
+            ))
+        db.commit()
+
+
+async def call(path: str) -> int:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"accept", b"application/json")],
+        "client": ("10.0.0.1", 1234), "server": ("localhost", 80),
+    }
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    status = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # İstemci bağlı kalır; yanıt bitince bu bekleme iptal edilir
+        await asyncio.Future()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+async def requests_per_second(path: str, uncached: bool) -> float:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one():
+        async with semaphore:
+            if uncached:
+                feed_cache.clear()
+            assert await call(path) == 200
+
+    for _ in range(20):
+        await one()
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(REQUESTS)))
+    return REQUESTS / (time.perf_counter() - start)
+
+
+async def main():
+    seed()
+    cases = [("/ping", "/ping", False), ("/posts (cached)", "/posts/", False), ("/posts (uncached)", "/posts/", True)]
+    print(f"{REQUESTS} requests, {CONCURRENCY} in flight (req/s):")
+    print(f"  {'endpoint':<18} {'before':>9} {'after':>9} {'change':>8}")
+    for label, path, uncached in cases:
+        use_middleware(legacy=True)
+        before = await requests_per_second(path, uncached)
+        use_middleware(legacy=False)
+        after = await requests_per_second(path, uncached)
+        print(f"  {label:<18} {before:9.0f} {after:9.0f} {(after / before - 1) * 100:+7.0f}%")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
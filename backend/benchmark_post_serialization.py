@@ -0,0 +1,144 @@
+"""
+Benchmark: CPU time to build one 100-post GET /posts page.
+
+"before" reproduces the old path (full ORM objects, lazy post.user, json.loads
+and PostResponse built field by field); "after" is the shared projected path
+in app/posts/post_serialization.py. Uses an in-memory SQLite database.
+
+The second part times turning the finished page into response bytes:
+FastAPI's response_model validation + stdlib json (what a route returning
+a dict/model gets), stdlib JSONResponse alone, and ORJSONResponse alone
+(what GET /posts sends now).
+Run: python benchmark_post_serialization.py [iterations]
+"""
+import os
+import sys
+import time
+import json
+import asyncio
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("GOOGLE_CLIENT_ID", "benchmark")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database.base import Base
+from app.users.user_model import User
+from app.posts.post_model import Post
+from app.posts.post_schema import PostList, PostResponse
+from app.posts.post_serialization import select_post_rows, serialize_post_rows
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+PAGE_SIZE = 100
+iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+Base.metadata.create_all(bind=engine)
+Session = sessionmaker(bind=engine)
+
+with Session() as db:
+    users = [User(email=f"user{i}@example.com", name=f"Oyuncu {i}") for i in range(PAGE_SIZE // 4)]
+    db.add_all(users)
+    db.flush()
+    for i in range(PAGE_SIZE):
+        db.add(Post(
+            title=f"Halı saha maçı #{i}",
+            description="Akşam 8'de 7v7 maç, eksik oyuncu aranıyor. " * 4,
+            post_type="team",
+            city="İstanbul",
+            positions_needed=json.dumps(["Kaleci", "Forvet"]),
+            contact_info={"phone": "05550000000", "email": "iletisim@example.com"},
+            match_time="20:00-22:00",
+            venue="Kadıköy Arena",
+            user_id=users[i % len(users)].id,
+            status="active",
+            views_count=i,
+        ))
+    db.commit()
+
+
+def before(db):
+    posts = db.query(Post).join(User).filter(Post.status == "active").order_by(Post.created_at.desc()).limit(PAGE_SIZE).all()
+    result = []
+    for post in posts:
+        positions_needed = json.loads(post.positions_needed) if post.positions_needed else []
+        result.append(PostResponse(
+            id=post.id,
+            title=post.title,
+            description=post.description,
+            post_type=post.post_type,
+            city=post.city,
+            positions_needed=positions_needed,
+            contact_info=post.contact_info,
+            match_time=post.match_time,
+            venue=post.venue,
+            location_link=post.location_link,
+            user_id=post.user_id,
+            status=post.status,
+            views_count=post.views_count,
+            created_at=post.created_at,
+            user_name=post.user.name if post.user else None
+        ))
+    return PostList(posts=result, total=len(result)).model_dump(mode="json")
+
+
+def after(db):
+    query = select(Post).join(User).filter(Post.status == "active").order_by(Post.created_at.desc())
+    rows = db.execute(select_post_rows(query).limit(PAGE_SIZE)).all()
+    return {"posts": serialize_post_rows(rows, json_ready=True), "total": len(rows)}
+
+
+def measure(build):
+    # Her turda yeni session: lazy-load edilen kullanıcılar önceki turdan gelmesin
+    start = time.process_time()
+    for _ in range(iterations):
+        with Session() as db:
+            build(db)
+    return (time.process_time() - start) / iterations * 1000
+
+
+with Session() as db:
+    assert before(db)["posts"] == after(db)["posts"], "serialization paths disagree"
+
+before_ms = measure(before)
+after_ms = measure(after)
+print(f"📊 CPU per {PAGE_SIZE}-post page ({iterations} iterations)")
+print(f"  before (ORM + PostResponse): {before_ms:.2f} ms")
+print(f"  after  (projected rows):     {after_ms:.2f} ms")
+print(f"  speedup: {before_ms / after_ms:.1f}x")
+
+
+def measure_encoding(encode, page):
+    start = time.process_time()
+    for _ in range(iterations):
+        encode(page)
+    return (time.process_time() - start) / iterations * 1000
+
+
+response_field = create_response_field(name="Response_get_posts", type_=PostList)
+loop = asyncio.new_event_loop()
+
+
+def validated_stdlib(page):
+    # FastAPI'nin response_model ile yaptığı: doğrula, JSON moduna dök, json ile kodla
+    content = loop.run_until_complete(serialize_response(field=response_field, response_content=page))
+    return JSONResponse(content).body
+
+
+with Session() as db:
+    page = {**after(db), "next_cursor": None}
+assert json.loads(validated_stdlib(page)) == json.loads(ORJSONResponse(page).body), "encoders disagree"
+
+validated_ms = measure_encoding(validated_stdlib, page)
+stdlib_ms = measure_encoding(lambda p: JSONResponse(p).body, page)
+orjson_ms = measure_encoding(lambda p: ORJSONResponse(p).body, page)
+print(f"\n📊 Encoding one {PAGE_SIZE}-post page to response bytes ({iterations} iterations)")
+print(f"  response_model + json:  {validated_ms:.2f} ms")
+print(f"  JSONResponse (json):    {stdlib_ms:.2f} ms")
+print(f"  ORJSONResponse:         {orjson_ms:.2f} ms")
+print(f"  speedup vs response_model path: {validated_ms / orjson_ms:.1f}x")
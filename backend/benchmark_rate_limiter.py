@@ -0,0 +1,127 @@
+"""
+Benchmark: cost of rate limiting per request.
+
+1. Limiter check alone: the old per-IP list of timestamps (rebuilt on every
+   request, O(requests in the last minute)) vs SlidingWindowLimiter.hit
+   (O(1)), for one busy client and for many distinct clients.
+2. Middleware overhead: the same tiny ASGI route with and without
+   RateLimitMiddleware, called directly (no HTTP client in the loop).
+Run: python benchmark_rate_limiter.py [iterations]
+"""
+import os
+import sys
+import time
+import asyncio
+from collections import defaultdict
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("GOOGLE_CLIENT_ID", "benchmark")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from fastapi import FastAPI
+from app.core.rate_limit import RateLimitPolicy, SlidingWindowLimiter
+from app.middleware.security import RateLimitMiddleware
+
+ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+
+class ListLimiter:
+    """The previous RateLimitMiddleware logic, minus the ASGI plumbing"""
+
+    def __init__(self, requests_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self.requests = defaultdict(list)
+
+    def hit(self, client_ip: str) -> bool:
+        now = time.time()
+        self.requests[client_ip] = [t for t in self.requests[client_ip] if now - t < 60]
+        if len(self.requests[client_ip]) >= self.requests_per_minute:
+            return False
+        self.requests[client_ip].append(now)
+        return True
+
+
+def per_call_us(func, n: int) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        func(i)
+    return (time.perf_counter() - start) / n * 1_000_000
+
+
+def bench_checks():
+    print(f"Limiter check, {ITERATIONS} calls (µs/call):")
+    for limit in (100, 1000, 5000):
+        old = ListLimiter(limit)
+        new = SlidingWindowLimiter()
+        policy = RateLimitPolicy("default", limit)
+        old_us = per_call_us(lambda i: old.hit("10.0.0.1"), ITERATIONS)
+        new_us = per_call_us(lambda i: new.hit(policy, "10.0.0.1"), ITERATIONS)
+        print(f"  one busy IP, limit {limit:>5}/min   old {old_us:8.2f}   new {new_us:6.2f}")
+
+    old = ListLimiter(100)
+    new = SlidingWindowLimiter(max_keys=10000)
+    policy = RateLimitPolicy("default", 100)
+    old_us = per_call_us(lambda i: old.hit(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"), ITERATIONS)
+    new_us = per_call_us(lambda i: new.hit(policy, f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"), ITERATIONS)
+    print(f"  {ITERATIONS} distinct IPs            old {old_us:8.2f}   new {new_us:6.2f}")
+    print(f"  keys kept: old {len(old.requests)}, new {new.stats()['keys']} (max_keys 10000)")
+
+
+def make_app(with_limiter: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    if with_limiter:
+        app.add_middleware(
+            RateLimitMiddleware,
+            requests_per_minute=10**9,
+            limiter=SlidingWindowLimiter(),
+        )
+    return app
+
+
+async def call(app, scope):
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # İstemci bağlı kalır; yanıt bitince bu bekleme iptal edilir
+        await asyncio.Future()
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def bench_middleware():
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/ping", "raw_path": b"/ping",
+        "root_path": "", "query_string": b"", "headers": [(b"host", b"localhost")],
+        "client": ("10.0.0.1", 1234), "server": ("localhost", 80),
+    }
+    results = {}
+    for label, with_limiter in (("without limiter", False), ("with limiter", True)):
+        app = make_app(with_limiter)
+        for _ in range(200):
+            await call(app, dict(scope))
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            await call(app, dict(scope))
+        results[label] = (time.perf_counter() - start) / ITERATIONS * 1_000_000
+
+    print(f"\nGET /ping through the ASGI app, {ITERATIONS} requests (µs/request):")
+    for label, us in results.items():
+        print(f"  {label:<16} {us:8.1f}")
+    print(f"  middleware overhead {results['with limiter'] - results['without limiter']:8.1f}")
+
+
+if __name__ == "__main__":
+    bench_checks()
+    asyncio.run(bench_middleware())
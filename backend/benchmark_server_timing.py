@@ -0,0 +1,118 @@
+"""
+Benchmark: cost of Server-Timing spans and the per-request log line.
+
+Runs GET /ping and GET /posts/ (feed cache cleared before every request,
+so the cursor hooks and the count/page/serialize spans all fire) through
+app.main's full middleware stack three ways:
+- without ServerTimingMiddleware
+- with it but the request log off
+- with both on, logging to a file
+
+Requests go straight into the ASGI app; a temporary SQLite file holds the
+posts.
+Run: python benchmark_server_timing.py [requests]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import tempfile
+
+tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'benchmark.db')}"
+os.environ["RATE_LIMIT_PER_MINUTE"] = str(10**9)
+os.environ["SHARED_STATE_BACKEND"] = "memory"
+os.environ.setdefault("GOOGLE_CLIENT_ID", "benchmark")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from starlette.middleware import Middleware
+from app.main import app
+from app.database.base import Base
+from app.database.db import SessionLocal, async_engine, engine
+from app.middleware.timing import ServerTimingMiddleware
+from app.posts.post_cache import feed_cache
+from app.posts.post_model import Post
+from app.users.user_model import User
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+CURRENT = [m for m in app.user_middleware if m.cls is not ServerTimingMiddleware]
+
+
+def use_timing(enabled: bool, log_requests: bool = False):
+    middleware = list(CURRENT)
+    if enabled:
+        middleware.insert(0, Middleware(ServerTimingMiddleware, log_requests=log_requests))
+    app.user_middleware = middleware
+    app.middleware_stack = None
+
+
+def seed():
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = User(email="oyuncu@example.com", name="Oyuncu")
+        db.add(user)
+        db.flush()
+        for i in range(20):
+            db.add(Post(title=f"Maç #{i}", post_type="team", city="İstanbul", positions_needed=json.dumps(["Kaleci"]),
+                        contact_info={"phone": "05550000000"}, user_id=user.id, status="active"))
+        db.commit()
+
+
+async def call(path: str) -> int:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"localhost")],
+        "client": ("10.0.0.1", 1234), "server": ("localhost", 80),
+    }
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    status = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.Future()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+async def per_request_us(path: str, uncached: bool) -> float:
+    for _ in range(20):
+        await call(path)
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        if uncached:
+            feed_cache.clear()
+        assert await call(path) == 200
+    return (time.perf_counter() - start) / REQUESTS * 1_000_000
+
+
+async def main():
+    seed()
+    handler = logging.FileHandler(os.path.join(tmp, "requests.log"))
+    logging.getLogger("app.requests").addHandler(handler)
+    logging.getLogger("app.requests").propagate = False
+
+    modes = [("off", False, False), ("header", True, False), ("header+log", True, True)]
+    print(f"{REQUESTS} sequential requests (µs/request):")
+    print(f"  {'endpoint':<18}" + "".join(f"{label:>12}" for label, _, _ in modes))
+    for label, path, uncached in (("/ping", "/ping", False), ("/posts (uncached)", "/posts/", True)):
+        results = []
+        for _, enabled, log_requests in modes:
+            use_timing(enabled, log_requests)
+            results.append(await per_request_us(path, uncached))
+        print(f"  {label:<18}" + "".join(f"{us:>12.1f}" for us in results))
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
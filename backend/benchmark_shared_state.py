@@ -0,0 +1,103 @@
+"""
+Benchmark: latency added by the shared-state backends.
+
+For each backend (memory, sqlite, and redis when REDIS_URL is set) measures
+cache get/set/incr and one rate-limiter check, then has WORKERS processes
+increment the same counter concurrently to check that no increment is lost.
+Run: python benchmark_shared_state.py [iterations] [workers]
+     REDIS_URL=redis://localhost:6379/15 python benchmark_shared_state.py
+"""
+import os
+import sys
+import tempfile
+import time
+import multiprocessing
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("GOOGLE_CLIENT_ID", "benchmark")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.core.cache import InMemoryLRUCache
+from app.core.rate_limit import RateLimitPolicy, SharedWindowLimiter, SlidingWindowLimiter
+from app.core.shared_state import RedisCache, SQLiteCache
+
+ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+WORKERS = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+SQLITE_PATH = os.path.join(tempfile.mkdtemp(), "shared-state.db")
+REDIS_URL = os.environ.get("REDIS_URL")
+
+# Tipik bir önbellek değeri: küçük bir feed sayfası
+VALUE = {"etag": "W/\"abc\"", "body": {"posts": [{"id": i, "title": "Kaleci aranıyor"} for i in range(20)]}}
+
+
+def make_cache(backend: str, namespace: str):
+    if backend == "memory":
+        return InMemoryLRUCache(max_entries=100000, ttl=60)
+    if backend == "sqlite":
+        return SQLiteCache(SQLITE_PATH, namespace, max_entries=100000, ttl=60)
+    return RedisCache(REDIS_URL, namespace, max_entries=100000, ttl=60)
+
+
+def per_op_us(func) -> float:
+    start = time.perf_counter()
+    for i in range(ITERATIONS):
+        func(i)
+    return (time.perf_counter() - start) / ITERATIONS * 1_000_000
+
+
+def bench_latency(backend: str):
+    cache = make_cache(backend, "bench")
+    cache.clear()
+    policy = RateLimitPolicy("default", 10**9)
+    if backend == "memory":
+        limiter = SlidingWindowLimiter()
+    else:
+        limiter = SharedWindowLimiter(make_cache(backend, "bench_rl"))
+
+    results = {
+        "set": per_op_us(lambda i: cache.set(f"k{i % 512}", VALUE)),
+        "get hit": per_op_us(lambda i: cache.get(f"k{i % 512}")),
+        "get miss": per_op_us(lambda i: cache.get(f"missing{i}")),
+        "incr": per_op_us(lambda i: cache.incr("counter", 1, ttl=60)),
+        "limiter hit": per_op_us(lambda i: limiter.hit(policy, f"10.0.0.{i % 256}")),
+    }
+    print(f"  {backend:<7}" + "".join(f"{us:>13.1f}" for us in results.values()))
+
+
+def _increment(backend: str, n: int):
+    cache = make_cache(backend, "bench_atomic")
+    for _ in range(n):
+        cache.incr("shared", 1, ttl=60)
+
+
+def check_atomic(backend: str):
+    per_worker = max(ITERATIONS // WORKERS, 1)
+    make_cache(backend, "bench_atomic").clear()
+    processes = [multiprocessing.Process(target=_increment, args=(backend, per_worker)) for _ in range(WORKERS)]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+    total = make_cache(backend, "bench_atomic").get("shared")
+    expected = per_worker * WORKERS
+    status = "OK" if total == expected else "LOST UPDATES"
+    print(f"  {backend:<7} {WORKERS} processes x {per_worker} incr -> {total} / {expected} {status}"
+          f" ({expected / elapsed:,.0f} incr/s)")
+
+
+if __name__ == "__main__":
+    backends = ["memory", "sqlite"] + (["redis"] if REDIS_URL else [])
+    print(f"Latency per operation, {ITERATIONS} ops (µs):")
+    print("  backend" + "".join(f"{name:>13}" for name in ("set", "get hit", "get miss", "incr", "limiter hit")))
+    for backend in backends:
+        bench_latency(backend)
+
+    print("\nConcurrent increments from separate processes:")
+    for backend in backends:
+        if backend != "memory":
+            check_atomic(backend)
+    if not REDIS_URL:
+        print("  (set REDIS_URL to include a Redis-compatible server)")
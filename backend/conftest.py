@@ -0,0 +1,64 @@
+"""
+Shared pytest fixtures
+
+The app reads its settings at import time, so the environment is set here
+before anything from app/ is imported: a throwaway SQLite file (never the
+DATABASE_URL from .env), test secrets and rate limits high enough not to get
+in the way.
+"""
+import os
+import tempfile
+import uuid
+
+_tmp = tempfile.mkdtemp(prefix="findteam-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_tmp, 'test.db')}",
+    GOOGLE_CLIENT_ID="test",
+    GOOGLE_CLIENT_SECRET="test",
+    SECRET_KEY="t" * 40,
+    ENVIRONMENT="test",
+    ADMIN_EMAILS="admin@example.com",
+    ADMIN_MASTER_PASSWORD="admin-test-password",
+    SHARED_STATE_BACKEND="memory",
+    RATE_LIMIT_PER_MINUTE="100000",
+    RATE_LIMIT_AUTH_PER_MINUTE="100000",
+)
+
+import pytest
+from fastapi.testclient import TestClient
+from app.core.query_guard import assert_max_queries
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient on the full app; localhost passes TrustedHostMiddleware (the default testserver does not)"""
+    from app.main import app
+    with TestClient(app, base_url="http://localhost") as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def query_budget():
+    """assert_max_queries: `with query_budget(3): client.get(...)`"""
+    return assert_max_queries
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Bearer header of a freshly registered user"""
+    email = f"user-{uuid.uuid4().hex[:8]}@example.com"
+    response = client.post(
+        "/auth/register",
+        json={"email": email, "password": "secret1", "password_confirm": "secret1", "name": "Oyuncu"},
+    )
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def admin_headers(client):
+    response = client.post(
+        "/admin/auth/login", json={"email": "admin@example.com", "password": "admin-test-password"}
+    )
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
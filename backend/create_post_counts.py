@@ -0,0 +1,20 @@
+"""
+Creates the post_counts table and fills it from the existing posts.
+Safe to re-run; it recomputes every counter from scratch.
+Run once: python create_post_counts.py
+"""
+from app.database.db import engine, SessionLocal
+from app.posts.post_model import PostCount
+from app.posts.post_counts import rebuild_post_counts
+
+PostCount.__table__.create(bind=engine, checkfirst=True)
+print("✅ post_counts tablosu hazır")
+
+db = SessionLocal()
+try:
+    rebuild_post_counts(db)
+    print(f"✅ {db.query(PostCount).count()} sayaç satırı yeniden hesaplandı")
+finally:
+    db.close()
+
+print("✅ Migration tamamlandı")
@@ -0,0 +1,70 @@
+"""Metrics: /metrics exposure rules, merging worker files and folding the files of exited workers"""
+import glob
+import json
+import os
+import time
+
+from app.core import metrics as metrics_module
+from app.core.metrics import TOTALS_FILE, Metrics, metrics_enabled
+
+PING = 'method="GET",route="/ping",status="200"'
+
+
+def requests_total(registry):
+    line = f"findteam_http_requests_total{{{PING}}} "
+    return [float(row[len(line):]) for row in registry.render().splitlines() if row.startswith(line)]
+
+
+def test_metrics_need_a_token_in_production(monkeypatch):
+    settings = metrics_module.settings
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+    monkeypatch.setattr(settings, "ENVIRONMENT", "production")
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    assert not metrics_enabled()
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "token")
+    assert metrics_enabled()
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    monkeypatch.setattr(settings, "ENVIRONMENT", "development")
+    assert metrics_enabled()
+
+
+def test_exited_worker_files_are_folded_into_totals(tmp_path):
+    exited = tmp_path / "metrics-999999-abc.json"
+    exited.write_text(json.dumps({
+        "written": time.time() - 3600,
+        "counters": {"findteam_http_requests_total": {PING: 7}},
+        "gauges": {"findteam_http_requests_in_flight": {"": 50}},
+        "histograms": {},
+    }))
+    old = time.time() - 3600
+    os.utime(exited, (old, old))
+
+    registry = Metrics(directory=str(tmp_path), flush_seconds=1)
+    registry.observe_request("GET", "/ping", 200, 0.01)
+    assert requests_total(registry) == [8]
+    assert not exited.exists()
+    assert registry.folded == 1
+    totals = json.loads((tmp_path / TOTALS_FILE).read_text())
+    assert totals["counters"]["findteam_http_requests_total"][PING] == 7
+    assert "gauges" not in totals
+    # Sonraki taramalarda toplam değişmez, dosya sayısı sabit kalır
+    assert requests_total(registry) == [8]
+    assert len(glob.glob(str(tmp_path / "metrics-*.json"))) == 2
+
+
+def test_stalled_worker_is_not_counted_twice(tmp_path):
+    stalled = Metrics(directory=str(tmp_path), flush_seconds=1)
+    stalled.observe_request("GET", "/ping", 200, 0.01)
+    stalled.flush()
+    (own_file,) = glob.glob(str(tmp_path / "metrics-*.json"))
+    old = time.time() - 3600
+    os.utime(own_file, (old, old))
+
+    # Başka bir worker dosyayı durgun bulup toplamlara katar
+    other = Metrics(directory=str(tmp_path), flush_seconds=1)
+    other.flush()
+    assert not os.path.exists(own_file)
+
+    stalled.observe_request("GET", "/ping", 200, 0.01)
+    assert requests_total(stalled) == [2]
+    assert requests_total(other) == [2]
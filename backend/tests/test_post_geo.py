@@ -0,0 +1,54 @@
+"""GET /posts/?lat=&lon=: radius boundary, distance ordering, paging"""
+import math
+
+from app.posts.post_geo import EARTH_RADIUS_KM, haversine_km
+
+CENTER = (-33.9, 18.4)
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+
+
+def offset(north_km, east_km):
+    lat = CENTER[0] + north_km / KM_PER_DEGREE
+    return lat, CENTER[1] + east_km / (KM_PER_DEGREE * math.cos(math.radians(lat)))
+
+
+def create_located_post(client, headers, title, lat, lon):
+    response = client.post("/posts/", headers=headers, json={
+        "title": title, "post_type": "team", "city": "Cape Town", "contact_info": {"phone": "05550000000"},
+        "positions_needed": ["Kaleci"], "location_link": f"https://www.google.com/maps/@{lat:.6f},{lon:.6f},15z",
+    })
+    assert response.status_code == 200, response.text
+
+
+def test_near_me_radius_boundary_and_ordering(client, auth_headers, query_budget):
+    points = {
+        "9.9 km": offset(9.9, 0),
+        "2 km": offset(0, 2),
+        "5 km": offset(-5, 0),
+        "10.1 km": offset(10.1, 0),
+        # Sınır kutusunun köşesinde ama dairenin dışında (~10.6 km)
+        "corner": offset(7.5, 7.5),
+    }
+    for title, (lat, lon) in points.items():
+        create_located_post(client, auth_headers, title, lat, lon)
+    params = {"lat": CENTER[0], "lon": CENTER[1], "radius_km": 10}
+
+    # Aday taraması + sadece sayfadaki ilanların satırları
+    with query_budget(2):
+        response = client.get("/posts/", params=params)
+    body = response.json()
+    assert [post["title"] for post in body["posts"]] == ["2 km", "5 km", "9.9 km"]
+    assert body["total"] == 3
+    distances = [post["distance_km"] for post in body["posts"]]
+    assert distances == sorted(distances)
+    lat, lon = points["9.9 km"]
+    assert distances[-1] == round(haversine_km(CENTER[0], CENTER[1], lat, lon), 2)
+
+    page = client.get("/posts/", params={**params, "skip": 1, "limit": 1}).json()
+    assert [post["title"] for post in page["posts"]] == ["5 km"]
+    assert page["total"] == 3
+
+
+def test_distance_is_part_of_the_post_schema(client):
+    schema = client.get("/openapi.json").json()["components"]["schemas"]["PostResponse"]
+    assert "distance_km" in schema["properties"]
@@ -0,0 +1,29 @@
+"""Query budgets of the hot read endpoints; a failure lists the statements that ran"""
+from app.posts.post_cache import feed_cache
+
+
+def create_posts(client, headers, count):
+    for i in range(count):
+        response = client.post("/posts/", headers=headers, json={
+            "title": f"Maç {i}", "post_type": "team", "city": "İstanbul",
+            "contact_info": {"phone": "05550000000"}, "positions_needed": ["Kaleci"],
+        })
+        assert response.status_code == 200, response.text
+
+
+def test_post_feed_query_budget(client, auth_headers, query_budget):
+    create_posts(client, auth_headers, 5)
+    feed_cache.clear()
+    # Sayım + sayfa; kullanıcı adları join ile gelir, satır başına sorgu yok
+    with query_budget(2, max_repeats=1):
+        response = client.get("/posts/")
+    assert response.status_code == 200
+    assert len(response.json()["posts"]) >= 5
+
+
+def test_admin_users_query_budget(client, auth_headers, admin_headers, query_budget):
+    client.get("/admin/users", headers=admin_headers)  # admin kimliği önbelleğe girsin
+    with query_budget(2, max_repeats=1):
+        response = client.get("/admin/users", headers=admin_headers)
+    assert response.status_code == 200
+    assert len(response.json()) >= 2
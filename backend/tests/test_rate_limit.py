@@ -0,0 +1,81 @@
+"""Rate limiting and the IP whitelist as wired in app/main.py: X-Forwarded-For only counts from a trusted proxy"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+from app.core.rate_limit import RateLimitPolicy, SlidingWindowLimiter
+from app.middleware.security import IPWhitelistMiddleware, RateLimitMiddleware
+
+# TestClient isteklerinin bağlantı adresi
+PEER = "testclient"
+
+
+def find_middleware(app, cls):
+    layer = app.middleware_stack
+    while layer is not None and not isinstance(layer, cls):
+        layer = getattr(layer, "app", None)
+    assert layer is not None, f"{cls.__name__} is not in the middleware stack"
+    return layer
+
+
+@pytest.fixture
+def login(client, monkeypatch):
+    limiter = find_middleware(client.app, RateLimitMiddleware)
+    monkeypatch.setattr(limiter, "limiter", SlidingWindowLimiter())
+    monkeypatch.setitem(limiter.route_policies, "/auth/login", RateLimitPolicy("auth-test", 2))
+
+    def post(forwarded_for):
+        return client.post(
+            "/auth/login", json={"email": "nobody@example.com", "password": "x"},
+            headers={"X-Forwarded-For": forwarded_for},
+        ).status_code
+
+    return post
+
+
+def trust_peer(client, monkeypatch):
+    proxy = find_middleware(client.app, ProxyHeadersMiddleware)
+    monkeypatch.setattr(proxy, "trusted_hosts", {PEER})
+    monkeypatch.setattr(proxy, "always_trust", False)
+
+
+def test_spoofed_forwarded_for_from_untrusted_peer_does_not_reset_budget(login):
+    # Bağlanan adres FORWARDED_ALLOW_IPS'te değil: başlık yok sayılır, bütçe bağlantı adresine ait
+    assert [login(f"203.0.113.{i}") for i in range(3)] == [401, 401, 429]
+
+
+def test_trusted_proxy_clients_get_independent_budgets(client, login, monkeypatch):
+    trust_peer(client, monkeypatch)
+    assert [login("203.0.113.1") for _ in range(3)] == [401, 401, 429]
+    # Sola eklenen sahte adres işe yaramaz: proxy'nin eklediği en sağdaki adres sayılır
+    assert login("198.51.100.99, 203.0.113.1") == 429
+    # Aynı proxy arkasındaki başka bir istemcinin kendi bütçesi var
+    assert login("203.0.113.2") == 401
+
+
+def whitelist_client(trusted_hosts):
+    app = FastAPI()
+
+    @app.get("/admin/ping")
+    def ping():
+        return {"ok": True}
+
+    # main.py ile aynı sıra: önce whitelist, sonra (dışta çalışan) proxy başlıkları
+    app.add_middleware(IPWhitelistMiddleware, whitelist=["198.51.100.7"])
+    app.add_middleware(ProxyHeadersMiddleware, trusted_hosts=trusted_hosts)
+    return TestClient(app)
+
+
+def test_ip_whitelist_sees_the_client_behind_a_trusted_proxy():
+    test_client = whitelist_client([PEER])
+    assert test_client.get("/admin/ping", headers={"X-Forwarded-For": "198.51.100.7"}).status_code == 200
+    assert test_client.get("/admin/ping", headers={"X-Forwarded-For": "198.51.100.8"}).status_code == 403
+    # İstemcinin yazdığı whitelist adresi, proxy'nin eklediği gerçek adresin solunda kalır
+    spoofed = {"X-Forwarded-For": "198.51.100.7, 198.51.100.8"}
+    assert test_client.get("/admin/ping", headers=spoofed).status_code == 403
+
+
+def test_ip_whitelist_rejects_spoofed_header_from_untrusted_peer():
+    test_client = whitelist_client(["10.0.0.1"])
+    assert test_client.get("/admin/ping", headers={"X-Forwarded-For": "198.51.100.7"}).status_code == 403
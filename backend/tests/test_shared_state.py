@@ -0,0 +1,189 @@
+"""Shared cache backends: private SQLite file, Redis against a fake, failing open, what the identity cache stores"""
+import asyncio
+import fnmatch
+import os
+import stat
+import time
+
+import pytest
+
+from app.core import shared_state
+from app.core.rate_limit import RateLimitPolicy, SharedWindowLimiter
+from app.core.shared_state import RedisCache, SQLiteCache, create_cache
+from app.users.user_cache import IDENTITY_KEY_PREFIX, identity_cache
+
+
+class FakeRedis:
+    """The few redis.Redis calls RedisCache makes, on a dict with millisecond expiry"""
+
+    def __init__(self):
+        self.data = {}
+        self.down = False
+
+    def _check(self):
+        if self.down:
+            raise ConnectionError("redis is down")
+
+    def _live(self, name):
+        entry = self.data.get(name)
+        if entry is not None and entry[1] <= time.monotonic():
+            del self.data[name]
+            return None
+        return entry
+
+    def get(self, name):
+        self._check()
+        entry = self._live(name)
+        return entry[0] if entry else None
+
+    def set(self, name, value, px=None, nx=False):
+        self._check()
+        if nx and self._live(name):
+            return None
+        value = value if isinstance(value, bytes) else str(value).encode()
+        self.data[name] = (value, time.monotonic() + px / 1000)
+        return True
+
+    def incrby(self, name, amount):
+        self._check()
+        value, expires = self._live(name) or (b"0", float("inf"))
+        value = int(value) + amount
+        self.data[name] = (str(value).encode(), expires)
+        return value
+
+    def delete(self, *names):
+        self._check()
+        for name in names:
+            self.data.pop(name, None)
+
+    def scan_iter(self, match, count):
+        self._check()
+        # RedisCache kaçış karakterli desen gönderir; fnmatch için köşeli parantez kaçışına çevrilir
+        pattern = match.replace("\\*", "[*]").replace("\\?", "[?]")
+        return [name.encode() for name in list(self.data) if self._live(name) and fnmatch.fnmatchcase(name, pattern)]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def set(self, *args, **kwargs):
+        self.calls.append((self.client.set, args, kwargs))
+
+    def incrby(self, *args):
+        self.calls.append((self.client.incrby, args, {}))
+
+    def execute(self):
+        return [func(*args, **kwargs) for func, args, kwargs in self.calls]
+
+
+def test_sqlite_backend_requires_a_path(monkeypatch):
+    monkeypatch.setattr(shared_state.settings, "SHARED_STATE_BACKEND", "sqlite")
+    monkeypatch.setattr(shared_state.settings, "SHARED_STATE_URL", "")
+    with pytest.raises(ValueError):
+        create_cache("test")
+
+
+def test_sqlite_file_is_created_private(tmp_path):
+    path = str(tmp_path / "state.db")
+    cache = SQLiteCache(path, "test")
+    cache.set("k", {"v": 1})
+    assert cache.get("k") == {"v": 1}
+    for name in (path, path + "-wal", path + "-shm"):
+        if os.path.exists(name):
+            assert stat.S_IMODE(os.stat(name).st_mode) & 0o077 == 0, name
+
+
+def test_sqlite_refuses_a_file_others_can_write(tmp_path):
+    path = tmp_path / "state.db"
+    path.touch()
+    path.chmod(0o666)
+    cache = SQLiteCache(str(path), "test")
+    with pytest.raises(PermissionError):
+        cache.incr("k")
+    # Okuma/yazma açık kalır: önbellek boşmuş gibi davranır, hata sayılır
+    assert cache.get("k") is None
+    assert cache.stats()["errors"] >= 1
+
+
+def test_sqlite_refuses_a_file_of_another_user(tmp_path, monkeypatch):
+    path = tmp_path / "state.db"
+    path.touch()
+    path.chmod(0o600)
+    monkeypatch.setattr(os, "getuid", lambda: os.stat(path).st_uid + 1)
+    with pytest.raises(PermissionError):
+        SQLiteCache(str(path), "test").incr("k")
+
+
+def test_redis_cache_against_a_fake():
+    fake = FakeRedis()
+    cache = RedisCache("redis://unused", "feeds", client=fake)
+    other = RedisCache("redis://unused", "counts", client=fake)
+
+    cache.set("posts:a", {"etag": "x"})
+    cache.set("posts:b*", [1, 2])
+    cache.set("other", 1, ttl=0.01)
+    other.set("posts:a", 5)
+    assert cache.get("posts:a") == {"etag": "x"}
+    assert cache.get("missing") is None
+    assert sorted(cache.keys("posts:")) == ["posts:a", "posts:b*"]
+    assert cache.keys("posts:b*") == ["posts:b*"]
+
+    time.sleep(0.02)
+    assert cache.get("other") is None
+    assert cache.incr("n", 2, ttl=60) == 2
+    assert cache.incr("n", 3, ttl=60) == 5
+
+    cache.delete(["posts:a"])
+    assert cache.get("posts:a") is None
+    cache.clear()
+    assert cache.keys() == []
+    assert other.get("posts:a") == 5
+    stats = cache.stats()
+    assert stats["backend"] == "redis" and stats["hits"] == 1 and stats["misses"] == 3 and stats["errors"] == 0
+
+
+def test_redis_cache_fails_open():
+    fake = FakeRedis()
+    cache = RedisCache("redis://unused", "feeds", client=fake)
+    cache.set("k", 1)
+    fake.down = True
+    assert cache.get("k") is None
+    cache.set("k", 2)
+    cache.delete(["k"])
+    assert cache.keys() == []
+    assert asyncio.run(cache.aget("k")) is None
+    assert cache.stats()["errors"] == 5
+
+
+def test_shared_limiter_on_redis_limits_and_fails_open():
+    fake = FakeRedis()
+    limiter = SharedWindowLimiter(RedisCache("redis://unused", "rate_limit", client=fake))
+    policy = RateLimitPolicy("auth", 3)
+    results = [asyncio.run(limiter.ahit(policy, "1.2.3.4")).allowed for _ in range(4)]
+    assert results == [True, True, True, False]
+    assert asyncio.run(limiter.ahit(policy, "5.6.7.8")).allowed
+
+    fake.down = True
+    assert asyncio.run(limiter.ahit(policy, "1.2.3.4")).allowed
+    stats = limiter.stats()
+    assert stats["failed_open"] == 1 and stats["rejected"] == 1
+
+
+def test_identity_cache_stores_no_password_or_profile(client, auth_headers):
+    identity_cache.clear()
+    assert client.get("/users/profile", headers=auth_headers).status_code == 200
+    # İkinci istek kullanıcıyı önbellekten alır; profil alanları yine de yüklenmeli
+    response = client.get("/users/profile", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["name"] == "Oyuncu"
+
+    entries = [identity_cache.get(key) for key in identity_cache.keys(IDENTITY_KEY_PREFIX)]
+    assert entries
+    for entry in entries:
+        assert set(entry) <= {"id", "email", "name", "is_active", "is_admin", "role", "updated_at"}
+        assert "hashed_password" not in entry and "phone" not in entry
@@ -0,0 +1,21 @@
+"""Verified-token cache: the per-user index stays bounded"""
+import time
+
+from app.core import token_cache as tokens
+
+
+def test_repeated_logins_of_one_user_stay_bounded():
+    user_id = 987654
+    payload = {"sub": "many@example.com", "user_id": user_id, "exp": time.time() + 600}
+    issued = [f"token-{i}" for i in range(tokens.MAX_TOKENS_PER_USER * 3)]
+    for token in issued:
+        tokens.cache_payload(token, payload)
+
+    assert len(tokens._keys_by_user[user_id]) == tokens.MAX_TOKENS_PER_USER
+    # En eski token'lar önbellekten de düşer; en yeniler kalır
+    assert tokens.get_cached_payload(issued[0]) is None
+    assert tokens.get_cached_payload(issued[-1]) == payload
+
+    tokens.purge_user_tokens(user_id)
+    assert user_id not in tokens._keys_by_user
+    assert all(tokens.get_cached_payload(token) is None for token in issued)
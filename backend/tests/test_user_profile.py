@@ -0,0 +1,18 @@
+"""Profile updates and the caches that hold profile data"""
+
+
+def test_name_change_is_visible_in_cached_feed(client, auth_headers):
+    response = client.post("/posts/", headers=auth_headers, json={
+        "title": "İsim testi", "post_type": "team", "city": "İzmir",
+        "contact_info": {"phone": "05550000000"}, "positions_needed": ["Kaleci"],
+    })
+    assert response.status_code == 200, response.text
+    post_id = response.json()["id"]
+
+    def author_name():
+        posts = client.get("/posts/", params={"city": "İzmir"}).json()["posts"]
+        return next(post["user_name"] for post in posts if post["id"] == post_id)
+
+    assert author_name() == "Oyuncu"  # sayfa önbelleğe girer
+    assert client.put("/users/profile", headers=auth_headers, json={"name": "Yeni İsim"}).status_code == 200
+    assert author_name() == "Yeni İsim"